@@ -0,0 +1,156 @@
+import ipaddress
+import json
+import sqlite3
+import threading
+import time
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS incidentes (
+    id TEXT PRIMARY KEY,
+    display_id TEXT,
+    severity TEXT,
+    severidad_idx INTEGER,
+    status TEXT,
+    updated_at TEXT,
+    summary TEXT,
+    listado TEXT,
+    detalles TEXT,
+    sincronizado REAL
+);
+CREATE INDEX IF NOT EXISTS idx_incidentes_severidad ON incidentes (severidad_idx, updated_at);
+CREATE INDEX IF NOT EXISTS idx_incidentes_status ON incidentes (status);
+CREATE INDEX IF NOT EXISTS idx_incidentes_updated_at ON incidentes (updated_at);
+CREATE INDEX IF NOT EXISTS idx_incidentes_display_id ON incidentes (display_id);
+CREATE TABLE IF NOT EXISTS incidente_ips (
+    ip TEXT NOT NULL,
+    incident_id TEXT NOT NULL,
+    PRIMARY KEY (ip, incident_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_incidente_ips_incidente ON incidente_ips (incident_id);
+"""
+
+# Sólo se actualiza si la versión recibida es más reciente que la guardada
+_UPSERT_LISTADO = """
+INSERT INTO incidentes (id, display_id, severity, severidad_idx, status, updated_at, summary, listado, sincronizado)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    display_id = excluded.display_id, severity = excluded.severity, severidad_idx = excluded.severidad_idx,
+    status = excluded.status, updated_at = excluded.updated_at, summary = excluded.summary,
+    listado = excluded.listado, sincronizado = excluded.sincronizado
+WHERE excluded.updated_at > COALESCE(incidentes.updated_at, '')
+"""
+
+
+def _ips_de_detalles(detalles):
+    """Extrae las IPs válidas de los assets e indicadores de un incidente."""
+    data = detalles.get("data", {}) if isinstance(detalles, dict) else {}
+    ips = set()
+    for obj in data.get("assets", []) + data.get("indicators", []):
+        valor = obj.get("value") if isinstance(obj, dict) else None
+        if isinstance(valor, str):
+            try:
+                ips.add(str(ipaddress.ip_address(valor.strip())))
+            except ValueError:
+                pass
+    return ips
+
+
+class AlmacenIncidentes:
+    """Copia local en SQLite de los incidentes vistos por la ingesta, indexada para consultas rápidas.
+
+    Guarda el listado y, cuando se obtienen, los detalles de cada incidente, más una tabla IP → incidente
+    construida a partir de sus assets e indicadores. 'severidades' es la lista ordenada de menor a mayor
+    severidad, con la que se indexa para filtrar por severidad mínima.
+    """
+
+    def __init__(self, ruta, severidades):
+        self.ruta = ruta
+        self._indices_severidad = {s: i for i, s in enumerate(severidades)}
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._conexion.row_factory = sqlite3.Row
+        with self._lock, self._conexion:
+            self._conexion.execute("PRAGMA journal_mode=WAL")
+            self._conexion.executescript(_ESQUEMA)
+
+    def cerrar(self):
+        with self._lock:
+            self._conexion.close()
+
+    def _indice_severidad(self, severity):
+        return self._indices_severidad.get((severity or "").lower(), -1)
+
+    def _fila_listado(self, incident, ahora):
+        return (
+            incident.get("id"),
+            incident.get("display_id"),
+            (incident.get("severity") or "").lower(),
+            self._indice_severidad(incident.get("severity")),
+            (incident.get("status") or "").lower(),
+            incident.get("updated_at") or "",
+            incident.get("summary"),
+            json.dumps(incident, ensure_ascii=False),
+            ahora,
+        )
+
+    def sincronizar_listado(self, incidentes):
+        """Inserta o actualiza los incidentes de un listado. Devuelve cuántos se han escrito."""
+        ahora = time.time()
+        filas = [self._fila_listado(inc, ahora) for inc in incidentes if inc.get("id")]
+        with self._lock, self._conexion:
+            antes = self._conexion.total_changes
+            self._conexion.executemany(_UPSERT_LISTADO, filas)
+            return self._conexion.total_changes - antes
+
+    def guardar_detalles(self, incident_uuid, detalles):
+        """Guarda los detalles de un incidente y actualiza su tabla de IPs."""
+        data = detalles.get("data", {}) if isinstance(detalles, dict) else {}
+        ips = _ips_de_detalles(detalles)
+        ahora = time.time()
+        with self._lock, self._conexion:
+            if data:
+                self._conexion.execute(_UPSERT_LISTADO, self._fila_listado(dict(data, id=incident_uuid), ahora))
+            self._conexion.execute("UPDATE incidentes SET detalles = ?, sincronizado = ? WHERE id = ?",
+                                   (json.dumps(detalles, ensure_ascii=False), ahora, incident_uuid))
+            self._conexion.execute("DELETE FROM incidente_ips WHERE incident_id = ?", (incident_uuid,))
+            self._conexion.executemany("INSERT OR IGNORE INTO incidente_ips (ip, incident_id) VALUES (?, ?)",
+                                       [(ip, incident_uuid) for ip in ips])
+
+    def por_severidad_minima(self, severidad_minima, desde=None, estados=None):
+        """Devuelve los incidentes (dict del listado) con severidad >= 'severidad_minima', opcionalmente desde una fecha."""
+        consulta = "SELECT listado FROM incidentes WHERE severidad_idx >= ?"
+        parametros = [self._indice_severidad(severidad_minima)]
+        if desde:
+            consulta += " AND updated_at >= ?"
+            parametros.append(desde)
+        if estados:
+            consulta += f" AND status IN ({', '.join('?' for _ in estados)})"
+            parametros.extend(e.lower() for e in estados)
+        consulta += " ORDER BY updated_at DESC"
+        with self._lock:
+            return [json.loads(fila["listado"]) for fila in self._conexion.execute(consulta, parametros)]
+
+    def buscar(self, clave):
+        """Busca por UUID o Display ID. Devuelve el incidente tal como vino en el listado, o None."""
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT listado FROM incidentes WHERE id = ? OR display_id = ?", (clave, clave)).fetchone()
+        return json.loads(fila["listado"]) if fila else None
+
+    def detalle(self, clave):
+        """Busca por UUID o Display ID. Devuelve (detalles, sincronizado) o (None, None) si no hay detalles guardados."""
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT detalles, sincronizado FROM incidentes WHERE (id = ? OR display_id = ?) AND detalles IS NOT NULL",
+                (clave, clave)).fetchone()
+        if fila is None:
+            return None, None
+        return json.loads(fila["detalles"]), fila["sincronizado"]
+
+    def incidentes_por_ip(self, ip):
+        """Devuelve los incidentes (dict del listado) en cuyos assets o indicadores aparece la IP."""
+        with self._lock:
+            filas = self._conexion.execute(
+                "SELECT i.listado FROM incidente_ips p JOIN incidentes i ON i.id = p.incident_id "
+                "WHERE p.ip = ? ORDER BY i.updated_at DESC", (ip,)).fetchall()
+        return [json.loads(fila["listado"]) for fila in filas]
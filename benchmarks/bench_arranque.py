@@ -0,0 +1,73 @@
+"""Benchmark del tiempo de importación de xdr2splunk/xdr.
+
+Importa cada módulo en un intérprete nuevo (desde un directorio vacío, sin 'config.properties')
+y compara el tiempo con el de un intérprete que no importa nada. Falla (código de salida 1) si
+la importación supera el umbral o si tiene efectos secundarios: importar 'requests'/'urllib3'
+o leer la configuración.
+
+Uso:
+    python benchmarks/bench_arranque.py [--repeticiones 20] [--umbral-ms 15]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMPROBACION = (
+    "import sys, {modulo}\n"
+    "import xdr2splunk\n"
+    "pesados = [m for m in ('requests', 'urllib3') if m in sys.modules]\n"
+    "assert not pesados, f'importa dependencias pesadas: {{pesados}}'\n"
+    "assert not xdr2splunk.config.cargada, 'lee la configuración al importar'\n"
+)
+
+
+def _medir(codigo, repeticiones, entorno, cwd):
+    """Devuelve la mediana en segundos de ejecutar 'codigo' en un intérprete nuevo."""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        subprocess.run([sys.executable, "-c", codigo], check=True, env=entorno, cwd=cwd)
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--umbral-ms", type=float, default=15.0,
+                        help="Coste máximo permitido de la importación sobre un intérprete vacío (ms)")
+    args = parser.parse_args()
+
+    entorno = dict(os.environ, PYTHONPATH=RAIZ_REPO)
+    # Se mide el arranque habitual, con el bytecode ya en caché en __pycache__
+    entorno.pop("PYTHONDONTWRITEBYTECODE", None)
+    fallos = 0
+    with tempfile.TemporaryDirectory() as vacio:
+        base = _medir("pass", args.repeticiones, entorno, vacio)
+        print(f"Intérprete vacío: {base * 1000:.1f} ms")
+        for modulo in ("xdr2splunk", "xdr"):
+            try:
+                subprocess.run([sys.executable, "-c", COMPROBACION.format(modulo=modulo)],
+                               check=True, env=entorno, cwd=vacio)
+            except subprocess.CalledProcessError:
+                print(f"❌ 'import {modulo}' tiene efectos secundarios.")
+                fallos += 1
+                continue
+            _medir(f"import {modulo}", 1, entorno, vacio)
+            total = _medir(f"import {modulo}", args.repeticiones, entorno, vacio)
+            coste_ms = (total - base) * 1000
+            estado = "✅" if coste_ms <= args.umbral_ms else "❌"
+            print(f"{estado} import {modulo}: {total * 1000:.1f} ms (+{coste_ms:.1f} ms, umbral {args.umbral_ms:.0f} ms)")
+            if coste_ms > args.umbral_ms:
+                fallos += 1
+    sys.exit(1 if fallos else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""Prueba de escala de las funciones que recorren incidentes, con datos sintéticos reproducibles.
+
+Genera con 'generador.py' listados y detalles de incidentes a varias escalas y mide, para
+ip_in_assets_indicators, filtrar_por_severidad y el bucle de get_incidents_original (con la API
+XDR y Splunk simulados en memoria), el tiempo de CPU, el tiempo real, el pico de memoria y la
+memoria y bloques que quedan asignados al terminar (tracemalloc). La columna 'Crec.' compara el
+crecimiento del tiempo de CPU con el del número de incidentes: ~1 es lineal, por encima de 1.5
+se marca como superlineal.
+
+El tiempo y la memoria se miden en pasadas separadas para que tracemalloc no altere los tiempos.
+En el bucle se descuenta el tiempo del generador de detalles.
+
+Uso:
+    python benchmarks/bench_escala.py [--tamanos 1000,10000,100000] [--semilla 42]
+                                      [--media-assets 5] [--media-indicadores 10] [--config config.properties]
+"""
+import argparse
+import contextlib
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+RAIZ_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ_REPO)
+
+import xdr2splunk  # noqa: E402
+from generador import GeneradorIncidentes  # noqa: E402
+
+# Incidentes cuyos detalles se generan a la vez (acota la memoria de la propia prueba)
+BLOQUE = 1000
+
+
+class Medicion:
+    """Acumula CPU, tiempo real y memoria de los tramos medidos de una función."""
+
+    def __init__(self, con_memoria):
+        self.con_memoria = con_memoria
+        self.cpu = 0.0
+        self.real = 0.0
+        self.pico = 0
+        self.retenido = 0
+        self.bloques = 0
+
+    @contextlib.contextmanager
+    def tramo(self):
+        gc.collect()
+        if self.con_memoria:
+            tracemalloc.start()
+        cpu, real = time.process_time(), time.perf_counter()
+        try:
+            yield
+        finally:
+            self.cpu += time.process_time() - cpu
+            self.real += time.perf_counter() - real
+            if self.con_memoria:
+                actual, pico = tracemalloc.get_traced_memory()
+                self.pico = max(self.pico, pico)
+                self.retenido += actual
+                self.bloques += sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+                tracemalloc.stop()
+
+    def descontar(self, cpu, real):
+        """Resta el coste de trabajo ajeno a la función medida (p. ej. generar detalles)."""
+        self.cpu -= cpu
+        self.real -= real
+
+
+def medir_ip_in_assets_indicators(listado, generador, medicion):
+    for inicio in range(0, len(listado), BLOQUE):
+        bloque = [generador.detalles(inc) for inc in listado[inicio:inicio + BLOQUE]]
+        with medicion.tramo():
+            for detalles in bloque:
+                xdr2splunk.ip_in_assets_indicators(detalles, xdr2splunk.IPS_PELIGROSAS)
+
+
+def medir_filtrar_por_severidad(listado, generador, medicion):
+    with medicion.tramo():
+        xdr2splunk.filtrar_por_severidad(listado, minima="medium")
+        xdr2splunk.filtrar_por_severidad(listado, maxima="medium", estados=["new", "in progress"])
+
+
+def medir_get_incidents_original(listado, generador, medicion):
+    por_id = {inc["id"]: inc for inc in listado}
+
+    def detalles_simulados(token, incident_uuid):
+        cpu, real = time.process_time(), time.perf_counter()
+        detalles = generador.detalles(por_id[incident_uuid])
+        medicion.descontar(time.process_time() - cpu, time.perf_counter() - real)
+        return detalles
+
+    xdr2splunk.obtener_incidentes_api = lambda token, hours_ago, limit=10000, offset=0, status_filter=None: list(listado)
+    xdr2splunk.get_incident_details = detalles_simulados
+    xdr2splunk.send_to_splunk = lambda event: True
+    xdr2splunk.comentar_ticket = lambda token, display_id, comment_text, user_email: True
+    xdr2splunk.close_ticket = lambda token, incident_uuid: True
+    with open(os.devnull, "w", encoding="utf-8") as nulo, contextlib.redirect_stdout(nulo), medicion.tramo():
+        xdr2splunk.get_incidents_original("token", "bench@example.com", global_hours_ago=24)
+
+
+ESCENARIOS = (
+    ("ip_in_assets_indicators", medir_ip_in_assets_indicators),
+    ("filtrar_por_severidad", medir_filtrar_por_severidad),
+    ("get_incidents_original", medir_get_incidents_original),
+)
+
+
+def _reiniciar_estado():
+    """Descarta el estado cacheado del módulo (proyección, huellas, circuitos, reglas...) entre pasadas."""
+    xdr2splunk._proyeccion_cargada = False
+    xdr2splunk._registro_huellas_cargado = False
+    xdr2splunk._circuitos = None
+    xdr2splunk._cola_reintentos = None
+    xdr2splunk._almacen_cargado = False
+    # Cada pasada compila de nuevo las reglas, así que sus contadores no pasan de una a otra
+    xdr2splunk._motor_reglas = None
+    xdr2splunk._motor_reglas_cargado = False
+    # El enviador HEC y los [DESTINOS] harían peticiones reales: se usa siempre send_to_splunk simulado
+    xdr2splunk._enviador_hec = None
+    xdr2splunk._enviador_hec_cargado = True
+    xdr2splunk._distribuidor = None
+    xdr2splunk._distribuidor_cargado = True
+
+
+def _ejecutar(funcion, listado, generador, con_memoria):
+    _reiniciar_estado()
+    medicion = Medicion(con_memoria)
+    with tempfile.TemporaryDirectory() as directorio:
+        anterior = os.getcwd()
+        os.chdir(directorio)
+        try:
+            funcion(listado, generador, medicion)
+        finally:
+            os.chdir(anterior)
+    return medicion
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tamanos", default="1000,10000,100000",
+                        help="Números de incidentes a probar, separados por comas")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--media-assets", type=float, default=5)
+    parser.add_argument("--media-indicadores", type=float, default=10)
+    parser.add_argument("--config", help="config.properties a usar (por defecto, ninguna funcionalidad opcional)")
+    args = parser.parse_args()
+
+    if args.config:
+        xdr2splunk.config.ruta = os.path.abspath(args.config)
+        if not xdr2splunk.config.cargar():
+            sys.exit(1)
+    else:
+        xdr2splunk.config.cargada = True
+
+    tamanos = [int(t) for t in args.tamanos.split(",") if t.strip()]
+    generador = GeneradorIncidentes(args.semilla, media_assets=args.media_assets,
+                                    media_indicadores=args.media_indicadores,
+                                    ips_peligrosas=xdr2splunk.IPS_PELIGROSAS)
+
+    print(f"{'Función':<25} {'Incidentes':>10} {'CPU (s)':>9} {'µs/inc.':>8} {'Real (s)':>9} "
+          f"{'Pico (MB)':>10} {'Retenido (MB)':>13} {'Bloques':>9} {'Crec.':>6}")
+    anteriores = {}
+    for n in tamanos:
+        listado = generador.listado(n)
+        for nombre, funcion in ESCENARIOS:
+            tiempos = _ejecutar(funcion, listado, generador, con_memoria=False)
+            memoria = _ejecutar(funcion, listado, generador, con_memoria=True)
+            crecimiento = ""
+            if nombre in anteriores and anteriores[nombre][1] > 0:
+                n_previo, cpu_previa = anteriores[nombre]
+                factor = (tiempos.cpu / cpu_previa) / (n / n_previo)
+                crecimiento = f"{factor:.2f}" + (" ⚠️" if factor > 1.5 else "")
+            anteriores[nombre] = (n, tiempos.cpu)
+            print(f"{nombre:<25} {n:>10} {tiempos.cpu:>9.3f} {tiempos.cpu / n * 1e6:>8.1f} {tiempos.real:>9.3f} "
+                  f"{memoria.pico / 1e6:>10.2f} {memoria.retenido / 1e6:>13.2f} {memoria.bloques:>9} {crecimiento:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Micro-benchmark de codificación JSON de eventos de incidentes.
+
+Compara, sobre detalles de incidentes sintéticos (generador.py) de varios tamaños, la codificación
+que hacía 'requests' con json= (json.dumps por defecto), json.dumps compacto, orjson (si está
+instalado) y serializacion.codificar_evento_hec, que es la que usa el proceso de ingesta. También
+mide la decodificación. Comprueba que todas las codificaciones decodifican al mismo evento.
+
+Uso:
+    python benchmarks/bench_json.py [--eventos 2000] [--repeticiones 5] [--semilla 42]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+RAIZ_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ_REPO)
+
+import serializacion  # noqa: E402
+from generador import GeneradorIncidentes  # noqa: E402
+
+# (nombre, media de assets, media de indicadores)
+PERFILES = (
+    ("pequeño", 2, 3),
+    ("típico", 5, 10),
+    ("grande", 50, 300),
+)
+
+
+def _codificadores():
+    codificadores = [
+        # Lo que hace requests.post(json=...): json.dumps con separadores por defecto y escapando no-ASCII
+        ("requests json=", lambda evento: json.dumps({"event": evento}, allow_nan=False).encode("utf-8")),
+        ("json compacto", lambda evento: json.dumps({"event": evento}, separators=(",", ":"),
+                                                    ensure_ascii=False).encode("utf-8")),
+    ]
+    if serializacion.orjson is not None:
+        codificadores.append(("orjson", lambda evento: serializacion.orjson.dumps({"event": evento})))
+    codificadores.append((f"serializacion ({serializacion.MOTOR})", serializacion.codificar_evento_hec))
+    return codificadores
+
+
+def _decodificadores():
+    decodificadores = [("json.loads", json.loads)]
+    if serializacion.orjson is not None:
+        decodificadores.append(("orjson.loads", serializacion.orjson.loads))
+    return decodificadores
+
+
+def _mejor_tiempo(funcion, valores, repeticiones):
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for valor in valores:
+            funcion(valor)
+        transcurrido = time.perf_counter() - inicio
+        mejor = transcurrido if mejor is None else min(mejor, transcurrido)
+    return mejor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--eventos", type=int, default=2000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--semilla", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"Motor de serialización activo: {serializacion.MOTOR}")
+    fallos = 0
+    for perfil, media_assets, media_indicadores in PERFILES:
+        generador = GeneradorIncidentes(args.semilla, media_assets=media_assets, media_indicadores=media_indicadores)
+        eventos = [generador.detalles(inc)["data"] for inc in generador.listado(args.eventos)]
+        print(f"\n--- Perfil '{perfil}' ({args.eventos} eventos) ---")
+        print(f"{'Codificador':<24} {'µs/evento':>10} {'MB/s':>8} {'Bytes/evento':>13}")
+        for nombre, codificar in _codificadores():
+            cuerpos = [codificar(evento) for evento in eventos]
+            if any(json.loads(cuerpo)["event"] != evento for cuerpo, evento in zip(cuerpos, eventos)):
+                print(f"❌ '{nombre}' no reproduce el evento original.")
+                fallos += 1
+            total_bytes = sum(len(cuerpo) for cuerpo in cuerpos)
+            tiempo = _mejor_tiempo(codificar, eventos, args.repeticiones)
+            print(f"{nombre:<24} {tiempo / len(eventos) * 1e6:>10.1f} {total_bytes / tiempo / 1e6:>8.1f} "
+                  f"{total_bytes / len(eventos):>13.0f}")
+        cuerpos = [serializacion.codificar_evento_hec(evento) for evento in eventos]
+        total_bytes = sum(len(cuerpo) for cuerpo in cuerpos)
+        for nombre, decodificar in _decodificadores():
+            tiempo = _mejor_tiempo(decodificar, cuerpos, args.repeticiones)
+            print(f"{nombre:<24} {tiempo / len(eventos) * 1e6:>10.1f} {total_bytes / tiempo / 1e6:>8.1f} "
+                  f"{total_bytes / len(eventos):>13.0f}")
+    sys.exit(1 if fallos else 0)
+
+
+if __name__ == "__main__":
+    main()
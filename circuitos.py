@@ -0,0 +1,132 @@
+import json
+import os
+import threading
+import time
+
+# Estados de un circuit breaker
+CERRADO = "cerrado"
+ABIERTO = "abierto"
+SEMIABIERTO = "semiabierto"
+
+
+class CircuitBreaker:
+    """Circuit breaker para un destino (Splunk, API XDR...).
+
+    Tras 'umbral_fallos' fallos seguidos se abre y rechaza las llamadas al instante. Pasados
+    'tiempo_apertura' segundos deja pasar una única llamada de prueba (semiabierto): si va bien
+    se cierra y si falla vuelve a abrirse.
+    """
+
+    def __init__(self, nombre, umbral_fallos=5, tiempo_apertura=60.0):
+        self.nombre = nombre
+        self.umbral_fallos = max(1, umbral_fallos)
+        self.tiempo_apertura = tiempo_apertura
+        self.estado = CERRADO
+        self.fallos_seguidos = 0
+        self.aperturas = 0
+        self.rechazadas = 0
+        self._abierto_desde = 0.0
+        self._sonda_en_curso = False
+        self._lock = threading.Lock()
+
+    def permitir(self):
+        """Indica si se puede hacer la llamada. En semiabierto sólo se permite una sonda a la vez."""
+        with self._lock:
+            if self.estado == CERRADO:
+                return True
+            if self.estado == ABIERTO and time.monotonic() - self._abierto_desde >= self.tiempo_apertura:
+                self.estado = SEMIABIERTO
+                self._sonda_en_curso = False
+            if self.estado == SEMIABIERTO and not self._sonda_en_curso:
+                self._sonda_en_curso = True
+                print(f"🔌 Circuito '{self.nombre}' semiabierto: enviando petición de prueba.")
+                return True
+            self.rechazadas += 1
+            return False
+
+    def registrar_exito(self):
+        with self._lock:
+            if self.estado != CERRADO:
+                print(f"✅ Circuito '{self.nombre}' cerrado: el servicio vuelve a responder.")
+            self.estado = CERRADO
+            self.fallos_seguidos = 0
+            self._sonda_en_curso = False
+
+    def registrar_fallo(self):
+        with self._lock:
+            self.fallos_seguidos += 1
+            if self.estado == SEMIABIERTO or (self.estado == CERRADO and self.fallos_seguidos >= self.umbral_fallos):
+                self.estado = ABIERTO
+                self._abierto_desde = time.monotonic()
+                self._sonda_en_curso = False
+                self.aperturas += 1
+                print(f"⛔ Circuito '{self.nombre}' abierto tras {self.fallos_seguidos} fallos seguidos; "
+                      f"se reintentará en {self.tiempo_apertura:.0f}s.")
+
+    def registrar_respuesta(self, status_code):
+        """Registra una respuesta HTTP: 429 y 5xx cuentan como fallo del servicio, el resto como éxito."""
+        if status_code == 429 or status_code >= 500:
+            self.registrar_fallo()
+        else:
+            self.registrar_exito()
+
+    def metricas(self):
+        with self._lock:
+            return {
+                "estado": self.estado,
+                "fallos_seguidos": self.fallos_seguidos,
+                "aperturas": self.aperturas,
+                "rechazadas": self.rechazadas,
+            }
+
+
+class ColaReintentos:
+    """Cola persistente (JSON) de trabajo omitido por circuitos abiertos, para retomarlo en la siguiente ejecución."""
+
+    def __init__(self, ruta, intervalo_guardado=5.0):
+        self.ruta = ruta
+        self.intervalo_guardado = intervalo_guardado
+        self._lock = threading.Lock()
+        self._entradas = []
+        self._ultimo_guardado = 0.0
+        if os.path.exists(ruta):
+            try:
+                with open(ruta, "r", encoding="utf-8") as f:
+                    self._entradas = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ No se pudo leer la cola de reintentos '{ruta}': {e}")
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def encolar(self, tipo, **datos):
+        """Añade una entrada. Se persiste como mucho cada 'intervalo_guardado' segundos (y siempre en 'guardar')."""
+        with self._lock:
+            self._entradas.append(dict(datos, tipo=tipo, encolado=time.time()))
+            if time.monotonic() - self._ultimo_guardado >= self.intervalo_guardado:
+                self._guardar()
+
+    def guardar(self):
+        with self._lock:
+            self._guardar()
+
+    def extraer_todas(self):
+        """Devuelve y elimina todas las entradas pendientes (el fichero se actualiza en el siguiente guardado)."""
+        with self._lock:
+            entradas, self._entradas = self._entradas, []
+            return entradas
+
+    def devolver(self, entradas):
+        """Vuelve a poner al principio de la cola entradas extraídas que no se llegaron a procesar."""
+        with self._lock:
+            self._entradas[:0] = entradas
+
+    def _guardar(self):
+        self._ultimo_guardado = time.monotonic()
+        temporal = f"{self.ruta}.tmp"
+        try:
+            with open(temporal, "w", encoding="utf-8") as f:
+                json.dump(self._entradas, f, ensure_ascii=False)
+            os.replace(temporal, self.ruta)
+        except OSError as e:
+            print(f"❌ Error al guardar la cola de reintentos '{self.ruta}': {e}")
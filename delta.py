@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import time
+
+from serializacion import codificar
+
+# Tipos de resultado al comparar un incidente con su última versión enviada
+EVENTO_COMPLETO = "completo"
+EVENTO_DELTA = "delta"
+SIN_CAMBIOS = "sin_cambios"
+
+
+def _huella(valor):
+    """Hash corto y estable de un valor JSON."""
+    return hashlib.blake2b(codificar(valor, ordenar=True), digest_size=8).hexdigest()
+
+
+class RegistroHuellas:
+    """Recuerda una huella compacta de la última versión enviada de cada incidente y calcula eventos delta.
+
+    Para cada incidente se guarda un hash por campo y, para las listas configuradas (assets, indicadores...),
+    un hash por elemento. Si el incidente cambia, el evento delta sólo incluye los campos modificados y los
+    elementos agregados a esas listas, junto con el ID del incidente.
+    """
+
+    def __init__(self, ruta, listas=("assets", "indicators"), ignorar=("updated_at",), retencion_dias=30):
+        self.ruta = ruta
+        self.listas = tuple(listas)
+        self.ignorar = set(ignorar)
+        self.retencion = retencion_dias * 86400
+        self._huellas = {}
+        self.completos = 0
+        self.deltas = 0
+        self.sin_cambios = 0
+        self.cargar()
+
+    def cargar(self):
+        """Lee las huellas guardadas. Un fichero inexistente o corrupto equivale a no tener historial."""
+        if not os.path.exists(self.ruta):
+            return
+        try:
+            with open(self.ruta, "r", encoding="utf-8") as f:
+                self._huellas = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ No se pudo leer el registro de huellas '{self.ruta}': {e}. Se enviarán eventos completos.")
+            self._huellas = {}
+
+    def guardar(self):
+        """Escribe las huellas a disco, descartando las de incidentes no actualizados dentro de la retención."""
+        limite = time.time() - self.retencion
+        self._huellas = {k: v for k, v in self._huellas.items() if v.get("t", 0) >= limite}
+        temporal = f"{self.ruta}.tmp"
+        try:
+            with open(temporal, "w", encoding="utf-8") as f:
+                json.dump(self._huellas, f, separators=(",", ":"))
+            os.replace(temporal, self.ruta)
+        except OSError as e:
+            print(f"❌ Error al guardar el registro de huellas '{self.ruta}': {e}")
+
+    def _calcular_huella(self, evento):
+        campos = {}
+        listas = {}
+        for clave, valor in evento.items():
+            if clave in self.ignorar:
+                continue
+            if clave in self.listas and isinstance(valor, list):
+                listas[clave] = [_huella(elemento) for elemento in valor]
+            else:
+                campos[clave] = _huella(valor)
+        return {"c": campos, "l": listas}
+
+    def calcular(self, incident_id, evento):
+        """Compara el evento con la última versión enviada del incidente.
+
+        Devuelve (tipo, evento_a_enviar, huella). La huella debe confirmarse con 'confirmar' sólo
+        cuando el envío haya tenido éxito.
+        """
+        huella = self._calcular_huella(evento)
+        anterior = self._huellas.get(incident_id) if incident_id else None
+        if anterior is None:
+            self.completos += 1
+            return EVENTO_COMPLETO, evento, huella
+
+        cambios = {}
+        for clave, valor in evento.items():
+            if clave in huella["c"] and anterior["c"].get(clave) != huella["c"][clave]:
+                cambios[clave] = valor
+        eliminados_campos = [clave for clave in anterior["c"] if clave not in huella["c"]]
+
+        nuevos = {}
+        eliminados = {}
+        for lista, hashes in huella["l"].items():
+            previos = set(anterior["l"].get(lista, []))
+            agregados = [evento[lista][i] for i, h in enumerate(hashes) if h not in previos]
+            if agregados:
+                nuevos[lista] = agregados
+            quitados = len(previos - set(hashes))
+            if quitados:
+                eliminados[lista] = quitados
+        for lista in anterior["l"]:
+            if lista not in huella["l"] and anterior["l"][lista]:
+                eliminados[lista] = len(anterior["l"][lista])
+
+        if not cambios and not nuevos and not eliminados and not eliminados_campos:
+            self.sin_cambios += 1
+            return SIN_CAMBIOS, None, huella
+
+        delta = {
+            "tipo_evento": "delta",
+            "incident_id": incident_id,
+            "display_id": evento.get("display_id"),
+            "severity": evento.get("severity"),
+            "updated_at": evento.get("updated_at"),
+        }
+        if cambios:
+            delta["cambios"] = cambios
+        if eliminados_campos:
+            delta["campos_eliminados"] = eliminados_campos
+        if nuevos:
+            delta["nuevos"] = nuevos
+        if eliminados:
+            delta["eliminados"] = eliminados
+        self.deltas += 1
+        return EVENTO_DELTA, delta, huella
+
+    def confirmar(self, incident_id, huella):
+        """Registra la huella como la última versión enviada del incidente."""
+        if incident_id:
+            huella["t"] = time.time()
+            self._huellas[incident_id] = huella
@@ -0,0 +1,287 @@
+import itertools
+import os
+import queue
+import threading
+import time
+
+
+class Entrega:
+    """Seguimiento de un evento enviado a varios destinos: avisa una sola vez de su resultado.
+
+    'al_terminar' recibe True en cuanto un destino acepta el evento, o False si fallan todos. Los
+    destinos que fallen lo reciben después desde su fichero de pendientes (ver Destino.pendientes).
+    """
+
+    def __init__(self, destinos, al_terminar=None):
+        self._pendientes = destinos
+        self._avisada = False
+        self._lock = threading.Lock()
+        self.al_terminar = al_terminar
+
+    def resolver(self, ok):
+        with self._lock:
+            self._pendientes -= 1
+            avisar = not self._avisada and (ok or self._pendientes == 0)
+            self._avisada = self._avisada or avisar
+        if avisar and self.al_terminar:
+            self.al_terminar(ok)
+
+
+class PendientesDestino:
+    """Fichero de eventos pendientes de un destino en el que sólo se añade: una línea 'intentos<TAB>evento' por evento.
+
+    Guardar un evento no reescribe el fichero. 'extraer' lo aparta (los eventos que se guarden mientras tanto van
+    a un fichero nuevo) y devuelve su contenido. Si el fichero alcanza 'max_bytes', los eventos nuevos se descartan.
+    """
+
+    def __init__(self, ruta, max_bytes=100 * 1024 * 1024):
+        self.ruta = ruta
+        self.max_bytes = max_bytes
+        self._fichero = None
+        self._tamano = 0
+        self._lock = threading.Lock()
+
+    def guardar(self, cuerpo, intentos):
+        """Añade un evento con los reintentos que lleva. Devuelve False si no se pudo guardar."""
+        linea = b"%d\t%s\n" % (intentos, cuerpo)
+        with self._lock:
+            try:
+                if self._fichero is None:
+                    self._fichero = open(self.ruta, "ab")
+                    self._tamano = self._fichero.tell()
+                if self._tamano + len(linea) > self.max_bytes:
+                    return False
+                self._fichero.write(linea)
+                self._fichero.flush()
+            except OSError as e:
+                print(f"❌ Error al guardar un evento pendiente en '{self.ruta}': {e}")
+                return False
+            self._tamano += len(linea)
+        return True
+
+    def extraer(self):
+        """Aparta el fichero de pendientes y devuelve un iterador de (cuerpo, intentos) con su contenido.
+
+        El fichero apartado se borra al terminar de recorrerlo; si una ejecución anterior no llegó a hacerlo,
+        se devuelve ése y el actual queda para la siguiente vez.
+        """
+        apartado = f"{self.ruta}.reenvio"
+        with self._lock:
+            if self._fichero is not None:
+                self._fichero.close()
+                self._fichero = None
+            if not os.path.exists(apartado):
+                if not os.path.exists(self.ruta):
+                    return iter(())
+                os.replace(self.ruta, apartado)
+        return self._leer(apartado)
+
+    def _leer(self, ruta):
+        try:
+            with open(ruta, "rb") as f:
+                for linea in f:
+                    intentos, _, cuerpo = linea.rstrip(b"\n").partition(b"\t")
+                    if cuerpo:
+                        yield cuerpo, int(intentos)
+            os.remove(ruta)
+        except (OSError, ValueError) as e:
+            print(f"❌ Error al leer los eventos pendientes de '{ruta}': {e}")
+
+
+class Destino:
+    """Destino de eventos con su propia cola acotada y su propio hilo de envío.
+
+    Encolar nunca bloquea: si la cola está llena (destino lento o caído), el evento se da por fallido
+    para ese destino sin frenar a los demás. Los eventos desbordados y los que fallan de forma
+    reintentable (resultado None) se guardan en 'pendientes' hasta 'max_intentos' veces; los que fallan
+    de forma definitiva (False) no se reintentan. Las subclases implementan '_escribir(cuerpos)', que
+    recibe un lote de eventos ya serializados (bytes) y devuelve True/False/None por evento.
+    """
+
+    def __init__(self, nombre, severidades=None, capacidad=10000, lote=100, espera_lote=0.2, pendientes=None,
+                 max_intentos=5):
+        self.nombre = nombre
+        self.severidades = set(severidades or ())
+        self.lote = max(1, lote)
+        self.espera_lote = espera_lote
+        self.pendientes = pendientes
+        self.max_intentos = max_intentos
+        self.enviados = 0
+        self.fallidos = 0
+        self.desbordados = 0
+        self.aplazados = 0
+        self.descartados = 0
+        self._cola = queue.Queue(maxsize=capacidad)
+        self._lock = threading.Lock()
+        self._hilo = None
+
+    def acepta(self, severity):
+        """Indica si el destino recibe eventos de esta severidad (sin severidades configuradas, recibe todos)."""
+        return not self.severidades or severity in self.severidades
+
+    def encolar(self, cuerpo, entrega=None):
+        self._arrancar()
+        try:
+            self._cola.put_nowait((cuerpo, entrega, 0))
+        except queue.Full:
+            with self._lock:
+                self.desbordados += 1
+            self._resolver(cuerpo, entrega, None, 0)
+
+    def retomar_pendientes(self, detener=None):
+        """Vuelve a encolar los eventos guardados en 'pendientes' (esperando si la cola está llena).
+
+        Si 'detener()' pasa a ser cierto, los eventos restantes se guardan de nuevo sin contar un intento.
+        Devuelve cuántos se encolaron.
+        """
+        if self.pendientes is None:
+            return 0
+        encolados = 0
+        for cuerpo, intentos in self.pendientes.extraer():
+            if detener is not None and detener():
+                self.pendientes.guardar(cuerpo, intentos)
+                continue
+            self._arrancar()
+            self._cola.put((cuerpo, None, intentos))
+            encolados += 1
+        return encolados
+
+    def vaciar(self):
+        """Espera a que se hayan enviado (o fallado) todos los eventos encolados."""
+        self._cola.join()
+
+    def metricas(self):
+        with self._lock:
+            return {
+                "destino": self.nombre,
+                "en_cola": self._cola.qsize(),
+                "capacidad": self._cola.maxsize,
+                "enviados": self.enviados,
+                "fallidos": self.fallidos,
+                "desbordados": self.desbordados,
+                "aplazados": self.aplazados,
+                "descartados": self.descartados,
+            }
+
+    def _arrancar(self):
+        with self._lock:
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._trabajador, daemon=True, name=f"destino-{self.nombre}")
+                self._hilo.start()
+
+    def _tamano_lote(self):
+        return self.lote
+
+    def _resolver(self, cuerpo, entrega, ok, intentos):
+        with self._lock:
+            if ok:
+                self.enviados += 1
+            else:
+                self.fallidos += 1
+        if ok is None:
+            self._aplazar(cuerpo, intentos)
+        if entrega is not None:
+            entrega.resolver(bool(ok))
+
+    def _aplazar(self, cuerpo, intentos):
+        if self.pendientes is None:
+            return
+        aplazado = intentos < self.max_intentos and self.pendientes.guardar(cuerpo, intentos + 1)
+        with self._lock:
+            if aplazado:
+                self.aplazados += 1
+            else:
+                self.descartados += 1
+
+    def _trabajador(self):
+        while True:
+            # Se espera como mucho 'espera_lote' segundos a completar el lote antes de enviarlo
+            lote = [self._cola.get()]
+            limite = time.monotonic() + self.espera_lote
+            tamano = self._tamano_lote()
+            while len(lote) < tamano:
+                restante = limite - time.monotonic()
+                try:
+                    lote.append(self._cola.get(timeout=restante) if restante > 0 else self._cola.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                resultados = self._escribir([cuerpo for cuerpo, _, _ in lote])
+            except Exception as e:
+                print(f"❌ Error en el destino '{self.nombre}': {e}")
+                resultados = [False] * len(lote)
+            for (cuerpo, entrega, intentos), ok in zip(lote, resultados):
+                self._resolver(cuerpo, entrega, ok if ok is None else bool(ok), intentos)
+            for _ in lote:
+                self._cola.task_done()
+
+    def _escribir(self, cuerpos):
+        raise NotImplementedError
+
+
+class DestinoHEC(Destino):
+    """Destino Splunk HEC: envía cada lote con un EnviadorHEC (lotes, reintentos y concurrencia adaptativos)."""
+
+    def __init__(self, nombre, enviador, **kwargs):
+        super().__init__(nombre, **kwargs)
+        self.enviador = enviador
+
+    def _tamano_lote(self):
+        controlador = self.enviador.controlador
+        return controlador.lote * controlador.concurrencia
+
+    def _escribir(self, cuerpos):
+        return self.enviador.enviar(cuerpos)
+
+
+class DestinoNDJSON(Destino):
+    """Destino de archivo local: añade cada evento como una línea de un fichero NDJSON."""
+
+    def __init__(self, nombre, ruta, **kwargs):
+        super().__init__(nombre, **kwargs)
+        self.ruta = ruta
+        self._fichero = None
+
+    def _escribir(self, cuerpos):
+        try:
+            if self._fichero is None:
+                self._fichero = open(self.ruta, "ab")
+            # Se escriben los mismos bytes que recibe el resto de destinos, sin concatenarlos
+            self._fichero.writelines(itertools.chain.from_iterable((cuerpo, b"\n") for cuerpo in cuerpos))
+            self._fichero.flush()
+        except OSError as e:
+            print(f"❌ Error al escribir en el archivo '{self.ruta}' del destino '{self.nombre}': {e}")
+            return [False] * len(cuerpos)
+        return [True] * len(cuerpos)
+
+
+class Distribuidor:
+    """Reparte cada evento serializado entre los destinos que aceptan su severidad."""
+
+    def __init__(self, destinos):
+        self.destinos = list(destinos)
+
+    def enviar(self, cuerpo, severity, al_terminar=None):
+        """Encola el evento en sus destinos y devuelve cuántos lo recibirán (0 si ninguno acepta la severidad).
+
+        'al_terminar(ok)' se llama una vez: con True cuando el primero de esos destinos lo acepta, o con
+        False cuando todos han fallado.
+        """
+        destinos = [destino for destino in self.destinos if destino.acepta(severity)]
+        if not destinos:
+            return 0
+        entrega = Entrega(len(destinos), al_terminar)
+        for destino in destinos:
+            destino.encolar(cuerpo, entrega)
+        return len(destinos)
+
+    def retomar_pendientes(self, detener=None):
+        """Vuelve a encolar en cada destino sus eventos pendientes. Devuelve cuántos se encolaron en total."""
+        return sum(destino.retomar_pendientes(detener) for destino in self.destinos)
+
+    def vaciar(self):
+        for destino in self.destinos:
+            destino.vaciar()
+
+    def metricas(self):
+        return [destino.metricas() for destino in self.destinos]
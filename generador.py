@@ -0,0 +1,147 @@
+"""Generador reproducible de incidentes sintéticos (listado y detalles) para pruebas de escala.
+
+Uso (genera un fichero NDJSON, opcionalmente .gz, reutilizable con 'xdr.py --replay'):
+    python generador.py salida.ndjson.gz --incidentes 100000 --semilla 42 [--fin 2025-01-01T00:00:00Z]
+"""
+import argparse
+import gzip
+import json
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+# Pesos por defecto de cada severidad y estado en el listado
+SEVERIDADES_POR_DEFECTO = {"informational": 30, "low": 30, "medium": 20, "high": 15, "critical": 5}
+ESTADOS_POR_DEFECTO = {"new": 50, "in progress": 25, "closed - handled": 20, "closed - false positive": 5}
+# Fin por defecto de la ventana de 'updated_at': fijo, para que la misma semilla dé siempre los mismos datos
+FIN_POR_DEFECTO = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+_TIPOS_ASSET = ("host", "ip", "user")
+_TIPOS_INDICADOR = ("ip", "domain", "file_sha256", "url")
+_PALABRAS_RESUMEN = ("Malware", "Ransomware", "Phishing", "Exfiltration", "Brute force", "Lateral movement",
+                     "Suspicious PowerShell", "C2 beacon", "Credential dumping", "Port scan")
+
+
+def _elegir_ponderado(rng, pesos):
+    return rng.choices(list(pesos), weights=list(pesos.values()))[0]
+
+
+def _tamano_lista(rng, media, maximo):
+    """Tamaño de una lista con cola larga: la mayoría pequeñas y algunas cercanas al máximo."""
+    if media <= 0:
+        return 0
+    return min(maximo, int(rng.expovariate(1.0 / media)))
+
+
+def _ip_aleatoria(rng):
+    return f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}"
+
+
+class GeneradorIncidentes:
+    """Genera incidentes con la forma de las respuestas de la API XDR a partir de una semilla.
+
+    La misma semilla (y el mismo 'fin') produce siempre el mismo listado, y los detalles de cada incidente dependen
+    sólo de la semilla y de su ID, así que pueden pedirse en cualquier orden.
+    """
+
+    def __init__(self, semilla=0, severidades=None, estados=None, media_assets=5, max_assets=200,
+                 media_indicadores=10, max_indicadores=1000, prob_ip_peligrosa=0.02, prob_prevenido=0.1,
+                 ips_peligrosas=()):
+        self.semilla = semilla
+        self.severidades = severidades or SEVERIDADES_POR_DEFECTO
+        self.estados = estados or ESTADOS_POR_DEFECTO
+        self.media_assets = media_assets
+        self.max_assets = max_assets
+        self.media_indicadores = media_indicadores
+        self.max_indicadores = max_indicadores
+        self.prob_ip_peligrosa = prob_ip_peligrosa
+        self.prob_prevenido = prob_prevenido
+        self.ips_peligrosas = list(ips_peligrosas)
+
+    def listado(self, n, fin=None, horas=24):
+        """Devuelve 'n' incidentes como los del listado, con 'updated_at' repartido en las 'horas' anteriores a 'fin'.
+
+        Sin 'fin' se usa FIN_POR_DEFECTO, no la hora actual, para que el resultado sea reproducible.
+        """
+        rng = random.Random(self.semilla)
+        fin = fin or FIN_POR_DEFECTO
+        incidentes = []
+        for i in range(n):
+            actualizado = fin - timedelta(seconds=rng.uniform(0, horas * 3600))
+            incidentes.append({
+                "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                "display_id": f"INC-{i + 1:07d}",
+                "severity": _elegir_ponderado(rng, self.severidades),
+                "status": _elegir_ponderado(rng, self.estados),
+                "updated_at": actualizado.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z",
+                "summary": f"{rng.choice(_PALABRAS_RESUMEN)} detected on host-{rng.randrange(10000):04d}",
+                "is_prevented": rng.random() < self.prob_prevenido,
+            })
+        return incidentes
+
+    def detalles(self, incident):
+        """Devuelve la respuesta de detalles ({"data": {...}}) de un incidente del listado."""
+        rng = random.Random(f"{self.semilla}:{incident['id']}")
+        assets = []
+        for _ in range(_tamano_lista(rng, self.media_assets, self.max_assets)):
+            tipo = rng.choice(_TIPOS_ASSET)
+            valor = _ip_aleatoria(rng) if tipo == "ip" else f"{tipo}-{rng.randrange(100000):05d}"
+            assets.append({"type": tipo, "value": valor, "first_seen": incident["updated_at"]})
+        indicators = []
+        for _ in range(_tamano_lista(rng, self.media_indicadores, self.max_indicadores)):
+            tipo = rng.choice(_TIPOS_INDICADOR)
+            if tipo == "ip":
+                valor = _ip_aleatoria(rng)
+            elif tipo == "domain":
+                valor = f"d{rng.getrandbits(32):08x}.example.com"
+            elif tipo == "url":
+                valor = f"https://d{rng.getrandbits(32):08x}.example.com/{rng.getrandbits(24):06x}"
+            else:
+                valor = f"{rng.getrandbits(256):064x}"
+            indicators.append({"type": tipo, "value": valor, "confidence": rng.choice(("low", "medium", "high"))})
+        if self.ips_peligrosas and rng.random() < self.prob_ip_peligrosa:
+            indicators.insert(rng.randint(0, len(indicators)), {"type": "ip", "value": rng.choice(self.ips_peligrosas),
+                                                                "confidence": "high"})
+        return {"data": dict(incident, assets=assets, indicators=indicators)}
+
+    def escribir_ndjson(self, ruta, n, **kwargs_listado):
+        """Escribe los detalles de 'n' incidentes en un fichero NDJSON (comprimido si termina en '.gz')."""
+        abrir = gzip.open if ruta.endswith(".gz") else open
+        with abrir(ruta, "wt", encoding="utf-8") as f:
+            for incident in self.listado(n, **kwargs_listado):
+                f.write(json.dumps(self.detalles(incident), ensure_ascii=False, separators=(",", ":")))
+                f.write("\n")
+
+
+def _fecha_iso(valor):
+    """Convierte una fecha ISO 8601 (admite el sufijo 'Z'; sin zona horaria se toma como UTC) en datetime."""
+    try:
+        fecha = datetime.fromisoformat(valor.replace("Z", "+00:00"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"fecha ISO 8601 no válida: '{valor}'")
+    return fecha if fecha.tzinfo else fecha.replace(tzinfo=timezone.utc)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("salida", help="Fichero NDJSON de salida (.gz para comprimir)")
+    parser.add_argument("--incidentes", type=int, default=10000)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--media-assets", type=float, default=5)
+    parser.add_argument("--media-indicadores", type=float, default=10)
+    parser.add_argument("--prob-ip-peligrosa", type=float, default=0.02)
+    parser.add_argument("--fin", type=_fecha_iso, default=FIN_POR_DEFECTO,
+                        help="Fin de la ventana de 'updated_at' (ISO 8601, por defecto 2025-01-01T00:00:00Z)")
+    parser.add_argument("--horas", type=float, default=24, help="Horas de la ventana de 'updated_at'")
+    args = parser.parse_args()
+
+    from xdr2splunk import IPS_PELIGROSAS
+    generador = GeneradorIncidentes(args.semilla, media_assets=args.media_assets,
+                                    media_indicadores=args.media_indicadores,
+                                    prob_ip_peligrosa=args.prob_ip_peligrosa, ips_peligrosas=IPS_PELIGROSAS)
+    generador.escribir_ndjson(args.salida, args.incidentes, fin=args.fin, horas=args.horas)
+    print(f"✅ {args.incidentes} incidentes sintéticos escritos en '{args.salida}' (semilla {args.semilla}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import requests
+
+# Resultados posibles de un envío de lote
+RESULTADO_OK = "ok"
+RESULTADO_DEMASIADO_GRANDE = "demasiado_grande"
+RESULTADO_SATURADO = "saturado"
+RESULTADO_ERROR = "error"
+
+# Códigos HTTP con los que Splunk indica que está sobrecargado
+CODIGOS_SATURACION = {429, 500, 502, 503, 504}
+
+
+class ControladorAIMD:
+    """Ajusta el tamaño de lote y el número de peticiones en vuelo a partir de la latencia y los errores observados.
+
+    Incremento aditivo mientras las respuestas son rápidas y correctas; reducción multiplicativa ante
+    latencias por encima del objetivo, respuestas 413 o señales de saturación (429/5xx/timeouts). Un 413 no es
+    congestión sino un límite del servidor: además de reducir el lote, fija un techo por debajo del tamaño
+    rechazado que el incremento aditivo ya no supera. A partir de ahí el lote crece de uno en uno y sólo un lote
+    en vuelo a la vez (el sondeo) puede superar el mayor tamaño ya aceptado.
+    """
+
+    def __init__(self, lote_inicial=50, lote_min=1, lote_max=1000, incremento_lote=10,
+                 concurrencia_inicial=2, concurrencia_max=8, latencia_objetivo=2.0,
+                 factor_reduccion=0.5, pausa_base=1.0, pausa_max=30.0):
+        self.lote_min = max(1, lote_min)
+        self.lote_max = max(self.lote_min, lote_max)
+        self.lote = min(max(lote_inicial, self.lote_min), self.lote_max)
+        self.techo = self.lote_max
+        self.lote_aceptado = 0
+        self.incremento_lote = max(1, incremento_lote)
+        self.concurrencia_max = max(1, concurrencia_max)
+        self.concurrencia = min(max(1, concurrencia_inicial), self.concurrencia_max)
+        self.latencia_objetivo = latencia_objetivo
+        self.factor_reduccion = factor_reduccion
+        self.pausa_base = pausa_base
+        self.pausa_max = pausa_max
+        self.pausa = 0.0
+        self.latencia_media = None
+        self._exitos_seguidos = 0
+        self._lock = threading.Lock()
+        self.lotes_ok = 0
+        self.lotes_error = 0
+        self.eventos_ok = 0
+        self.reducciones = 0
+
+    def _reducir_lote(self):
+        self.lote = max(self.lote_min, int(self.lote * self.factor_reduccion))
+
+    def _reducir_concurrencia(self):
+        self.concurrencia = max(1, int(self.concurrencia * self.factor_reduccion))
+
+    def registrar(self, resultado, latencia, eventos):
+        """Actualiza el estado del controlador con el resultado de un lote."""
+        with self._lock:
+            if latencia is not None:
+                if self.latencia_media is None:
+                    self.latencia_media = latencia
+                else:
+                    self.latencia_media = 0.8 * self.latencia_media + 0.2 * latencia
+
+            if resultado == RESULTADO_OK:
+                self.lotes_ok += 1
+                self.eventos_ok += eventos
+                self.lote_aceptado = max(self.lote_aceptado, eventos)
+                self.pausa = 0.0
+                if latencia is not None and latencia > self.latencia_objetivo:
+                    self._reducir_lote()
+                    self._exitos_seguidos = 0
+                    self.reducciones += 1
+                    return
+                # Tras un 413 el lote crece de uno en uno: así el primer tamaño rechazado es el límite real
+                incremento = self.incremento_lote if self.techo == self.lote_max else 1
+                self.lote = min(self.techo, self.lote + incremento)
+                self._exitos_seguidos += 1
+                if self._exitos_seguidos >= self.concurrencia and self.concurrencia < self.concurrencia_max:
+                    self.concurrencia += 1
+                    self._exitos_seguidos = 0
+                return
+
+            self.lotes_error += 1
+            self._exitos_seguidos = 0
+            if resultado == RESULTADO_DEMASIADO_GRANDE:
+                self.techo = max(self.lote_min, min(self.techo, eventos - 1))
+                self._reducir_lote()
+                self.lote = min(self.lote, self.techo)
+                self.reducciones += 1
+            elif resultado == RESULTADO_SATURADO:
+                self._reducir_lote()
+                self._reducir_concurrencia()
+                self.pausa = min(self.pausa_max, self.pausa * 2 if self.pausa else self.pausa_base)
+                self.reducciones += 1
+
+    def tamano_lote(self, sondeando=False):
+        """Tamaño del siguiente lote. Tras un 413, si ya hay un sondeo en vuelo no se supera el mayor tamaño aceptado."""
+        with self._lock:
+            if sondeando and self.techo < self.lote_max and self.lote > self.lote_aceptado:
+                return max(self.lote_min, self.lote_aceptado)
+            return self.lote
+
+    def es_sondeo(self, eventos):
+        """Indica si un lote de 'eventos' eventos supera, tras un 413, el mayor tamaño aceptado."""
+        with self._lock:
+            return self.techo < self.lote_max and eventos > self.lote_aceptado
+
+    def metricas(self):
+        """Devuelve la configuración actual y los contadores del controlador."""
+        with self._lock:
+            return {
+                "lote_actual": self.lote,
+                "techo_lote": self.techo,
+                "concurrencia_actual": self.concurrencia,
+                "latencia_media": self.latencia_media,
+                "pausa_actual": self.pausa,
+                "lotes_ok": self.lotes_ok,
+                "lotes_error": self.lotes_error,
+                "eventos_ok": self.eventos_ok,
+                "reducciones": self.reducciones,
+            }
+
+
+class EnviadorHEC:
+    """Envía eventos ya serializados a Splunk HEC en lotes, con tamaño y concurrencia controlados por un ControladorAIMD.
+
+    'timeout' puede ser un número o una función que devuelva el timeout de cada petición. Ningún lote supera
+    'max_bytes_lote' bytes (el max_content_length de HEC), salvo un evento que por sí solo ya sea mayor.
+    """
+
+    def __init__(self, url, token, controlador, timeout=10, max_reintentos=3, verify=False, circuito=None,
+                 max_bytes_lote=1000000):
+        self.url = url
+        self.controlador = controlador
+        self.max_bytes_lote = max_bytes_lote
+        self.circuito = circuito
+        self.timeout = timeout
+        self.max_reintentos = max_reintentos
+        self.verify = verify
+        self._sesion = requests.Session()
+        self._sesion.headers.update({
+            "Authorization": f"Splunk {token}",
+            "Content-Type": "application/json",
+        })
+
+    def _enviar_lote(self, cuerpos):
+        """Envía un lote (eventos HEC concatenados) y devuelve (resultado, latencia)."""
+        inicio = time.monotonic()
+        try:
+            timeout = self.timeout() if callable(self.timeout) else self.timeout
+            response = self._sesion.post(self.url, data=b"".join(cuerpos), verify=self.verify, timeout=timeout)
+        except requests.exceptions.Timeout as e:
+            print(f"❌ Timeout al enviar lote de {len(cuerpos)} eventos a Splunk: {e}")
+            return RESULTADO_SATURADO, time.monotonic() - inicio
+        except requests.exceptions.RequestException as e:
+            print(f"❌ Error de conexión con Splunk: {e}")
+            return RESULTADO_SATURADO, None
+        latencia = time.monotonic() - inicio
+        if response.status_code == 200:
+            print(f"✅ Lote de {len(cuerpos)} eventos enviado a Splunk con éxito ({latencia:.2f}s).")
+            return RESULTADO_OK, latencia
+        print(f"❌ Error al enviar lote a Splunk: {response.status_code} - {response.text}")
+        if response.status_code == 413:
+            return RESULTADO_DEMASIADO_GRANDE, latencia
+        if response.status_code in CODIGOS_SATURACION:
+            return RESULTADO_SATURADO, latencia
+        return RESULTADO_ERROR, latencia
+
+    def _registrar_en_circuito(self, resultado):
+        if self.circuito is None:
+            return
+        if resultado == RESULTADO_SATURADO:
+            self.circuito.registrar_fallo()
+        else:
+            self.circuito.registrar_exito()
+
+    def _siguiente_lote(self, cola, cuerpos, tamano):
+        """Saca de 'cola' los índices del siguiente lote, de hasta 'tamano' eventos y 'max_bytes_lote' bytes."""
+        indices = [cola.popleft()]
+        tamano_bytes = len(cuerpos[indices[0]])
+        while cola and len(indices) < tamano:
+            tamano_bytes += len(cuerpos[cola[0]])
+            if tamano_bytes > self.max_bytes_lote:
+                break
+            indices.append(cola.popleft())
+        return indices
+
+    def enviar(self, cuerpos):
+        """Envía todos los eventos (bytes) y devuelve el resultado de cada uno.
+
+        True si se envió, False si falló de forma definitiva (413 de un solo evento, 4xx) y None si se puede
+        reintentar más tarde: se omitió por tener el circuito abierto o Splunk siguió saturado tras 'max_reintentos'.
+        """
+        resultados = [False] * len(cuerpos)
+        intentos = [0] * len(cuerpos)
+        cola = deque(range(len(cuerpos)))
+        en_vuelo = {}
+        sondeos = set()
+        with ThreadPoolExecutor(max_workers=self.controlador.concurrencia_max) as executor:
+            while cola or en_vuelo:
+                while cola and len(en_vuelo) < self.controlador.concurrencia:
+                    if self.circuito is not None and not self.circuito.permitir():
+                        print(f"⛔ Circuito '{self.circuito.nombre}' abierto: se omiten {len(cola)} eventos y se dejan para reintentar.")
+                        for i in cola:
+                            resultados[i] = None
+                        cola.clear()
+                        break
+                    indices = self._siguiente_lote(cola, cuerpos, self.controlador.tamano_lote(sondeando=bool(sondeos)))
+                    futuro = executor.submit(self._enviar_lote, [cuerpos[i] for i in indices])
+                    en_vuelo[futuro] = indices
+                    if self.controlador.es_sondeo(len(indices)):
+                        sondeos.add(futuro)
+
+                terminados, _ = wait(en_vuelo, return_when=FIRST_COMPLETED)
+                reencolar = []
+                for futuro in terminados:
+                    indices = en_vuelo.pop(futuro)
+                    sondeos.discard(futuro)
+                    resultado, latencia = futuro.result()
+                    self.controlador.registrar(resultado, latencia, len(indices))
+                    self._registrar_en_circuito(resultado)
+                    if resultado == RESULTADO_OK:
+                        for i in indices:
+                            resultados[i] = True
+                    elif resultado == RESULTADO_DEMASIADO_GRANDE and len(indices) > self.controlador.lote:
+                        # El lote se divide en el siguiente intento porque el controlador ya redujo su tamaño
+                        reencolar.extend(indices)
+                    elif resultado == RESULTADO_SATURADO:
+                        for i in indices:
+                            intentos[i] += 1
+                            if intentos[i] <= self.max_reintentos:
+                                reencolar.append(i)
+                            else:
+                                resultados[i] = None
+
+                if reencolar:
+                    cola.extendleft(reversed(reencolar))
+                    if self.controlador.pausa:
+                        print(f"⏳ Splunk saturado, esperando {self.controlador.pausa:.1f}s antes de reintentar...")
+                        time.sleep(self.controlador.pausa)
+        return resultados
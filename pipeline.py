@@ -0,0 +1,178 @@
+import queue
+import threading
+import time
+
+# Marca de fin de datos que se propaga de una etapa a la siguiente
+_FIN = object()
+
+
+class Etapa:
+    """Etapa del pipeline: una función aplicada a cada elemento por 'concurrencia' hilos.
+
+    La función devuelve el elemento para la etapa siguiente, o None para descartarlo. Con 'prioridad'
+    (función elemento -> rango), la cola de la etapa entrega primero los elementos de mayor rango.
+    Con 'al_detener', los elementos que quedan en la cola de la etapa cuando se detiene el pipeline se
+    pasan a esa función (p. ej. para dejarlos pendientes) en lugar de devolverse como no procesados.
+    """
+
+    def __init__(self, nombre, funcion, concurrencia=1, capacidad=None, prioridad=None, al_detener=None):
+        self.nombre = nombre
+        self.funcion = funcion
+        self.concurrencia = max(1, concurrencia)
+        self.capacidad = capacidad
+        self.prioridad = prioridad
+        self.al_detener = al_detener
+        self.procesados = 0
+        self.descartados = 0
+        self.errores = 0
+        self.ocupado = 0.0
+        self._lock = threading.Lock()
+
+    def _registrar(self, duracion, continua, error=False):
+        with self._lock:
+            self.procesados += 1
+            self.ocupado += duracion
+            if error:
+                self.errores += 1
+            elif not continua:
+                self.descartados += 1
+
+
+class Pipeline:
+    """Pipeline por etapas con colas acotadas entre ellas.
+
+    Cada etapa tiene su propia concurrencia y lee de una cola de capacidad limitada: si una etapa es más
+    lenta que la anterior, su cola se llena y la anterior se bloquea (contrapresión), así que la memoria
+    usada no crece aunque la fuente sea mucho más rápida que el destino. Las etapas con prioridad usan
+    una ColaPrioridad con 'envejecimiento' segundos por nivel de rango.
+    """
+
+    def __init__(self, etapas, capacidad=100, intervalo_informe=0, envejecimiento=30.0):
+        self.etapas = etapas
+        self.capacidad = capacidad
+        self.intervalo_informe = intervalo_informe
+        self._colas = [self._crear_cola(etapa, etapa.capacidad or capacidad, envejecimiento) for etapa in etapas]
+        self.inicio = None
+        self.duracion = 0.0
+        self._terminado = threading.Event()
+        self._detener = None
+        self._original = None
+        self._no_procesados = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _crear_cola(etapa, capacidad, envejecimiento):
+        if etapa.prioridad is None:
+            return queue.Queue(maxsize=capacidad)
+        from prioridad import ColaPrioridad
+        # La marca de fin se entrega siempre después de todos los elementos
+        return ColaPrioridad(lambda elemento: None if elemento is _FIN else etapa.prioridad(elemento),
+                             maxsize=capacidad, envejecimiento=envejecimiento)
+
+    def _trabajador(self, indice):
+        etapa = self.etapas[indice]
+        entrada = self._colas[indice]
+        salida = self._colas[indice + 1] if indice + 1 < len(self._colas) else None
+        while True:
+            elemento = entrada.get()
+            if elemento is _FIN:
+                break
+            if self._detener is not None and self._detener():
+                if etapa.al_detener is not None:
+                    try:
+                        etapa.al_detener(elemento)
+                    except Exception as e:
+                        print(f"❌ Error al detener la etapa '{etapa.nombre}': {e}")
+                    continue
+                # No se procesa: se devuelve el elemento de la fuente del que procede
+                if indice > 0 and self._original is not None:
+                    elemento = self._original(elemento)
+                with self._lock:
+                    self._no_procesados.append(elemento)
+                continue
+            inicio = time.monotonic()
+            error = False
+            try:
+                resultado = etapa.funcion(elemento)
+            except Exception as e:
+                print(f"❌ Error en la etapa '{etapa.nombre}': {e}")
+                resultado, error = None, True
+            etapa._registrar(time.monotonic() - inicio, resultado is not None, error)
+            if resultado is not None and salida is not None:
+                salida.put(resultado)
+
+    def _informar_periodicamente(self):
+        while not self._terminado.wait(self.intervalo_informe):
+            estado = "  ".join(f"{m['etapa']}={m['en_cola']}/{m['capacidad']}" for m in self.metricas())
+            print(f"📊 Colas del pipeline: {estado}")
+
+    def ejecutar(self, fuente, detener=None, original=None):
+        """Procesa todos los elementos de 'fuente'.
+
+        Si 'detener' devuelve True, deja de admitir elementos nuevos y ninguna etapa procesa más elementos
+        de su cola: sólo terminan los que estaban en curso, y los de las etapas con 'al_detener' se pasan a
+        esa función. Devuelve la lista de los elementos de la fuente que no terminaron su recorrido (los que
+        estaban en las demás colas y los que no llegaron a entrar). 'original' obtiene, a partir del
+        elemento de una etapa intermedia, el de la fuente.
+        """
+        self.inicio = time.monotonic()
+        self._detener = detener
+        self._original = original
+        self._no_procesados = []
+        hilos = []
+        for indice, etapa in enumerate(self.etapas):
+            hilos.append([threading.Thread(target=self._trabajador, args=(indice,), daemon=True,
+                                           name=f"pipeline-{etapa.nombre}-{n}")
+                          for n in range(etapa.concurrencia)])
+        for grupo in hilos:
+            for hilo in grupo:
+                hilo.start()
+        if self.intervalo_informe:
+            threading.Thread(target=self._informar_periodicamente, daemon=True).start()
+
+        no_admitidos = []
+        elementos = iter(fuente)
+        for elemento in elementos:
+            if detener is not None and detener():
+                no_admitidos = [elemento] + list(elementos)
+                break
+            self._colas[0].put(elemento)
+
+        # Cuando todos los hilos de una etapa terminan, se avisa del fin a la siguiente
+        for indice, grupo in enumerate(hilos):
+            for _ in grupo:
+                self._colas[indice].put(_FIN)
+            for hilo in grupo:
+                hilo.join()
+        self._terminado.set()
+        self.duracion = time.monotonic() - self.inicio
+        return self._no_procesados + no_admitidos
+
+    def metricas(self):
+        """Devuelve, por etapa, la profundidad de su cola, lo procesado, el rendimiento y la ocupación."""
+        transcurrido = (self.duracion or (time.monotonic() - self.inicio)) if self.inicio else 0.0
+        resultado = []
+        for etapa, cola in zip(self.etapas, self._colas):
+            resultado.append({
+                "etapa": etapa.nombre,
+                "concurrencia": etapa.concurrencia,
+                "en_cola": cola.qsize(),
+                "capacidad": cola.maxsize,
+                "procesados": etapa.procesados,
+                "descartados": etapa.descartados,
+                "errores": etapa.errores,
+                "por_segundo": etapa.procesados / transcurrido if transcurrido else 0.0,
+                "ocupacion": etapa.ocupado / (transcurrido * etapa.concurrencia) if transcurrido else 0.0,
+            })
+        return resultado
+
+    def imprimir_metricas(self):
+        """Imprime una tabla por etapa marcando la más ocupada (el cuello de botella)."""
+        metricas = self.metricas()
+        cuello = max(metricas, key=lambda m: m["ocupacion"])["etapa"] if metricas else None
+        print(f"\n{'Etapa':<12} {'Hilos':>5} {'Cola':>9} {'Procesados':>10} {'Descart.':>8} {'Errores':>7} {'Por seg.':>9} {'Ocupación':>9}")
+        for m in metricas:
+            marca = "  ⬅ cuello de botella" if m["etapa"] == cuello and m["ocupacion"] > 0 else ""
+            print(f"{m['etapa']:<12} {m['concurrencia']:>5} {str(m['en_cola']) + '/' + str(m['capacidad']):>9} "
+                  f"{m['procesados']:>10} {m['descartados']:>8} {m['errores']:>7} {m['por_segundo']:>9.1f} "
+                  f"{m['ocupacion'] * 100:>8.0f}%{marca}")
@@ -0,0 +1,54 @@
+from collections import namedtuple
+
+# Severidades cuyo detalle completo se envía a Splunk
+SEVERIDADES_ENVIO = ("high", "critical")
+
+# Campos del incidente que usa la comprobación de IPs peligrosas
+CAMPOS_IP = ("assets", "indicators")
+
+# Decisión para un incidente: qué acciones aplicar y si hace falta pedir sus detalles a la API.
+# 'reglas' es la máscara de reglas de cierre candidatas (0 sin motor de reglas).
+Plan = namedtuple("Plan", ["enviar", "comprobar_ip", "detalles", "reglas"])
+
+
+class PlanificadorDetalles:
+    """Decide por incidente qué llamadas a la API son necesarias según las acciones habilitadas.
+
+    Los detalles sólo se piden si alguna acción los necesita: el envío a Splunk (su contenido es el evento)
+    o la comprobación de IPs cuando el listado no trae ya los assets/indicadores. Con un motor de reglas
+    de cierre, la comprobación de IPs se sustituye por sus reglas y los detalles sólo se piden si alguna
+    regla candidata (por severidad, estado y resumen) depende de los assets/indicadores.
+    """
+
+    def __init__(self, enviar_splunk=True, cerrar_por_ip=True, ips_peligrosas=(), severidades_envio=SEVERIDADES_ENVIO,
+                 reglas=None):
+        self.enviar_splunk = enviar_splunk
+        self.reglas = reglas
+        self.cerrar_por_ip = cerrar_por_ip and (bool(ips_peligrosas) or reglas is not None)
+        self.severidades_envio = tuple(severidades_envio)
+        self.planificados = 0
+        self.llamadas_detalle = 0
+        self.llamadas_evitadas = 0
+
+    def planificar(self, incident, detalles_disponibles=False):
+        """Devuelve el Plan para un incidente del listado y actualiza los contadores."""
+        severity = incident.get("severity", "").lower()
+        enviar = self.enviar_splunk and severity in self.severidades_envio
+        comprobar_ip = self.cerrar_por_ip
+        # Sólo se evita pedir los detalles si el listado trae tanto los assets como los indicadores
+        ip_en_listado = all(campo in incident for campo in CAMPOS_IP)
+        candidatas = 0
+        if comprobar_ip and self.reglas is not None:
+            candidatas = self.reglas.candidatas(incident)
+            comprobar_ip = bool(candidatas)
+            detalles = enviar or (comprobar_ip and self.reglas.necesita_detalles(candidatas) and not ip_en_listado)
+        else:
+            detalles = enviar or (comprobar_ip and not ip_en_listado)
+
+        self.planificados += 1
+        if not detalles_disponibles:
+            if detalles:
+                self.llamadas_detalle += 1
+            else:
+                self.llamadas_evitadas += 1
+        return Plan(enviar=enviar, comprobar_ip=comprobar_ip, detalles=detalles, reglas=candidatas)
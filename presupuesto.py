@@ -0,0 +1,58 @@
+import json
+import os
+import time
+
+
+class PresupuestoTiempo:
+    """Tiempo total disponible para una ejecución.
+
+    Los timeouts de cada petición se derivan del tiempo restante, con un mínimo 'timeout_minimo'
+    para que la operación en curso pueda terminar limpiamente aunque el presupuesto esté agotado.
+    """
+
+    def __init__(self, segundos, timeout_minimo=1.0):
+        self.segundos = segundos
+        self.timeout_minimo = timeout_minimo
+        self.inicio = time.monotonic()
+        self.limite = self.inicio + segundos
+
+    def restante(self):
+        return max(0.0, self.limite - time.monotonic())
+
+    def consumido(self):
+        return time.monotonic() - self.inicio
+
+    def expirado(self):
+        return time.monotonic() >= self.limite
+
+    def timeout(self, maximo):
+        """Timeout para la siguiente petición: el menor entre 'maximo' y el tiempo restante."""
+        return max(self.timeout_minimo, min(maximo, self.restante()))
+
+
+def cargar_diferidos(ruta):
+    """Lee los incidentes que una ejecución anterior dejó sin procesar."""
+    if not os.path.exists(ruta):
+        return []
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            incidentes = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ No se pudo leer el checkpoint de incidentes diferidos '{ruta}': {e}")
+        return []
+    return incidentes if isinstance(incidentes, list) else []
+
+
+def guardar_diferidos(ruta, incidentes):
+    """Guarda los incidentes no procesados para que la siguiente ejecución empiece por ellos (sin ninguno, borra el fichero)."""
+    temporal = f"{ruta}.tmp"
+    try:
+        if not incidentes:
+            if os.path.exists(ruta):
+                os.remove(ruta)
+            return
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(incidentes, f, ensure_ascii=False)
+        os.replace(temporal, ruta)
+    except OSError as e:
+        print(f"❌ Error al guardar el checkpoint de incidentes diferidos '{ruta}': {e}")
@@ -0,0 +1,60 @@
+import heapq
+import itertools
+import math
+import threading
+import time
+
+
+class ColaPrioridad:
+    """Cola acotada y segura entre hilos que entrega primero los elementos más urgentes, con envejecimiento.
+
+    'prioridad' devuelve el rango de un elemento (mayor = más urgente) o None para entregarlo el último.
+    Cada 'envejecimiento' segundos de espera equivalen a un nivel de rango, así que un elemento poco
+    urgente acaba pasando por delante de los más urgentes que lleguen después y nunca se queda sin servir.
+    Tiene la misma interfaz que queue.Queue para put/get/qsize/maxsize.
+    """
+
+    def __init__(self, prioridad, maxsize=0, envejecimiento=30.0):
+        self.prioridad = prioridad
+        self.maxsize = maxsize
+        self.envejecimiento = envejecimiento
+        self._heap = []
+        self._orden = itertools.count()
+        self._lock = threading.Lock()
+        self._no_vacia = threading.Condition(self._lock)
+        self._no_llena = threading.Condition(self._lock)
+
+    def _clave(self, elemento):
+        # La clave no cambia con el tiempo (se compara con la hora de llegada), así que el heap sigue siendo válido
+        rango = self.prioridad(elemento)
+        if rango is None:
+            return math.inf
+        return time.monotonic() - rango * self.envejecimiento
+
+    def put(self, elemento):
+        clave = self._clave(elemento)
+        with self._no_llena:
+            while self.maxsize > 0 and len(self._heap) >= self.maxsize:
+                self._no_llena.wait()
+            heapq.heappush(self._heap, (clave, next(self._orden), elemento))
+            self._no_vacia.notify()
+
+    def get(self):
+        with self._no_vacia:
+            while not self._heap:
+                self._no_vacia.wait()
+            _, _, elemento = heapq.heappop(self._heap)
+            self._no_llena.notify()
+            return elemento
+
+    def qsize(self):
+        with self._lock:
+            return len(self._heap)
+
+
+def percentiles(valores, puntos=(50, 90, 99)):
+    """Devuelve {p: valor} con el percentil por rango más cercano de cada punto (None si no hay valores)."""
+    ordenados = sorted(valores)
+    if not ordenados:
+        return {p: None for p in puntos}
+    return {p: ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)] for p in puntos}
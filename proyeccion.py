@@ -0,0 +1,187 @@
+from serializacion import codificar
+
+# Marcador interno para los valores que la proyección descarta
+_OMITIDO = object()
+
+
+class _Nodo:
+    """Nodo del árbol de rutas compilado a partir de la configuración."""
+    __slots__ = ("hijos", "fin")
+
+    def __init__(self):
+        self.hijos = {}
+        self.fin = False
+
+    def hijo(self, clave):
+        nodo = self.hijos.get(clave)
+        if nodo is None:
+            nodo = self.hijos.get("*")
+        return nodo
+
+
+def _fusionar(destino, origen):
+    """Fusiona el subárbol 'origen' dentro de 'destino' (usado para expandir comodines)."""
+    destino.fin = destino.fin or origen.fin
+    for clave, nodo in origen.hijos.items():
+        if clave not in destino.hijos:
+            destino.hijos[clave] = _Nodo()
+        _fusionar(destino.hijos[clave], nodo)
+
+
+def _expandir_comodines(nodo):
+    """Copia el subárbol '*' en cada hermano explícito para que la búsqueda sea de un solo paso."""
+    comodin = nodo.hijos.get("*")
+    if comodin is not None:
+        for clave, hijo in nodo.hijos.items():
+            if clave != "*":
+                _fusionar(hijo, comodin)
+    for hijo in nodo.hijos.values():
+        _expandir_comodines(hijo)
+
+
+def _compilar_rutas(rutas, separador):
+    """Convierte una lista de rutas ('assets.*.value') en un árbol de nodos. Devuelve None si no hay rutas."""
+    rutas = [r.strip() for r in rutas if r and r.strip()]
+    if not rutas:
+        return None
+    raiz = _Nodo()
+    for ruta in rutas:
+        nodo = raiz
+        for segmento in ruta.split(separador):
+            if segmento not in nodo.hijos:
+                nodo.hijos[segmento] = _Nodo()
+            nodo = nodo.hijos[segmento]
+        nodo.fin = True
+    _expandir_comodines(raiz)
+    return raiz
+
+
+def _tamano_json(valor):
+    """Tamaño en bytes del valor serializado como JSON compacto."""
+    return len(codificar(valor))
+
+
+class Proyeccion:
+    """Proyección compilada: selecciona, elimina, trunca y aplana campos de un evento antes de enviarlo.
+
+    Para no serializar cada evento sólo por las estadísticas, los bytes antes/después se miden en uno
+    de cada 'muestreo_tamano' eventos y se extrapolan al total.
+    """
+
+    def __init__(self, incluir, excluir, max_elementos_lista=0, aplanar=False, separador=".", muestreo_tamano=1):
+        self.separador = separador
+        self.muestreo_tamano = max(1, muestreo_tamano)
+        self.max_elementos_lista = max_elementos_lista
+        self.aplanar = aplanar
+        self._incluir = _compilar_rutas(incluir, separador)
+        self._excluir = _compilar_rutas(excluir, separador)
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Pone a cero las estadísticas de bytes acumuladas."""
+        self.eventos = 0
+        self.medidos = 0
+        self.bytes_antes = 0
+        self.bytes_despues = 0
+
+    def _proyectar(self, valor, inc, exc):
+        if isinstance(valor, dict):
+            salida = {}
+            for clave, sub in valor.items():
+                ci = None
+                if inc is not None:
+                    ci = inc.hijo(clave)
+                    if ci is None:
+                        continue
+                    if ci.fin:
+                        ci = None
+                ce = None
+                if exc is not None:
+                    ce = exc.hijo(clave)
+                    if ce is not None and ce.fin:
+                        continue
+                if ci is None and ce is None and not self.max_elementos_lista:
+                    salida[clave] = sub
+                    continue
+                resultado = self._proyectar(sub, ci, ce)
+                if resultado is _OMITIDO:
+                    continue
+                salida[clave] = resultado
+                if isinstance(sub, list) and self.max_elementos_lista and len(sub) > self.max_elementos_lista:
+                    salida[f"{clave}_total"] = len(sub)
+            if inc is not None and not salida:
+                return _OMITIDO
+            return salida
+
+        if isinstance(valor, list):
+            if self.max_elementos_lista and len(valor) > self.max_elementos_lista:
+                valor = valor[:self.max_elementos_lista]
+            salida = []
+            for elemento in valor:
+                resultado = self._proyectar(elemento, inc, exc)
+                if resultado is not _OMITIDO:
+                    salida.append(resultado)
+            if inc is not None and not salida:
+                return _OMITIDO
+            return salida
+
+        # Valor escalar: si la ruta de inclusión pide descender más, no hay nada que conservar
+        if inc is not None:
+            return _OMITIDO
+        return valor
+
+    def _aplanar(self, valor, prefijo, salida):
+        for clave, sub in valor.items():
+            nombre = f"{prefijo}{self.separador}{clave}" if prefijo else clave
+            if isinstance(sub, dict) and sub:
+                self._aplanar(sub, nombre, salida)
+            else:
+                salida[nombre] = sub
+        return salida
+
+    def aplicar(self, evento):
+        """Devuelve una copia reducida del evento y acumula los bytes antes/después."""
+        if not isinstance(evento, dict):
+            return evento
+        resultado = self._proyectar(evento, self._incluir, self._excluir)
+        if resultado is _OMITIDO:
+            resultado = {}
+        if self.aplanar:
+            resultado = self._aplanar(resultado, "", {})
+        if self.eventos % self.muestreo_tamano == 0:
+            self.medidos += 1
+            self.bytes_antes += _tamano_json(evento)
+            self.bytes_despues += _tamano_json(resultado)
+        self.eventos += 1
+        return resultado
+
+    def resumen(self):
+        """Devuelve las estadísticas acumuladas de la proyección (extrapoladas si se mide por muestreo)."""
+        ahorro = 0.0
+        if self.bytes_antes:
+            ahorro = 100.0 * (self.bytes_antes - self.bytes_despues) / self.bytes_antes
+        factor = self.eventos / self.medidos if self.medidos else 0
+        return {
+            "eventos": self.eventos,
+            "bytes_antes": int(self.bytes_antes * factor),
+            "bytes_despues": int(self.bytes_despues * factor),
+            "ahorro_pct": ahorro,
+        }
+
+
+def _lista_csv(valor):
+    return [v.strip() for v in (valor or "").split(",") if v.strip()]
+
+
+def compilar_proyeccion(seccion):
+    """Compila la proyección a partir de una sección de configuración. Devuelve None si está deshabilitada."""
+    if seccion is None or not seccion.getboolean("habilitada", fallback=False):
+        return None
+    return Proyeccion(
+        incluir=_lista_csv(seccion.get("incluir", fallback="")),
+        excluir=_lista_csv(seccion.get("excluir", fallback="")),
+        max_elementos_lista=seccion.getint("max_elementos_lista", fallback=0),
+        aplanar=seccion.getboolean("aplanar", fallback=False),
+        separador=seccion.get("separador", fallback=".") or ".",
+        muestreo_tamano=seccion.getint("muestreo_tamano", fallback=1),
+    )
@@ -0,0 +1,199 @@
+import asyncio
+import hmac
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+# Claves con las que los webhooks pueden indicar el identificador de un incidente
+CLAVES_ID = ("incident_id", "incidentId", "id", "uuid")
+CLAVES_LISTA_IDS = ("incident_ids", "incidentIds", "ids")
+
+_RAZONES = {200: "OK", 202: "Accepted", 400: "Bad Request", 401: "Unauthorized",
+            404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 503: "Service Unavailable"}
+
+
+def extraer_ids(payload):
+    """Extrae los identificadores de incidente de una notificación o webhook (objeto, lista o envoltorio 'data')."""
+    ids = []
+    if isinstance(payload, list):
+        for elemento in payload:
+            ids.extend(extraer_ids(elemento))
+    elif isinstance(payload, str):
+        if payload.strip():
+            ids.append(payload.strip())
+    elif isinstance(payload, dict):
+        for clave in CLAVES_LISTA_IDS:
+            if isinstance(payload.get(clave), list):
+                ids.extend(str(i) for i in payload[clave] if i)
+        for clave in CLAVES_ID:
+            if payload.get(clave) and isinstance(payload[clave], (str, int)):
+                ids.append(str(payload[clave]))
+                break
+        for clave in ("data", "incident", "incidents"):
+            if isinstance(payload.get(clave), (dict, list)):
+                ids.extend(extraer_ids(payload[clave]))
+    return ids
+
+
+class ReceptorIncidentes:
+    """Servidor HTTP asyncio que recibe notificaciones de incidentes y los procesa en cuanto llegan.
+
+    Los IDs recibidos se deduplican y se encolan; un trabajador los procesa por lotes en un hilo aparte
+    (las llamadas a la API son bloqueantes). Cada 'intervalo_reconciliacion' segundos se ejecuta además
+    la función 'reconciliar' (un barrido de sondeo) en ese mismo hilo, de modo que nunca se solapan.
+    """
+
+    def __init__(self, procesar_ids, host="127.0.0.1", puerto=8080, token=None, reconciliar=None,
+                 intervalo_reconciliacion=3600, max_cola=10000, max_lote=100, max_cuerpo=1 << 20):
+        self.procesar_ids = procesar_ids
+        self.host = host
+        self.puerto = puerto
+        self.token = token
+        self.reconciliar = reconciliar
+        self.intervalo_reconciliacion = intervalo_reconciliacion
+        self.max_cola = max_cola
+        self.max_lote = max_lote
+        self.max_cuerpo = max_cuerpo
+        self._pendientes = set()
+        self._cola = None
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self.recibidos = 0
+        self.duplicados = 0
+        self.procesados = 0
+        self.reconciliaciones = 0
+
+    def metricas(self):
+        return {
+            "en_cola": len(self._pendientes),
+            "recibidos": self.recibidos,
+            "duplicados": self.duplicados,
+            "procesados": self.procesados,
+            "reconciliaciones": self.reconciliaciones,
+        }
+
+    def encolar(self, ids):
+        """Encola los IDs que no estén ya pendientes. Devuelve cuántos se aceptaron."""
+        aceptados = 0
+        for incident_id in ids:
+            self.recibidos += 1
+            if incident_id in self._pendientes:
+                self.duplicados += 1
+                continue
+            if len(self._pendientes) >= self.max_cola:
+                break
+            self._pendientes.add(incident_id)
+            self._cola.put_nowait(incident_id)
+            aceptados += 1
+        return aceptados
+
+    async def _responder(self, writer, codigo, cuerpo):
+        datos = json.dumps(cuerpo).encode("utf-8")
+        cabecera = (f"HTTP/1.1 {codigo} {_RAZONES.get(codigo, '')}\r\n"
+                    "Content-Type: application/json\r\n"
+                    f"Content-Length: {len(datos)}\r\n"
+                    "Connection: close\r\n\r\n")
+        writer.write(cabecera.encode("ascii") + datos)
+        await writer.drain()
+
+    def _autorizado(self, cabeceras):
+        if not self.token:
+            return True
+        recibido = cabeceras.get("x-webhook-token") or cabeceras.get("authorization", "").removeprefix("Bearer ").strip()
+        return hmac.compare_digest(recibido.encode("utf-8"), self.token.encode("utf-8"))
+
+    async def _atender(self, reader, writer):
+        try:
+            linea = await reader.readline()
+            partes = linea.decode("latin-1").split()
+            if len(partes) < 2:
+                await self._responder(writer, 400, {"error": "petición inválida"})
+                return
+            metodo, ruta = partes[0].upper(), partes[1]
+            cabeceras = {}
+            while True:
+                linea = await reader.readline()
+                if linea in (b"\r\n", b"\n", b""):
+                    break
+                clave, _, valor = linea.decode("latin-1").partition(":")
+                cabeceras[clave.strip().lower()] = valor.strip()
+
+            if ruta == "/salud":
+                await self._responder(writer, 200, self.metricas())
+                return
+            if ruta != "/incidentes":
+                await self._responder(writer, 404, {"error": "ruta no encontrada"})
+                return
+            if metodo != "POST":
+                await self._responder(writer, 405, {"error": "sólo se admite POST"})
+                return
+            if not self._autorizado(cabeceras):
+                await self._responder(writer, 401, {"error": "token no válido"})
+                return
+            longitud = int(cabeceras.get("content-length", "0") or 0)
+            if longitud > self.max_cuerpo:
+                await self._responder(writer, 413, {"error": "cuerpo demasiado grande"})
+                return
+            cuerpo = await reader.readexactly(longitud) if longitud else b""
+            try:
+                ids = extraer_ids(json.loads(cuerpo or b"null"))
+            except ValueError:
+                await self._responder(writer, 400, {"error": "JSON no válido"})
+                return
+            if not ids:
+                await self._responder(writer, 400, {"error": "no se encontró ningún ID de incidente"})
+                return
+            aceptados = self.encolar(ids)
+            codigo = 202 if aceptados or len(self._pendientes) < self.max_cola else 503
+            await self._responder(writer, codigo, {"aceptados": aceptados, "recibidos": len(ids)})
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError) as e:
+            print(f"⚠️ Petición inválida en el receptor: {e}")
+        finally:
+            writer.close()
+
+    async def _trabajador(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            lote = [await self._cola.get()]
+            while not self._cola.empty() and len(lote) < self.max_lote:
+                lote.append(self._cola.get_nowait())
+            for incident_id in lote:
+                self._pendientes.discard(incident_id)
+            print(f"📨 Procesando {len(lote)} incidente(s) notificados: {', '.join(lote)}")
+            try:
+                await loop.run_in_executor(self._executor, self.procesar_ids, lote)
+                self.procesados += len(lote)
+            except Exception as e:
+                print(f"❌ Error al procesar incidentes notificados: {e}")
+
+    async def _barrido_reconciliacion(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.intervalo_reconciliacion)
+            print("🔁 Ejecutando barrido de reconciliación...")
+            try:
+                await loop.run_in_executor(self._executor, self.reconciliar)
+                self.reconciliaciones += 1
+            except Exception as e:
+                print(f"❌ Error en el barrido de reconciliación: {e}")
+
+    async def ejecutar(self):
+        """Arranca el servidor, el trabajador y el barrido de reconciliación y atiende hasta que se cancele."""
+        self._cola = asyncio.Queue()
+        servidor = await asyncio.start_server(self._atender, self.host, self.puerto)
+        tareas = [asyncio.create_task(self._trabajador())]
+        if self.reconciliar and self.intervalo_reconciliacion > 0:
+            tareas.append(asyncio.create_task(self._barrido_reconciliacion()))
+        print(f"📡 Receptor de incidentes escuchando en http://{self.host}:{self.puerto}/incidentes")
+        try:
+            async with servidor:
+                await servidor.serve_forever()
+        finally:
+            for tarea in tareas:
+                tarea.cancel()
+            self._executor.shutdown(wait=True)
+
+    def iniciar(self):
+        """Ejecuta el receptor hasta Ctrl+C."""
+        try:
+            asyncio.run(self.ejecutar())
+        except KeyboardInterrupt:
+            print("👋 Receptor detenido.")
@@ -0,0 +1,327 @@
+"""Motor de reglas de cierre automático de incidentes.
+
+Las reglas se declaran en un archivo INI, una sección [regla:nombre] por regla:
+
+    [regla:ips_peligrosas]
+    ips = 10.1.5.13, 172.16.0.0/16
+    comentario = Security Test
+
+Condiciones admitidas (todas las indicadas deben cumplirse; las omitidas no se comprueban):
+    severidad_min / severidad_max  rango de severidades (incluidas)
+    estados                        estados del incidente (por defecto: new, in progress)
+    ips                            IPs o redes CIDR presentes en los assets o indicadores
+    palabras                       palabras clave del resumen (basta con una, sin distinguir mayúsculas)
+    tipos_asset                    tipos de asset presentes en el incidente (basta con uno)
+y 'comentario', el texto con el que se comenta el incidente antes de cerrarlo.
+
+Todas las reglas se compilan en un único evaluador: cada regla es un bit y cada condición produce la
+máscara de reglas que cumple, así que un incidente se evalúa contra todas las reglas en una sola
+pasada. Las palabras clave de todas las reglas se buscan con un único autómata de Aho-Corasick.
+Si varias reglas coinciden se aplica la primera del archivo.
+"""
+import configparser
+import ipaddress
+import threading
+import time
+from collections import deque
+
+ESTADOS_POR_DEFECTO = ("new", "in progress")
+
+# Etapas del evaluador, para repartir el tiempo de evaluación entre las reglas que las usan
+ETAPA_LISTADO = "listado"
+ETAPA_IPS = "ips"
+ETAPA_TIPOS = "tipos_asset"
+
+
+def _lista_csv(valor):
+    return [v.strip() for v in (valor or "").split(",") if v.strip()]
+
+
+class AutomataPalabras:
+    """Autómata de Aho-Corasick: encuentra todas las palabras clave de un texto en una sola pasada.
+
+    Cada palabra lleva asociada una máscara de reglas; 'buscar' devuelve la unión de las máscaras
+    de las palabras que aparecen en el texto (sin distinguir mayúsculas).
+    """
+
+    def __init__(self, palabras):
+        self._transiciones = [{}]
+        self._fallo = [0]
+        self._salida = [0]
+        for palabra, mascara in palabras.items():
+            estado = 0
+            for caracter in palabra.lower():
+                siguiente = self._transiciones[estado].get(caracter)
+                if siguiente is None:
+                    siguiente = len(self._transiciones)
+                    self._transiciones.append({})
+                    self._fallo.append(0)
+                    self._salida.append(0)
+                    self._transiciones[estado][caracter] = siguiente
+                estado = siguiente
+            self._salida[estado] |= mascara
+
+        # Enlaces de fallo por niveles (BFS); la salida de cada estado incluye la de su enlace de fallo
+        cola = deque(self._transiciones[0].values())
+        while cola:
+            estado = cola.popleft()
+            for caracter, siguiente in self._transiciones[estado].items():
+                cola.append(siguiente)
+                fallo = self._fallo[estado]
+                while fallo and caracter not in self._transiciones[fallo]:
+                    fallo = self._fallo[fallo]
+                destino = self._transiciones[fallo].get(caracter, 0)
+                self._fallo[siguiente] = destino if destino != siguiente else 0
+                self._salida[siguiente] |= self._salida[self._fallo[siguiente]]
+
+    def buscar(self, texto):
+        transiciones, fallo, salida = self._transiciones, self._fallo, self._salida
+        estado = 0
+        mascara = 0
+        for caracter in texto.lower():
+            while estado and caracter not in transiciones[estado]:
+                estado = fallo[estado]
+            estado = transiciones[estado].get(caracter, 0)
+            mascara |= salida[estado]
+        return mascara
+
+
+def _ip_como_entero(valor):
+    """Devuelve (versión, entero) si el valor es una IP, o None. Las IPv4 se reconocen sin pasar por ipaddress."""
+    partes = valor.split(".")
+    if len(partes) == 4:
+        entero = 0
+        for parte in partes:
+            if not parte.isdigit() or len(parte) > 3 or int(parte) > 255:
+                return None
+            entero = (entero << 8) | int(parte)
+        return 4, entero
+    if ":" in valor and "/" not in valor:
+        try:
+            return 6, int(ipaddress.IPv6Address(valor))
+        except ValueError:
+            return None
+    return None
+
+
+class ConjuntoIPs:
+    """IPs exactas y redes CIDR de todas las reglas, con la máscara de reglas de cada una."""
+
+    def __init__(self):
+        self._exactas = {}
+        # (versión, longitud de prefijo) -> {red como entero: máscara}
+        self._redes = {}
+
+    def agregar(self, valor, mascara):
+        red = ipaddress.ip_network(valor, strict=False)
+        if red.num_addresses == 1:
+            clave = str(red.network_address)
+            self._exactas[clave] = self._exactas.get(clave, 0) | mascara
+            return
+        tabla = self._redes.setdefault((red.version, red.prefixlen), {})
+        clave = int(red.network_address) >> (red.max_prefixlen - red.prefixlen)
+        tabla[clave] = tabla.get(clave, 0) | mascara
+
+    def buscar(self, valor):
+        mascara = self._exactas.get(valor, 0)
+        if not self._redes:
+            return mascara
+        ip = _ip_como_entero(valor)
+        if ip is None:
+            return mascara
+        version_ip, entero = ip
+        bits = 32 if version_ip == 4 else 128
+        for (version, prefijo), tabla in self._redes.items():
+            if version == version_ip:
+                mascara |= tabla.get(entero >> (bits - prefijo), 0)
+        return mascara
+
+
+class Regla:
+    """Regla de cierre ya validada, con sus contadores."""
+
+    def __init__(self, nombre, comentario, severidad_min=None, severidad_max=None, estados=ESTADOS_POR_DEFECTO,
+                 ips=(), palabras=(), tipos_asset=()):
+        self.nombre = nombre
+        self.comentario = comentario
+        self.severidad_min = severidad_min
+        self.severidad_max = severidad_max
+        self.estados = tuple(e.lower() for e in estados)
+        self.ips = tuple(ips)
+        self.palabras = tuple(p.lower() for p in palabras)
+        self.tipos_asset = tuple(t.lower() for t in tipos_asset)
+        self.aciertos = 0
+
+    def etapas(self):
+        etapas = [ETAPA_LISTADO]
+        if self.ips:
+            etapas.append(ETAPA_IPS)
+        if self.tipos_asset:
+            etapas.append(ETAPA_TIPOS)
+        return etapas
+
+
+class MotorReglas:
+    """Evaluador compilado de un conjunto de reglas de cierre.
+
+    'severidades' es la lista ordenada de menor a mayor severidad.
+    """
+
+    def __init__(self, reglas, severidades):
+        self.reglas = list(reglas)
+        todas = (1 << len(self.reglas)) - 1
+        self._indices_severidad = {s: i for i, s in enumerate(severidades)}
+
+        # Máscara de reglas que admite cada severidad / estado (una severidad desconocida no cumple ningún rango)
+        self._por_severidad = {s: 0 for s in severidades}
+        self._por_estado = {}
+        self._sin_palabras = 0
+        self._sin_ips = 0
+        self._sin_tipos = 0
+        palabras = {}
+        self._ips = ConjuntoIPs()
+        self._tipos = {}
+        for bit, regla in enumerate(self.reglas):
+            mascara = 1 << bit
+            minimo = self._indices_severidad[regla.severidad_min] if regla.severidad_min else 0
+            maximo = self._indices_severidad[regla.severidad_max] if regla.severidad_max else len(severidades) - 1
+            for severidad, indice in self._indices_severidad.items():
+                if minimo <= indice <= maximo:
+                    self._por_severidad[severidad] |= mascara
+            for estado in regla.estados:
+                self._por_estado[estado] = self._por_estado.get(estado, 0) | mascara
+            for palabra in regla.palabras:
+                palabras[palabra] = palabras.get(palabra, 0) | mascara
+            if not regla.palabras:
+                self._sin_palabras |= mascara
+            for ip in regla.ips:
+                self._ips.agregar(ip, mascara)
+            if not regla.ips:
+                self._sin_ips |= mascara
+            for tipo in regla.tipos_asset:
+                self._tipos[tipo] = self._tipos.get(tipo, 0) | mascara
+            if not regla.tipos_asset:
+                self._sin_tipos |= mascara
+        self._automata = AutomataPalabras(palabras) if palabras else None
+        self._con_detalles = todas & ~(self._sin_ips & self._sin_tipos)
+
+        self._lock = threading.Lock()
+        self.evaluaciones = 0
+        self.tiempos = {ETAPA_LISTADO: 0.0, ETAPA_IPS: 0.0, ETAPA_TIPOS: 0.0}
+
+    def reiniciar(self):
+        """Pone a cero los aciertos de cada regla y los tiempos de evaluación acumulados."""
+        with self._lock:
+            self.evaluaciones = 0
+            self.tiempos = {etapa: 0.0 for etapa in self.tiempos}
+            for regla in self.reglas:
+                regla.aciertos = 0
+
+    def _sumar_tiempo(self, etapa, inicio):
+        with self._lock:
+            self.tiempos[etapa] += time.perf_counter() - inicio
+
+    def candidatas(self, incident):
+        """Máscara de las reglas que cumplen las condiciones que sólo dependen del listado (severidad, estado, resumen)."""
+        inicio = time.perf_counter()
+        mascara = self._por_severidad.get(incident.get("severity", "").lower(), 0)
+        mascara &= self._por_estado.get(incident.get("status", "").lower(), 0)
+        if mascara and self._automata is not None and mascara & ~self._sin_palabras:
+            mascara &= self._automata.buscar(incident.get("summary") or "") | self._sin_palabras
+        self._sumar_tiempo(ETAPA_LISTADO, inicio)
+        return mascara
+
+    def necesita_detalles(self, candidatas):
+        """Indica si alguna de las reglas candidatas depende de los assets/indicadores del incidente."""
+        return bool(candidatas & self._con_detalles)
+
+    def evaluar(self, data, candidatas=None):
+        """Devuelve la primera regla que cumple el incidente ('data' con sus assets/indicadores) o None.
+
+        'candidatas' es el resultado de 'candidatas' si ya se calculó (p. ej. al planificar).
+        """
+        mascara = self.candidatas(data) if candidatas is None else candidatas
+        if mascara & ~self._sin_ips:
+            inicio = time.perf_counter()
+            coincidencias = 0
+            for obj in data.get("assets", []) + data.get("indicators", []):
+                valor = obj.get("value") if isinstance(obj, dict) else None
+                if isinstance(valor, str):
+                    coincidencias |= self._ips.buscar(valor)
+            mascara &= coincidencias | self._sin_ips
+            self._sumar_tiempo(ETAPA_IPS, inicio)
+        if mascara & ~self._sin_tipos:
+            inicio = time.perf_counter()
+            coincidencias = 0
+            for obj in data.get("assets", []):
+                if isinstance(obj, dict):
+                    coincidencias |= self._tipos.get(str(obj.get("type", "")).lower(), 0)
+            mascara &= coincidencias | self._sin_tipos
+            self._sumar_tiempo(ETAPA_TIPOS, inicio)
+
+        with self._lock:
+            self.evaluaciones += 1
+            if not mascara:
+                return None
+            regla = self.reglas[(mascara & -mascara).bit_length() - 1]
+            regla.aciertos += 1
+        return regla
+
+    def metricas(self):
+        """Aciertos y tiempo de evaluación atribuido a cada regla.
+
+        Como todas las reglas se evalúan a la vez, el tiempo de cada etapa se reparte a partes iguales
+        entre las reglas que la usan.
+        """
+        with self._lock:
+            usuarios = {etapa: sum(1 for regla in self.reglas if etapa in regla.etapas()) for etapa in self.tiempos}
+            return [{
+                "regla": regla.nombre,
+                "aciertos": regla.aciertos,
+                "tiempo": sum(self.tiempos[etapa] / usuarios[etapa] for etapa in regla.etapas()),
+            } for regla in self.reglas]
+
+
+def cargar_reglas(ruta, severidades):
+    """Lee y compila el archivo de reglas. Lanza ValueError si el archivo o alguna regla no son válidos."""
+    parser = configparser.ConfigParser(interpolation=None)
+    try:
+        if not parser.read(ruta, encoding="utf-8"):
+            raise ValueError(f"no se pudo leer el archivo de reglas '{ruta}'")
+    except configparser.Error as e:
+        raise ValueError(f"archivo de reglas '{ruta}' no válido: {e}")
+
+    reglas = []
+    for seccion in parser.sections():
+        if not seccion.startswith("regla:"):
+            continue
+        nombre = seccion.split(":", 1)[1].strip()
+        datos = parser[seccion]
+        comentario = datos.get("comentario", "").strip()
+        if not comentario:
+            raise ValueError(f"la regla '{nombre}' no tiene 'comentario'")
+        severidades_regla = []
+        for clave in ("severidad_min", "severidad_max"):
+            valor = datos.get(clave, "").strip().lower() or None
+            if valor is not None and valor not in severidades:
+                raise ValueError(f"la regla '{nombre}' tiene una {clave} no válida: '{valor}'")
+            severidades_regla.append(valor)
+        ips = _lista_csv(datos.get("ips"))
+        for ip in ips:
+            try:
+                ipaddress.ip_network(ip, strict=False)
+            except ValueError:
+                raise ValueError(f"la regla '{nombre}' tiene una IP o red no válida: '{ip}'")
+        regla = Regla(
+            nombre, comentario,
+            severidad_min=severidades_regla[0],
+            severidad_max=severidades_regla[1],
+            estados=_lista_csv(datos.get("estados")) or ESTADOS_POR_DEFECTO,
+            ips=ips,
+            palabras=_lista_csv(datos.get("palabras")),
+            tipos_asset=_lista_csv(datos.get("tipos_asset")),
+        )
+        if not (regla.severidad_min or regla.severidad_max or regla.ips or regla.palabras or regla.tipos_asset):
+            raise ValueError(f"la regla '{nombre}' no tiene ninguna condición y cerraría todos los incidentes")
+        reglas.append(regla)
+    return MotorReglas(reglas, severidades)
@@ -0,0 +1,89 @@
+import gzip
+import mmap
+import os
+
+from serializacion import decodificar
+
+# Cabecera de los ficheros gzip
+_MAGIA_GZIP = b"\x1f\x8b"
+
+
+class LectorNDJSON:
+    """Itera los objetos de un fichero NDJSON, comprimido con gzip o no, sin cargarlo entero en memoria.
+
+    Los ficheros sin comprimir se recorren con mmap; los gzip se descomprimen por bloques.
+    Las líneas vacías se ignoran y las que no son JSON válido se cuentan en 'errores'.
+    """
+
+    def __init__(self, ruta, tamano_bloque=1 << 20):
+        self.ruta = ruta
+        self.tamano_bloque = tamano_bloque
+        self.lineas = 0
+        self.errores = 0
+        self.bytes_leidos = 0
+        with open(ruta, "rb") as f:
+            self.comprimido = f.read(2) == _MAGIA_GZIP
+
+    def _decodificar(self, linea):
+        linea = linea.strip()
+        if not linea:
+            return None
+        self.lineas += 1
+        try:
+            return decodificar(linea)
+        except ValueError:
+            self.errores += 1
+            print(f"⚠️ Línea {self.lineas} de '{self.ruta}' no es JSON válido, se omite.")
+            return None
+
+    def _lineas_mmap(self):
+        with open(self.ruta, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                inicio = 0
+                tamano = len(mm)
+                while inicio < tamano:
+                    fin = mm.find(b"\n", inicio)
+                    if fin == -1:
+                        fin = tamano
+                    self.bytes_leidos += fin + 1 - inicio
+                    yield mm[inicio:fin]
+                    inicio = fin + 1
+
+    def _lineas_gzip(self):
+        with gzip.open(self.ruta, "rb") as f:
+            resto = b""
+            while True:
+                bloque = f.read(self.tamano_bloque)
+                if not bloque:
+                    break
+                self.bytes_leidos += len(bloque)
+                lineas = (resto + bloque).split(b"\n")
+                resto = lineas.pop()
+                yield from lineas
+            if resto:
+                yield resto
+
+    def __iter__(self):
+        lineas = self._lineas_gzip() if self.comprimido else self._lineas_mmap()
+        for linea in lineas:
+            objeto = self._decodificar(linea)
+            if objeto is not None:
+                yield objeto
+
+
+def normalizar_registro(registro):
+    """Convierte un registro exportado en la pareja (incidente, detalles) que espera el proceso de ingesta.
+
+    Acepta respuestas completas de la API de detalles ({"data": {...}}), eventos HEC ({"event": {...}})
+    o el objeto del incidente directamente. Devuelve (None, None) si el registro no es un incidente.
+    """
+    if not isinstance(registro, dict):
+        return None, None
+    data = registro
+    if isinstance(registro.get("data"), dict):
+        data = registro["data"]
+    elif isinstance(registro.get("event"), dict):
+        data = registro["event"]
+    return data, {"data": data}
@@ -0,0 +1,41 @@
+import json
+
+# orjson es opcional: si está instalado se usa para codificar y decodificar, y si no, la librería estándar
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+MOTOR = "orjson" if orjson is not None else "json"
+
+
+def codificar(valor, ordenar=False):
+    """Codifica un valor a JSON compacto en UTF-8 (bytes). Con 'ordenar', las claves se ordenan."""
+    if orjson is not None:
+        opciones = orjson.OPT_SORT_KEYS if ordenar else 0
+        try:
+            return orjson.dumps(valor, option=opciones)
+        except orjson.JSONEncodeError:
+            pass
+        try:
+            # Claves no str (más lento, por eso no se usa siempre)
+            return orjson.dumps(valor, option=opciones | orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            # Valores que orjson no admite (p. ej. enteros de más de 64 bits): se usa la librería estándar
+            pass
+    return json.dumps(valor, separators=(",", ":"), ensure_ascii=False, sort_keys=ordenar).encode("utf-8")
+
+
+def decodificar(datos):
+    """Decodifica JSON desde bytes o str."""
+    if orjson is not None:
+        return orjson.loads(datos)
+    return json.loads(datos)
+
+
+def codificar_evento_hec(evento):
+    """Codifica un evento con el sobre de Splunk HEC ({"event": ...}) en una sola pasada.
+
+    Los bytes resultantes sirven tal cual como cuerpo HEC, línea de un archivo NDJSON o entrada de un lote.
+    """
+    return codificar({"event": evento})
@@ -0,0 +1,86 @@
+"""Entorno aislado para probar xdr2splunk sin red: configuración propia, directorio temporal y API simulada."""
+import contextlib
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+RAIZ_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ_REPO)
+
+import xdr2splunk  # noqa: E402
+from generador import GeneradorIncidentes  # noqa: E402
+
+# Estado cacheado del módulo que cada prueba empieza de cero
+_ESTADO_INICIAL = {
+    "_proyeccion": None, "_proyeccion_cargada": False,
+    "_registro_huellas": None, "_registro_huellas_cargado": False,
+    "_presupuesto_activo": None,
+    "_circuitos": None, "_cola_reintentos": None,
+    "_enviador_hec": None, "_enviador_hec_cargado": False,
+    "_distribuidor": None, "_distribuidor_cargado": False,
+    "_motor_reglas": None, "_motor_reglas_cargado": False,
+    "_almacen": None, "_almacen_cargado": False,
+}
+
+
+class EntornoXdr(unittest.TestCase):
+    """Prueba con xdr2splunk configurado por 'CONFIG' y ejecutado en un directorio temporal.
+
+    'simular_api' sustituye las llamadas a la API XDR por un listado y unos detalles generados; los envíos a
+    Splunk se registran en 'self.enviados' y los comentarios/cierres en 'self.comentados'/'self.cerrados'.
+    """
+
+    CONFIG = ""
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        anterior = os.getcwd()
+        os.chdir(directorio.name)
+        self.addCleanup(os.chdir, anterior)
+
+        with open("config.properties", "w", encoding="utf-8") as f:
+            f.write("[SPLUNK]\nurl = https://splunk.invalid/services/collector\ntoken = prueba\n\n" + self.CONFIG)
+        self._parchear(config=xdr2splunk.ConfiguracionPerezosa("config.properties"), _tokens_rechazados=set(),
+                       **_ESTADO_INICIAL)
+
+        self.enviados = []
+        self.comentados = []
+        self.cerrados = []
+        self.splunk_caido = False
+        self._salida = open(os.devnull, "w", encoding="utf-8")
+        self.addCleanup(self._salida.close)
+
+    def _parchear(self, **atributos):
+        for nombre, valor in atributos.items():
+            parche = mock.patch.object(xdr2splunk, nombre, valor)
+            parche.start()
+            self.addCleanup(parche.stop)
+
+    def simular_api(self, n=20, **kwargs_generador):
+        """Genera 'n' incidentes y simula con ellos la API XDR y Splunk. Devuelve (listado, detalles por ID)."""
+        generador = GeneradorIncidentes(7, **kwargs_generador)
+        self.listado = generador.listado(n)
+        self.detalles = {inc["id"]: generador.detalles(inc) for inc in self.listado}
+
+        def enviar(evento):
+            if self.splunk_caido:
+                return None
+            self.enviados.append(evento)
+            return True
+
+        self._parchear(
+            obtener_incidentes_api=lambda token, hours_ago, limit=10000, offset=0, status_filter=None: list(self.listado),
+            get_incident_details=lambda token, incident_uuid: self.detalles.get(incident_uuid, {}),
+            send_to_splunk=enviar,
+            comentar_ticket=lambda token, display_id, comment_text, user_email: self.comentados.append(display_id) or True,
+            close_ticket=lambda token, incident_uuid: self.cerrados.append(incident_uuid) or True,
+        )
+        return self.listado, self.detalles
+
+    def ejecutar(self):
+        """Ejecuta get_incidents_original sin mostrar su salida."""
+        with contextlib.redirect_stdout(self._salida):
+            xdr2splunk.get_incidents_original("token", "prueba@example.com", global_hours_ago=24)
@@ -0,0 +1,93 @@
+"""Comprobaciones del circuit breaker y de la cola persistente de reintentos (circuitos.py).
+
+Uso:
+    python -m unittest discover -s tests
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+RAIZ_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ_REPO)
+
+import circuitos  # noqa: E402
+from circuitos import ABIERTO, CERRADO, SEMIABIERTO, CircuitBreaker, ColaReintentos  # noqa: E402
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        self.ahora = 1000.0
+        parche = mock.patch.object(circuitos.time, "monotonic", lambda: self.ahora)
+        parche.start()
+        self.addCleanup(parche.stop)
+        salida = contextlib.redirect_stdout(io.StringIO())
+        salida.__enter__()
+        self.addCleanup(salida.__exit__, None, None, None)
+        self.circuito = CircuitBreaker("prueba", umbral_fallos=3, tiempo_apertura=60)
+
+    def test_se_abre_tras_el_umbral_de_fallos_seguidos(self):
+        self.circuito.registrar_fallo()
+        self.circuito.registrar_fallo()
+        self.circuito.registrar_exito()
+        self.circuito.registrar_fallo()
+        self.circuito.registrar_fallo()
+        self.assertEqual(self.circuito.estado, CERRADO)
+        self.circuito.registrar_fallo()
+        self.assertEqual(self.circuito.estado, ABIERTO)
+        self.assertFalse(self.circuito.permitir())
+        self.assertEqual(self.circuito.metricas()["rechazadas"], 1)
+
+    def test_una_sola_sonda_en_semiabierto(self):
+        for _ in range(3):
+            self.circuito.registrar_fallo()
+        self.ahora += 60
+        self.assertTrue(self.circuito.permitir())
+        self.assertEqual(self.circuito.estado, SEMIABIERTO)
+        self.assertFalse(self.circuito.permitir())
+        # Si la sonda falla vuelve a abrirse; si va bien se cierra
+        self.circuito.registrar_fallo()
+        self.assertEqual(self.circuito.estado, ABIERTO)
+        self.ahora += 60
+        self.assertTrue(self.circuito.permitir())
+        self.circuito.registrar_respuesta(200)
+        self.assertEqual(self.circuito.estado, CERRADO)
+        self.assertTrue(self.circuito.permitir())
+
+    def test_codigos_http_que_cuentan_como_fallo(self):
+        for codigo in (429, 500, 503):
+            self.circuito.registrar_respuesta(codigo)
+        self.assertEqual(self.circuito.estado, ABIERTO)
+        circuito = CircuitBreaker("cliente", umbral_fallos=1)
+        for codigo in (400, 401, 404):
+            circuito.registrar_respuesta(codigo)
+        self.assertEqual(circuito.estado, CERRADO)
+
+
+class TestColaReintentos(unittest.TestCase):
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.ruta = os.path.join(directorio.name, "reintentos.json")
+
+    def test_persiste_y_devuelve_entradas(self):
+        cola = ColaReintentos(self.ruta)
+        cola.encolar("incidente", incident_uuid="a")
+        cola.encolar("incidente", incident_uuid="b")
+        cola.guardar()
+        recargada = ColaReintentos(self.ruta)
+        entradas = recargada.extraer_todas()
+        self.assertEqual([e["incident_uuid"] for e in entradas], ["a", "b"])
+        self.assertEqual(len(recargada), 0)
+        recargada.encolar("incidente", incident_uuid="c")
+        recargada.devolver(entradas[1:])
+        self.assertEqual([e["incident_uuid"] for e in recargada.extraer_todas()], ["b", "c"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+"""Comprobaciones de la carga perezosa de la configuración (ConfiguracionPerezosa en xdr2splunk.py).
+
+Uso:
+    python -m unittest discover -s tests
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+RAIZ_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ_REPO)
+
+from xdr2splunk import ConfiguracionPerezosa  # noqa: E402
+
+
+class TestConfiguracionPerezosa(unittest.TestCase):
+
+    def setUp(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".properties", delete=False, encoding="utf-8") as f:
+            f.write("[SPLUNK]\nurl = https://splunk.example.com\n\n[DELTA]\nhabilitado = true\nretencion_dias = 7\n")
+        self.addCleanup(os.remove, f.name)
+        self.config = ConfiguracionPerezosa(f.name)
+
+    def test_no_lee_el_archivo_al_crearse(self):
+        self.assertFalse(self.config.cargada)
+
+    def test_cualquier_acceso_carga_el_archivo(self):
+        accesos = {
+            "get": lambda c: c.get("SPLUNK", "url"),
+            "getboolean": lambda c: c.getboolean("DELTA", "habilitado"),
+            "getint": lambda c: c.getint("DELTA", "retencion_dias"),
+            "items": lambda c: dict(c.items("DELTA"))["retencion_dias"],
+            "options": lambda c: c.options("SPLUNK"),
+            "sections": lambda c: c.sections(),
+            "has_section": lambda c: c.has_section("DELTA"),
+            "has_option": lambda c: c.has_option("DELTA", "habilitado"),
+            "in": lambda c: "SPLUNK" in c,
+            "[]": lambda c: c["SPLUNK"]["url"],
+        }
+        esperados = {
+            "get": "https://splunk.example.com", "getboolean": True, "getint": 7, "items": "7",
+            "options": ["url"], "sections": ["SPLUNK", "DELTA"], "has_section": True, "has_option": True,
+            "in": True, "[]": "https://splunk.example.com",
+        }
+        for nombre, acceso in accesos.items():
+            config = ConfiguracionPerezosa(self.config.ruta)
+            self.assertEqual(acceso(config), esperados[nombre], nombre)
+            self.assertTrue(config.cargada, nombre)
+
+    def test_archivo_inexistente(self):
+        config = ConfiguracionPerezosa(os.path.join(tempfile.gettempdir(), "no_existe_config.properties"))
+        self.assertFalse(config.has_section("SPLUNK"))
+        self.assertTrue(config.cargada)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+"""Comprobaciones del registro de huellas y de los eventos delta (delta.py).
+
+Uso:
+    python -m unittest discover -s tests
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+RAIZ_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ_REPO)
+
+from delta import EVENTO_COMPLETO, EVENTO_DELTA, SIN_CAMBIOS, RegistroHuellas  # noqa: E402
+
+EVENTO = {
+    "id": "inc-1", "display_id": "INC-1", "severity": "high", "summary": "Malware", "updated_at": "2025-01-01T00:00:00Z",
+    "assets": [{"type": "host", "value": "pc-1"}],
+    "indicators": [{"type": "ip", "value": "10.1.5.13"}, {"type": "domain", "value": "a.example.com"}],
+}
+
+
+class TestRegistroHuellas(unittest.TestCase):
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.ruta = os.path.join(directorio.name, "huellas.json")
+        self.registro = RegistroHuellas(self.ruta)
+
+    def _enviar(self, evento):
+        tipo, enviado, huella = self.registro.calcular("inc-1", evento)
+        self.registro.confirmar("inc-1", huella)
+        return tipo, enviado
+
+    def test_sin_confirmar_se_vuelve_a_enviar_completo(self):
+        self.registro.calcular("inc-1", EVENTO)
+        tipo, enviado, _ = self.registro.calcular("inc-1", EVENTO)
+        self.assertEqual(tipo, EVENTO_COMPLETO)
+        self.assertEqual(enviado, EVENTO)
+
+    def test_delta_solo_con_los_cambios(self):
+        self._enviar(EVENTO)
+        self.assertEqual(self._enviar(dict(EVENTO, updated_at="2025-01-02T00:00:00Z"))[0], SIN_CAMBIOS)
+
+        nuevo_indicador = {"type": "ip", "value": "10.9.9.9"}
+        tipo, delta = self._enviar(dict(EVENTO, summary="Malware (actualizado)",
+                                        indicators=EVENTO["indicators"][1:] + [nuevo_indicador]))
+        self.assertEqual(tipo, EVENTO_DELTA)
+        self.assertEqual(delta["cambios"], {"summary": "Malware (actualizado)"})
+        self.assertEqual(delta["nuevos"], {"indicators": [nuevo_indicador]})
+        self.assertEqual(delta["eliminados"], {"indicators": 1})
+        self.assertNotIn("assets", delta.get("nuevos", {}))
+
+    def test_las_huellas_se_conservan_entre_ejecuciones(self):
+        self._enviar(EVENTO)
+        self.registro.guardar()
+        self.assertEqual(RegistroHuellas(self.ruta).calcular("inc-1", EVENTO)[0], SIN_CAMBIOS)
+
+
+if __name__ == "__main__":
+    unittest.main()
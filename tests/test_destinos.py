@@ -0,0 +1,119 @@
+"""Comprobaciones de los destinos (destinos.py): qué se guarda como pendiente y cómo se reintenta.
+
+Uso:
+    python -m unittest discover -s tests
+"""
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+RAIZ_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ_REPO)
+
+from destinos import Destino, Distribuidor, PendientesDestino  # noqa: E402
+
+
+class _DestinoSimulado(Destino):
+    """Destino cuyo resultado por evento lo decide 'resultado(cuerpo)' (True, False o None)."""
+
+    def __init__(self, nombre, resultado, **kwargs):
+        super().__init__(nombre, espera_lote=0, **kwargs)
+        self.resultado = resultado
+        self.escritos = []
+
+    def _escribir(self, cuerpos):
+        self.escritos.extend(cuerpos)
+        return [self.resultado(cuerpo) for cuerpo in cuerpos]
+
+
+class TestPendientesDestinos(unittest.TestCase):
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.ruta = os.path.join(directorio.name, "pendientes.ndjson")
+
+    def _destino(self, resultado, **kwargs):
+        pendientes = PendientesDestino(self.ruta, kwargs.pop("max_bytes", 1 << 20))
+        return _DestinoSimulado("prueba", resultado, pendientes=pendientes, **kwargs)
+
+    def _enviar(self, destino, cuerpos):
+        for cuerpo in cuerpos:
+            destino.encolar(cuerpo)
+        destino.vaciar()
+
+    def test_solo_se_guardan_los_fallos_reintentables(self):
+        # Los eventos 'caido' fallan de forma reintentable y los 'malo' de forma definitiva
+        destino = self._destino(lambda cuerpo: None if b"caido" in cuerpo else (False if b"malo" in cuerpo else True))
+        self._enviar(destino, [b'{"event": "ok"}', b'{"event": "caido"}', b'{"event": "malo"}'])
+        self.assertEqual(list(destino.pendientes.extraer()), [(b'{"event": "caido"}', 1)])
+        metricas = destino.metricas()
+        self.assertEqual((metricas["enviados"], metricas["fallidos"], metricas["aplazados"]), (1, 2, 1))
+        self.assertFalse(os.path.exists(self.ruta))
+
+    def test_se_reintenta_hasta_max_intentos(self):
+        destino = self._destino(lambda cuerpo: None, max_intentos=3)
+        self._enviar(destino, [b'{"event": 1}', b'{"event": 2}'])
+        for _ in range(5):
+            destino.retomar_pendientes()
+            destino.vaciar()
+        self.assertEqual(len(destino.escritos), 2 * 4)
+        self.assertEqual(destino.metricas()["descartados"], 2)
+        self.assertEqual(destino.retomar_pendientes(), 0)
+
+    def test_lo_retomado_se_entrega_cuando_el_destino_se_recupera(self):
+        caido = threading.Event()
+        caido.set()
+        destino = self._destino(lambda cuerpo: None if caido.is_set() else True)
+        self._enviar(destino, [b'{"event": %d}' % n for n in range(10)])
+        caido.clear()
+        self.assertEqual(destino.retomar_pendientes(), 10)
+        destino.vaciar()
+        self.assertEqual(destino.metricas()["enviados"], 10)
+        self.assertEqual(destino.retomar_pendientes(), 0)
+
+    def test_al_detenerse_se_guardan_sin_gastar_intentos(self):
+        destino = self._destino(lambda cuerpo: None)
+        self._enviar(destino, [b'{"event": %d}' % n for n in range(4)])
+        self.assertEqual(destino.retomar_pendientes(detener=lambda: True), 0)
+        self.assertEqual([intentos for _, intentos in destino.pendientes.extraer()], [1, 1, 1, 1])
+
+    def test_el_fichero_esta_acotado(self):
+        destino = self._destino(lambda cuerpo: None, max_bytes=100)
+        self._enviar(destino, [b'{"event": "%s"}' % (b"x" * 20) for _ in range(10)])
+        self.assertLessEqual(os.path.getsize(self.ruta), 100)
+        metricas = destino.metricas()
+        self.assertEqual(metricas["aplazados"] + metricas["descartados"], 10)
+        self.assertGreater(metricas["descartados"], 0)
+
+    def test_el_desbordamiento_se_guarda_como_pendiente(self):
+        bloqueo = threading.Event()
+        destino = self._destino(lambda cuerpo: bloqueo.wait() or True, capacidad=1)
+        for n in range(5):
+            destino.encolar(b'{"event": %d}' % n)
+        bloqueo.set()
+        destino.vaciar()
+        metricas = destino.metricas()
+        self.assertGreater(metricas["desbordados"], 0)
+        self.assertEqual(metricas["desbordados"], metricas["aplazados"])
+        self.assertEqual(metricas["enviados"] + metricas["aplazados"], 5)
+
+    def test_el_distribuidor_retoma_cada_destino(self):
+        caido = threading.Event()
+        caido.set()
+        destino = self._destino(lambda cuerpo: None if caido.is_set() else True)
+        distribuidor = Distribuidor([destino])
+        resultados = []
+        distribuidor.enviar(b'{"event": 1}', "high", resultados.append)
+        distribuidor.vaciar()
+        self.assertEqual(resultados, [False])
+        caido.clear()
+        self.assertEqual(distribuidor.retomar_pendientes(), 1)
+        distribuidor.vaciar()
+        self.assertEqual(destino.metricas()["enviados"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
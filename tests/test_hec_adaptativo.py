@@ -0,0 +1,93 @@
+"""Comprobaciones del envío adaptativo a Splunk HEC (hec_adaptativo.py) frente a un HEC con límites.
+
+Uso:
+    python -m unittest discover -s tests
+"""
+import contextlib
+import io
+import os
+import sys
+import threading
+import unittest
+
+RAIZ_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ_REPO)
+
+from hec_adaptativo import ControladorAIMD, EnviadorHEC  # noqa: E402
+
+
+class _Respuesta:
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.text = ""
+
+
+class _HecSimulado:
+    """Sesión HTTP que responde 413 a las peticiones con más de 'max_eventos' eventos o 'max_bytes' bytes."""
+
+    def __init__(self, max_eventos=None, max_bytes=None, estado=200):
+        self.max_eventos = max_eventos
+        self.estado = estado
+        self.max_bytes = max_bytes
+        self.peticiones = []
+        self.eventos = 0
+        self._lock = threading.Lock()
+
+    def post(self, url, data, verify, timeout):
+        eventos = data.count(b'{"event"')
+        demasiado_grande = ((self.max_eventos is not None and eventos > self.max_eventos)
+                            or (self.max_bytes is not None and len(data) > self.max_bytes))
+        with self._lock:
+            self.peticiones.append((eventos, len(data), demasiado_grande))
+            if not demasiado_grande:
+                self.eventos += eventos
+        return _Respuesta(413 if demasiado_grande else self.estado)
+
+
+class TestEnviadorHEC(unittest.TestCase):
+
+    def _enviar(self, hec, cuerpos, **kwargs):
+        enviador = EnviadorHEC("https://splunk.invalid/services/collector", "prueba",
+                               ControladorAIMD(latencia_objetivo=60, pausa_base=0), **kwargs)
+        enviador._sesion = hec
+        with contextlib.redirect_stdout(io.StringIO()):
+            resultados = enviador.enviar(cuerpos)
+        return enviador, resultados
+
+    def test_un_413_fija_un_techo_que_el_incremento_no_supera(self):
+        hec = _HecSimulado(max_eventos=8)
+        cuerpos = [b'{"event": {"n": %d}}' % n for n in range(1000)]
+        enviador, resultados = self._enviar(hec, cuerpos)
+        self.assertTrue(all(resultados))
+        self.assertEqual(hec.eventos, 1000)
+        rechazadas = sum(1 for _, _, demasiado_grande in hec.peticiones if demasiado_grande)
+        self.assertLessEqual(rechazadas, 8)
+        self.assertLessEqual(enviador.controlador.metricas()["techo_lote"], 8)
+
+    def test_los_lotes_no_superan_el_maximo_de_bytes(self):
+        hec = _HecSimulado(max_bytes=500)
+        cuerpos = [b'{"event": "%s"}' % (b"x" * (20 + n % 40)) for n in range(300)]
+        _, resultados = self._enviar(hec, cuerpos, max_bytes_lote=500)
+        self.assertTrue(all(resultados))
+        self.assertFalse(any(demasiado_grande for _, _, demasiado_grande in hec.peticiones))
+        self.assertTrue(all(tamano <= 500 for _, tamano, _ in hec.peticiones))
+        self.assertEqual(hec.eventos, 300)
+
+    def test_un_evento_mayor_que_el_limite_se_envia_solo(self):
+        hec = _HecSimulado(max_bytes=100)
+        cuerpos = [b'{"event": "corto"}', b'{"event": "%s"}' % (b"x" * 200), b'{"event": "corto"}']
+        _, resultados = self._enviar(hec, cuerpos, max_bytes_lote=100)
+        self.assertEqual(resultados, [True, False, True])
+
+
+    def test_la_saturacion_se_puede_reintentar_y_un_4xx_no(self):
+        cuerpos = [b'{"event": %d}' % n for n in range(20)]
+        _, resultados = self._enviar(_HecSimulado(estado=503), cuerpos, max_reintentos=2)
+        self.assertEqual(resultados, [None] * 20)
+        _, resultados = self._enviar(_HecSimulado(estado=403), cuerpos)
+        self.assertEqual(resultados, [False] * 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+"""Comprobaciones del pipeline por etapas (pipeline.py), en especial al agotarse el tiempo.
+
+Uso:
+    python -m unittest discover -s tests
+"""
+import os
+import sys
+import threading
+import time
+import unittest
+
+RAIZ_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ_REPO)
+
+from pipeline import Etapa, Pipeline  # noqa: E402
+
+
+class TestPipeline(unittest.TestCase):
+
+    def test_procesa_todos_los_elementos(self):
+        resultados = []
+        lock = threading.Lock()
+
+        def guardar(elemento):
+            with lock:
+                resultados.append(elemento)
+            return elemento
+
+        pipeline = Pipeline([
+            Etapa("doble", lambda n: n * 2, concurrencia=3),
+            Etapa("impares_fuera", lambda n: n if n % 4 == 0 else None),
+            Etapa("guardar", guardar, concurrencia=2),
+        ], capacidad=2)
+        self.assertEqual(pipeline.ejecutar(range(100)), [])
+        self.assertEqual(sorted(resultados), [n * 2 for n in range(100) if (n * 2) % 4 == 0])
+        metricas = {m["etapa"]: m for m in pipeline.metricas()}
+        self.assertEqual(metricas["impares_fuera"]["descartados"], 50)
+
+    def test_al_detenerse_no_difiere_lo_que_ya_se_envio(self):
+        # 'enviar' simula el envío a Splunk y 'cerrar' es lenta: al detenerse, lo que espera en la cola de
+        # 'cerrar' ya se envió, así que pasa a 'al_detener' y no se devuelve como no procesado
+        enviados, cerrados, aplazados = set(), set(), set()
+        lock = threading.Lock()
+        detenido = threading.Event()
+
+        def enviar(ctx):
+            with lock:
+                enviados.add(ctx["id"])
+            return ctx
+
+        def cerrar(ctx):
+            time.sleep(0.02)
+            with lock:
+                cerrados.add(ctx["id"])
+                if len(cerrados) >= 3:
+                    detenido.set()
+            return ctx
+
+        def aplazar(ctx):
+            with lock:
+                aplazados.add(ctx["id"])
+
+        pipeline = Pipeline([
+            Etapa("preparar", lambda incidente: {"id": incidente["id"], "incidente": incidente}),
+            Etapa("enviar", enviar),
+            Etapa("cerrar", cerrar, al_detener=aplazar),
+        ], capacidad=5)
+        fuente = [{"id": n} for n in range(200)]
+        no_procesados = pipeline.ejecutar(fuente, detener=detenido.is_set, original=lambda ctx: ctx["incidente"])
+
+        ids_no_procesados = [incidente["id"] for incidente in no_procesados]
+        self.assertTrue(detenido.is_set())
+        self.assertTrue(no_procesados)
+        # Los no procesados son elementos de la fuente, sin repetir, y ninguno se había enviado
+        self.assertTrue(all(incidente in fuente for incidente in no_procesados))
+        self.assertEqual(len(ids_no_procesados), len(set(ids_no_procesados)))
+        self.assertFalse(enviados & set(ids_no_procesados))
+        # Todo lo enviado se cerró o se aplazó, y cada elemento acabó en un único sitio
+        self.assertEqual(cerrados | aplazados, enviados)
+        self.assertFalse(cerrados & aplazados)
+        self.assertEqual(len(enviados) + len(ids_no_procesados), len(fuente))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+"""Comprobaciones del planificador de llamadas de detalle (planificador.py).
+
+Uso:
+    python -m unittest discover -s tests
+"""
+import os
+import sys
+import unittest
+
+RAIZ_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ_REPO)
+
+from planificador import PlanificadorDetalles  # noqa: E402
+from reglas import MotorReglas, Regla  # noqa: E402
+
+SEVERIDADES = ["informational", "low", "medium", "high", "critical"]
+
+
+class TestPlanificadorDetalles(unittest.TestCase):
+
+    def test_envio_a_splunk_pide_detalles(self):
+        plan = PlanificadorDetalles(ips_peligrosas=["10.1.5.13"]).planificar({"severity": "High", "assets": [], "indicators": []})
+        self.assertTrue(plan.enviar)
+        self.assertTrue(plan.detalles)
+
+    def test_evita_detalles_si_el_listado_trae_assets_e_indicadores(self):
+        planificador = PlanificadorDetalles(ips_peligrosas=["10.1.5.13"])
+        plan = planificador.planificar({"severity": "low", "assets": [], "indicators": []})
+        self.assertTrue(plan.comprobar_ip)
+        self.assertFalse(plan.detalles)
+        self.assertEqual(planificador.llamadas_evitadas, 1)
+
+    def test_pide_detalles_si_el_listado_trae_solo_una_de_las_listas(self):
+        planificador = PlanificadorDetalles(ips_peligrosas=["10.1.5.13"])
+        for incidente in ({"severity": "low"}, {"severity": "low", "assets": []}, {"severity": "low", "indicators": []}):
+            self.assertTrue(planificador.planificar(incidente).detalles, incidente)
+
+    def test_con_reglas_solo_pide_detalles_si_una_candidata_los_necesita(self):
+        motor = MotorReglas([
+            Regla("ips", "Security Test", severidad_max="low", ips=["10.1.5.13"]),
+            Regla("ransomware", "Ransomware", severidad_min="high", palabras=["ransomware"]),
+        ], SEVERIDADES)
+        planificador = PlanificadorDetalles(enviar_splunk=False, reglas=motor)
+        self.assertTrue(planificador.planificar({"severity": "low", "status": "new", "indicators": []}).detalles)
+        plan = planificador.planificar({"severity": "critical", "status": "new", "summary": "Ransomware"})
+        self.assertTrue(plan.comprobar_ip)
+        self.assertFalse(plan.detalles)
+        self.assertFalse(planificador.planificar({"severity": "medium", "status": "new"}).comprobar_ip)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+"""Comprobaciones de comportamiento del motor de reglas de cierre (reglas.py).
+
+Uso:
+    python -m unittest discover -s tests
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+RAIZ_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ_REPO)
+
+from reglas import AutomataPalabras, ConjuntoIPs, MotorReglas, Regla, cargar_reglas  # noqa: E402
+
+SEVERIDADES = ["informational", "low", "medium", "high", "critical"]
+
+
+def _incidente(severity="low", status="new", summary="", assets=(), indicators=()):
+    return {
+        "severity": severity,
+        "status": status,
+        "summary": summary,
+        "assets": [{"type": tipo, "value": valor} for tipo, valor in assets],
+        "indicators": [{"type": "ip", "value": valor} for valor in indicators],
+    }
+
+
+class TestAutomataPalabras(unittest.TestCase):
+
+    def setUp(self):
+        self.automata = AutomataPalabras({"he": 1, "she": 2, "his": 4, "hers": 8})
+
+    def test_encuentra_palabras_solapadas(self):
+        # 'ushers' contiene 'she', 'he' (a través del enlace de fallo) y 'hers'
+        self.assertEqual(self.automata.buscar("ushers"), 1 | 2 | 8)
+
+    def test_no_distingue_mayusculas(self):
+        self.assertEqual(self.automata.buscar("HIS notebook"), 4)
+
+    def test_sin_coincidencias(self):
+        self.assertEqual(self.automata.buscar("ransomware"), 0)
+        self.assertEqual(self.automata.buscar(""), 0)
+
+    def test_une_las_mascaras_de_una_misma_palabra(self):
+        automata = AutomataPalabras({"port scan": 1 | 4, "scan": 2})
+        self.assertEqual(automata.buscar("Internal Port Scan detected"), 1 | 2 | 4)
+
+
+class TestConjuntoIPs(unittest.TestCase):
+
+    def setUp(self):
+        self.ips = ConjuntoIPs()
+        self.ips.agregar("10.1.5.13", 1)
+        self.ips.agregar("172.16.0.0/16", 2)
+        self.ips.agregar("10.0.0.0/8", 4)
+        self.ips.agregar("2001:db8::/32", 8)
+
+    def test_ip_exacta_y_red_que_la_contiene(self):
+        self.assertEqual(self.ips.buscar("10.1.5.13"), 1 | 4)
+
+    def test_limites_de_la_red(self):
+        self.assertEqual(self.ips.buscar("172.16.0.0"), 2)
+        self.assertEqual(self.ips.buscar("172.16.255.255"), 2)
+        self.assertEqual(self.ips.buscar("172.17.0.0"), 0)
+        self.assertEqual(self.ips.buscar("172.15.255.255"), 0)
+
+    def test_ipv6(self):
+        self.assertEqual(self.ips.buscar("2001:db8::5"), 8)
+        self.assertEqual(self.ips.buscar("2001:db9::5"), 0)
+
+    def test_valores_que_no_son_ips(self):
+        for valor in ("host-10.1.5.13", "10.1.5", "10.1.5.256", "10.1.5.13/32", "https://10.0.0.1:8080/", "d41d8cd98f00b204"):
+            self.assertEqual(self.ips.buscar(valor), 0, valor)
+
+
+class TestMotorReglas(unittest.TestCase):
+
+    def setUp(self):
+        self.motor = MotorReglas([
+            Regla("ip_prueba", "Security Test", ips=["10.1.5.13"]),
+            Regla("red_interna", "Escaneo interno", severidad_max="low", ips=["10.0.0.0/8"], tipos_asset=["host"]),
+            Regla("ransomware", "Ransomware", severidad_min="high", palabras=["ransomware"]),
+        ], SEVERIDADES)
+
+    def test_se_aplica_la_primera_regla_que_coincide(self):
+        incidente = _incidente(assets=[("host", "pc-1")], indicators=["10.1.5.13"])
+        self.assertEqual(self.motor.evaluar(incidente).nombre, "ip_prueba")
+        # La misma IP fuera de la regla exacta sólo cumple la de la red interna
+        incidente = _incidente(assets=[("host", "pc-1")], indicators=["10.9.9.9"])
+        self.assertEqual(self.motor.evaluar(incidente).nombre, "red_interna")
+
+    def test_todas_las_condiciones_deben_cumplirse(self):
+        # Severidad fuera del rango de 'red_interna'
+        self.assertIsNone(self.motor.evaluar(_incidente(severity="medium", assets=[("host", "pc-1")],
+                                                        indicators=["10.9.9.9"])))
+        # Sin asset de tipo 'host'
+        self.assertIsNone(self.motor.evaluar(_incidente(assets=[("user", "ana")], indicators=["10.9.9.9"])))
+        # Estado no incluido en los estados por defecto
+        self.assertIsNone(self.motor.evaluar(_incidente(status="closed", indicators=["10.1.5.13"])))
+
+    def test_candidatas_y_necesidad_de_detalles(self):
+        candidatas = self.motor.candidatas(_incidente(severity="critical", summary="Possible Ransomware activity"))
+        self.assertEqual(candidatas, 1 | 4)
+        self.assertTrue(self.motor.necesita_detalles(candidatas))
+        self.assertFalse(self.motor.necesita_detalles(4))
+        self.assertEqual(self.motor.evaluar(_incidente(severity="critical", summary="Possible Ransomware activity")).nombre,
+                         "ransomware")
+
+    def test_reiniciar_pone_a_cero_los_contadores(self):
+        self.motor.evaluar(_incidente(indicators=["10.1.5.13"]))
+        self.motor.evaluar(_incidente(indicators=["10.1.5.13"]))
+        self.assertEqual(self.motor.metricas()[0]["aciertos"], 2)
+        self.motor.reiniciar()
+        self.assertEqual(self.motor.evaluaciones, 0)
+        for metricas in self.motor.metricas():
+            self.assertEqual(metricas["aciertos"], 0)
+            self.assertEqual(metricas["tiempo"], 0.0)
+
+
+class TestCargarReglas(unittest.TestCase):
+
+    def _cargar(self, contenido):
+        with tempfile.NamedTemporaryFile("w", suffix=".ini", delete=False, encoding="utf-8") as f:
+            f.write(contenido)
+        self.addCleanup(os.remove, f.name)
+        return cargar_reglas(f.name, SEVERIDADES)
+
+    def test_la_prioridad_es_el_orden_del_archivo(self):
+        motor = self._cargar("[regla:amplia]\nips = 10.0.0.0/8\ncomentario = Amplia\n\n"
+                             "[regla:exacta]\nips = 10.1.5.13\ncomentario = Exacta\n")
+        self.assertEqual(motor.evaluar(_incidente(indicators=["10.1.5.13"])).comentario, "Amplia")
+
+    def test_rechaza_reglas_no_validas(self):
+        for contenido in ("[regla:sin_comentario]\nips = 10.1.5.13\n",
+                          "[regla:sin_condiciones]\ncomentario = Todo\n",
+                          "[regla:ip_mala]\nips = 10.1.5.300\ncomentario = X\n",
+                          "[regla:severidad_mala]\nseveridad_max = urgente\ncomentario = X\n"):
+            with self.assertRaises(ValueError, msg=contenido):
+                self._cargar(contenido)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+"""Comprobaciones de la cola de reintentos con [CIRCUITOS] y [DELTA]: nada se envía ni se procesa dos veces.
+
+Uso:
+    python -m unittest discover -s tests
+"""
+import collections
+import unittest
+
+from entorno import EntornoXdr, xdr2splunk
+
+
+class TestReintentosConDelta(EntornoXdr):
+
+    CONFIG = "[CIRCUITOS]\nhabilitado = true\n\n[DELTA]\nhabilitado = true\n"
+
+    def setUp(self):
+        super().setUp()
+        self.simular_api(20, severidades={"high": 1}, estados={"new": 1}, prob_prevenido=0)
+        self.ejecutar()
+        self.assertEqual(len(self.enviados), 20)
+        self.enviados.clear()
+
+    def _envios_por_incidente(self):
+        return collections.Counter(evento.get("incident_id") or evento.get("id") for evento in self.enviados)
+
+    def _actualizar(self, incidentes):
+        for incidente in incidentes:
+            self.detalles[incidente["id"]]["data"]["summary"] += " (actualizado)"
+
+    def test_evento_pendiente_de_un_incidente_del_listado_se_envia_una_vez(self):
+        self._actualizar(self.listado[:5])
+        self.splunk_caido = True
+        self.ejecutar()
+        self.assertEqual(len(xdr2splunk.obtener_cola_reintentos()), 5)
+
+        self.splunk_caido = False
+        self.ejecutar()
+        envios = self._envios_por_incidente()
+        self.assertEqual(sorted(envios), sorted(inc["id"] for inc in self.listado[:5]))
+        self.assertEqual(set(envios.values()), {1})
+        self.assertEqual(len(xdr2splunk.obtener_cola_reintentos()), 0)
+
+    def test_evento_pendiente_fuera_del_listado_se_reenvia_y_confirma_su_huella(self):
+        self._actualizar(self.listado[:3])
+        self.splunk_caido = True
+        self.ejecutar()
+
+        self.splunk_caido = False
+        completo = self.listado
+        self.listado = completo[3:]
+        self.ejecutar()
+        self.assertEqual(sorted(self._envios_por_incidente()), sorted(inc["id"] for inc in completo[:3]))
+
+        # La huella quedó confirmada con el reenvío: al volver al listado no hay nada nuevo que enviar
+        self.enviados.clear()
+        self.listado = completo
+        self.ejecutar()
+        self.assertEqual(self.enviados, [])
+
+
+class TestReintentosSinDelta(EntornoXdr):
+
+    CONFIG = "[CIRCUITOS]\nhabilitado = true\n"
+
+    def test_incidente_del_listado_no_se_envia_dos_veces(self):
+        self.simular_api(10, severidades={"critical": 1}, estados={"new": 1}, prob_prevenido=0)
+        self.splunk_caido = True
+        self.ejecutar()
+        self.assertEqual(len(xdr2splunk.obtener_cola_reintentos()), 10)
+
+        self.splunk_caido = False
+        self.ejecutar()
+        self.assertEqual(len(self.enviados), 10)
+        self.assertEqual(len({evento["id"] for evento in self.enviados}), 10)
+
+    def test_incidente_pendiente_del_listado_se_procesa_una_vez(self):
+        self.simular_api(10, severidades={"high": 1}, estados={"new": 1}, prob_prevenido=0, prob_ip_peligrosa=1,
+                         ips_peligrosas=xdr2splunk.IPS_PELIGROSAS)
+        detalles = self.detalles
+        self._parchear(get_incident_details=lambda token, incident_uuid: None)
+        self.ejecutar()
+        self.assertEqual(len(xdr2splunk.obtener_cola_reintentos()), 10)
+
+        self._parchear(get_incident_details=lambda token, incident_uuid: detalles[incident_uuid])
+        self.ejecutar()
+        self.assertEqual(len(self.enviados), 10)
+        self.assertEqual(sorted(self.cerrados), sorted(inc["id"] for inc in self.listado))
+
+
+if __name__ == "__main__":
+    unittest.main()
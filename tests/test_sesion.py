@@ -0,0 +1,77 @@
+"""Comprobaciones de la sesión XDR del receptor: renovación del token y reintento de los incidentes sin detalles.
+
+Uso:
+    python -m unittest discover -s tests
+"""
+import contextlib
+import time
+import unittest
+
+from entorno import EntornoXdr, xdr2splunk
+
+
+class TestSesionReceptor(EntornoXdr):
+
+    def setUp(self):
+        super().setUp()
+        self.simular_api(6, severidades={"high": 1}, estados={"new": 1}, prob_prevenido=0)
+        self.ids = [inc["id"] for inc in self.listado]
+        self.tokens = []
+        self.caducidad = 3600
+        self._parchear(_autenticar_xdr=self._autenticar, get_incident_details=self._detalles)
+        self.sesion = xdr2splunk.SesionXdr()
+        self.caducados = set()
+
+    def _autenticar(self):
+        self.tokens.append(f"token-{len(self.tokens) + 1}")
+        return self.tokens[-1], "prueba@example.com", time.time() + self.caducidad
+
+    def _detalles(self, token, incident_uuid):
+        # La API rechaza con un 401 los tokens marcados como caducados
+        if token in self.caducados:
+            xdr2splunk._comprobar_token(token, 401)
+            return {}
+        return self.detalles.get(incident_uuid, {})
+
+    def _procesar(self, ids):
+        with contextlib.redirect_stdout(self._salida):
+            token, user_email = self.sesion.obtener()
+            return xdr2splunk.procesar_incidentes_por_id(token, user_email, ids, self.sesion)
+
+    def test_renueva_el_token_rechazado_y_repite_la_consulta(self):
+        self._procesar(self.ids[:2])
+        self.caducados.add("token-1")
+        proceso = self._procesar(self.ids[2:])
+        self.assertEqual(self.tokens, ["token-1", "token-2"])
+        self.assertEqual(proceso.token, "token-2")
+        self.assertEqual(len(self.enviados), 6)
+        self.assertEqual(len(xdr2splunk.obtener_cola_reintentos()), 0)
+
+    def test_renueva_el_token_antes_de_que_caduque(self):
+        self._procesar(self.ids[:3])
+        self.assertEqual(self.tokens, ["token-1"])
+        # Faltan menos de 'margen' segundos para que caduque
+        self.sesion.expira = time.time() + 60
+        proceso = self._procesar(self.ids[3:])
+        self.assertEqual(self.tokens, ["token-1", "token-2"])
+        self.assertEqual(proceso.token, "token-2")
+        self.assertEqual(len(self.enviados), 6)
+
+    def test_los_incidentes_sin_detalles_quedan_pendientes(self):
+        perdido = self.ids[0]
+        del self.detalles[perdido]
+        self._procesar(self.ids)
+        self.assertEqual(len(self.enviados), 5)
+        pendientes = xdr2splunk.obtener_cola_reintentos().extraer_todas()
+        self.assertEqual([(e["tipo"], e["incident_uuid"]) for e in pendientes], [("incidente", perdido)])
+
+    def test_sin_sesion_se_omiten(self):
+        del self.detalles[self.ids[0]]
+        with contextlib.redirect_stdout(self._salida):
+            xdr2splunk.procesar_incidentes_por_id("token", "prueba@example.com", self.ids)
+        self.assertEqual(len(self.enviados), 5)
+        self.assertEqual(len(xdr2splunk.obtener_cola_reintentos()), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,11 @@
-import requests
 import configparser
 from datetime import datetime, timedelta, timezone
-import urllib3
 import json
+import threading
+import time
 
-# Desactiva advertencias por certificados SSL inválidos (sólo si es absolutamente necesario)
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+# 'requests' se importa en el primer uso (ver _http) para que importar este módulo sea inmediato
+requests = None
 
 # Lista de IPs consideradas peligrosas
 IPS_PELIGROSAS = ["172.16.11.40", "172.16.11.41", "10.1.5.13", "10.3.22.255"]
@@ -13,28 +13,410 @@ IPS_PELIGROSAS = ["172.16.11.40", "172.16.11.41", "10.1.5.13", "10.3.22.255"]
 # Texto por defecto del comentario para la función original
 ORIGINAL_COMMENT_TEXT = "Security Test"
 
-# Cargar configuración desde el archivo externo
-config = configparser.ConfigParser()
-try:
-    if not config.read("config.properties"):
-        print("❌ Error: No se pudo encontrar o leer el archivo 'config.properties'. Asegúrate de que exista y sea legible.")
-        exit()
-except configparser.Error as e:
-    print(f"❌ Error al parsear 'config.properties': {e}")
-    exit()
+class ConfiguracionPerezosa(configparser.ConfigParser):
+    """ConfigParser que lee el archivo de configuración en el primer acceso y no al importar el módulo."""
+
+    def __init__(self, ruta):
+        super().__init__()
+        self.ruta = ruta
+        self.cargada = False
+
+    def cargar(self):
+        """Lee el archivo de configuración. Devuelve True si se pudo leer y parsear."""
+        self.cargada = True
+        try:
+            if not self.read(self.ruta):
+                print(f"❌ Error: No se pudo encontrar o leer el archivo '{self.ruta}'. Asegúrate de que exista y sea legible.")
+                return False
+        except configparser.Error as e:
+            print(f"❌ Error al parsear '{self.ruta}': {e}")
+            return False
+        return True
+
+    # Todos los métodos de ConfigParser (get, getboolean, items, sections, [], in...) leen las secciones de
+    # '_sections', así que basta con cargar el archivo en el primer acceso a ese atributo
+    @property
+    def _sections(self):
+        if not self.__dict__.get("cargada", True):
+            self.cargar()
+        return self.__dict__["_secciones"]
+
+    @_sections.setter
+    def _sections(self, valor):
+        self.__dict__["_secciones"] = valor
+
+# Configuración desde el archivo externo (se lee en el primer acceso)
+config = ConfiguracionPerezosa("config.properties")
 
 # Constantes para el menú
 SEVERIDADES_ORDENADAS = ['informational', 'low', 'medium', 'high', 'critical']
+RANGO_SEVERIDAD = {s: i for i, s in enumerate(SEVERIDADES_ORDENADAS)}
 COMMENT_TEXT_GESTIONADO = "Security Test - gestionado por script"
 STATUS_CLOSE_HANDLED = "close - handled"
 
+# Destinos protegidos por circuit breaker
+CIRCUITO_SPLUNK = "splunk"
+CIRCUITO_DETALLES = "xdr_detalles"
+CIRCUITO_COMENTARIOS = "xdr_comentarios"
+CIRCUITO_CIERRE = "xdr_cierre"
+DESTINOS_CIRCUITO = (CIRCUITO_SPLUNK, CIRCUITO_DETALLES, CIRCUITO_COMENTARIOS, CIRCUITO_CIERRE)
+
+# Proyección de eventos compilada (se construye una sola vez, en el primer uso)
+_proyeccion = None
+_proyeccion_cargada = False
+
+# Registro de huellas de los incidentes enviados (modo delta)
+_registro_huellas = None
+_registro_huellas_cargado = False
+
+# Presupuesto de tiempo de la ejecución en curso (None = sin límite)
+_presupuesto_activo = None
+
+# Circuit breakers por destino y cola de reintentos del trabajo omitido (se crean en el primer uso)
+_circuitos = None
+_cola_reintentos = None
+
+# Enviador HEC adaptativo (conserva lo aprendido entre ejecuciones del mismo proceso)
+_enviador_hec = None
+_enviador_hec_cargado = False
+
+# Distribuidor a los destinos [DESTINO:nombre] de la sección [DESTINOS] (se crea en el primer uso)
+_distribuidor = None
+_distribuidor_cargado = False
+
+# Motor de reglas de cierre de la sección [REGLAS] (se compila en el primer uso)
+_motor_reglas = None
+_motor_reglas_cargado = False
+
+# Almacén local de incidentes de la sección [ALMACEN] (se abre en el primer uso)
+_almacen = None
+_almacen_cargado = False
+
 # --- FUNCIONES DE UTILIDAD ---
+def _http():
+    """Importa 'requests' en el primer uso y desactiva las advertencias por certificados SSL inválidos."""
+    global requests
+    if requests is None:
+        import requests as _requests
+        import urllib3
+        # Desactiva advertencias por certificados SSL inválidos (sólo si es absolutamente necesario)
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        requests = _requests
+    return requests
+
 def format_datetime(date):
     """Formatea un objeto datetime a la cadena ISO 8601 requerida por la API."""
     return date.astimezone(timezone.utc).isoformat(timespec='seconds').replace("+00:00", "Z")
 
+def _timeout(por_defecto):
+    """Timeout de una petición: el valor por defecto, acotado por el presupuesto de la ejecución en curso."""
+    if _presupuesto_activo is None:
+        return por_defecto
+    return _presupuesto_activo.timeout(por_defecto)
+
+def _presupuesto_agotado():
+    return _presupuesto_activo is not None and _presupuesto_activo.expirado()
+
+def obtener_config_presupuesto():
+    """Devuelve (segundos, timeout_minimo, ruta_checkpoint) de la sección [PRESUPUESTO] o None si está deshabilitada."""
+    if not config.has_section("PRESUPUESTO") or not config["PRESUPUESTO"].getboolean("habilitado", fallback=False):
+        return None
+    seccion = config["PRESUPUESTO"]
+    try:
+        return (seccion.getfloat("segundos", fallback=3000),
+                seccion.getfloat("timeout_minimo", fallback=1.0),
+                seccion.get("ruta_checkpoint", fallback="incidentes_diferidos.json"))
+    except ValueError as e:
+        print(f"❌ Error en la sección [PRESUPUESTO] del archivo 'config.properties': {e}. Se ejecutará sin límite de tiempo.")
+        return None
+
+def obtener_config_prioridad():
+    """Devuelve (envejecimiento, rango desde el que se vacía el búfer HEC) de la sección [PRIORIDAD] o None si está deshabilitada."""
+    if not config.has_section("PRIORIDAD") or not config["PRIORIDAD"].getboolean("habilitado", fallback=False):
+        return None
+    seccion = config["PRIORIDAD"]
+    vaciar_hec_desde = seccion.get("vaciar_hec_desde", fallback="high").strip().lower()
+    if vaciar_hec_desde not in RANGO_SEVERIDAD:
+        print(f"❌ Error en la sección [PRIORIDAD] del archivo 'config.properties': severidad '{vaciar_hec_desde}' no válida. Se usa 'high'.")
+        vaciar_hec_desde = "high"
+    try:
+        envejecimiento = seccion.getfloat("envejecimiento_segundos", fallback=30.0)
+    except ValueError as e:
+        print(f"❌ Error en la sección [PRIORIDAD] del archivo 'config.properties': {e}. Se usan 30 segundos.")
+        envejecimiento = 30.0
+    return envejecimiento, RANGO_SEVERIDAD[vaciar_hec_desde]
+
+def _rango_contexto(ctx):
+    return RANGO_SEVERIDAD.get(ctx["severity"], -1)
+
+def crear_pipeline(proceso):
+    """Construye el pipeline por etapas de la sección [PIPELINE] sobre un ProcesoIngesta (None si está deshabilitado)."""
+    if not config.has_section("PIPELINE") or not config["PIPELINE"].getboolean("habilitado", fallback=False):
+        return None
+    from pipeline import Etapa, Pipeline
+    seccion = config["PIPELINE"]
+    # Con [PRIORIDAD], las colas de detalles y de envío a Splunk atienden primero las severidades más altas
+    config_prioridad = obtener_config_prioridad()
+    prioridad = _rango_contexto if config_prioridad else None
+    try:
+        etapas = [
+            Etapa("filtrar", proceso.preparar),
+            Etapa("detalles", proceso.obtener_detalles, seccion.getint("concurrencia_detalles", fallback=4), prioridad=prioridad),
+            Etapa("evaluar", proceso.evaluar),
+            Etapa("splunk", proceso.enviar, seccion.getint("concurrencia_splunk", fallback=2), prioridad=prioridad),
+            # Lo que llega a 'cierre' ya se envió a Splunk: al agotarse el presupuesto no se difiere (se reenviaría),
+            # sino que su comentario y cierre quedan en la cola de reintentos
+            Etapa("cierre", proceso.cerrar, seccion.getint("concurrencia_cierre", fallback=2), al_detener=proceso.aplazar_cierre),
+        ]
+        return Pipeline(etapas, capacidad=seccion.getint("capacidad_cola", fallback=50),
+                        intervalo_informe=seccion.getfloat("intervalo_informe", fallback=10),
+                        envejecimiento=config_prioridad[0] if config_prioridad else 30.0)
+    except ValueError as e:
+        print(f"❌ Error en la sección [PIPELINE] del archivo 'config.properties': {e}. Se procesará secuencialmente.")
+        return None
+
+def obtener_proyeccion():
+    """Devuelve la proyección de eventos de la sección [PROYECCION], compilada una sola vez (None si está deshabilitada)."""
+    global _proyeccion, _proyeccion_cargada
+    if not _proyeccion_cargada:
+        from proyeccion import compilar_proyeccion
+        seccion = config["PROYECCION"] if config.has_section("PROYECCION") else None
+        try:
+            _proyeccion = compilar_proyeccion(seccion)
+        except ValueError as e:
+            print(f"❌ Error en la sección [PROYECCION] del archivo 'config.properties': {e}. Se enviarán los eventos completos.")
+            _proyeccion = None
+        _proyeccion_cargada = True
+    return _proyeccion
+
+def obtener_acciones():
+    """Devuelve las acciones habilitadas en la sección [ACCIONES] (por defecto, todas)."""
+    acciones = {"enviar_splunk": True, "cerrar_por_ip": True}
+    if config.has_section("ACCIONES"):
+        seccion = config["ACCIONES"]
+        for accion in acciones:
+            try:
+                acciones[accion] = seccion.getboolean(accion, fallback=True)
+            except ValueError as e:
+                print(f"❌ Error en la sección [ACCIONES] del archivo 'config.properties': {e}. Se mantiene '{accion}' habilitada.")
+    return acciones
+
+def obtener_registro_huellas():
+    """Devuelve el registro de huellas de la sección [DELTA] (None si el modo delta está deshabilitado)."""
+    global _registro_huellas, _registro_huellas_cargado
+    if _registro_huellas_cargado:
+        return _registro_huellas
+    _registro_huellas_cargado = True
+    if not config.has_section("DELTA") or not config["DELTA"].getboolean("habilitado", fallback=False):
+        return None
+    from delta import RegistroHuellas
+    seccion = config["DELTA"]
+    try:
+        _registro_huellas = RegistroHuellas(
+            seccion.get("ruta", fallback="huellas_incidentes.json"),
+            listas=[v.strip() for v in seccion.get("listas", fallback="assets, indicators").split(",") if v.strip()],
+            ignorar=[v.strip() for v in seccion.get("ignorar", fallback="updated_at").split(",") if v.strip()],
+            retencion_dias=seccion.getint("retencion_dias", fallback=30),
+        )
+    except ValueError as e:
+        print(f"❌ Error en la sección [DELTA] del archivo 'config.properties': {e}. Se enviarán eventos completos.")
+    return _registro_huellas
+
+def obtener_motor_reglas():
+    """Devuelve el motor compilado de las reglas de cierre de la sección [REGLAS] (None si está deshabilitado)."""
+    global _motor_reglas, _motor_reglas_cargado
+    if _motor_reglas_cargado:
+        return _motor_reglas
+    _motor_reglas_cargado = True
+    if not config.has_section("REGLAS") or not config["REGLAS"].getboolean("habilitado", fallback=False):
+        return None
+    from reglas import cargar_reglas
+    ruta = config["REGLAS"].get("ruta", fallback="reglas_cierre.ini")
+    try:
+        _motor_reglas = cargar_reglas(ruta, SEVERIDADES_ORDENADAS)
+        print(f"📏 {len(_motor_reglas.reglas)} reglas de cierre cargadas desde '{ruta}'.")
+    except ValueError as e:
+        print(f"❌ Error en las reglas de cierre: {e}. Se usará la comprobación de IPs peligrosas.")
+    return _motor_reglas
+
+def obtener_almacen():
+    """Devuelve el almacén local de incidentes de la sección [ALMACEN] (None si está deshabilitado)."""
+    global _almacen, _almacen_cargado
+    if _almacen_cargado:
+        return _almacen
+    _almacen_cargado = True
+    if not config.has_section("ALMACEN") or not config["ALMACEN"].getboolean("habilitado", fallback=False):
+        return None
+    import sqlite3
+    from almacen import AlmacenIncidentes
+    ruta = config["ALMACEN"].get("ruta", fallback="incidentes.db")
+    try:
+        _almacen = AlmacenIncidentes(ruta, SEVERIDADES_ORDENADAS)
+    except sqlite3.Error as e:
+        print(f"❌ No se pudo abrir el almacén local de incidentes '{ruta}': {e}. Se consultará siempre la API.")
+    return _almacen
+
+def _consultar_almacen():
+    """Pregunta si se usa el almacén local o se refresca desde la API. Devuelve el almacén o None para ir a la API."""
+    almacen = obtener_almacen()
+    if almacen is None:
+        return None
+    origen = input("Origen de los datos: [L] almacén local / [R] refrescar desde la API (L/r): ").strip().lower()
+    return None if origen == 'r' else almacen
+
+def obtener_circuito(nombre):
+    """Devuelve el circuit breaker del destino 'nombre' (None si [CIRCUITOS] está deshabilitado)."""
+    global _circuitos
+    if _circuitos is None:
+        _circuitos = {}
+        if config.has_section("CIRCUITOS") and config["CIRCUITOS"].getboolean("habilitado", fallback=False):
+            from circuitos import CircuitBreaker
+            seccion = config["CIRCUITOS"]
+            try:
+                umbral = seccion.getint("umbral_fallos", fallback=5)
+                apertura = seccion.getfloat("tiempo_apertura", fallback=60.0)
+            except ValueError as e:
+                print(f"❌ Error en la sección [CIRCUITOS] del archivo 'config.properties': {e}. Se usan los valores por defecto.")
+                umbral, apertura = 5, 60.0
+            for destino in DESTINOS_CIRCUITO:
+                _circuitos[destino] = CircuitBreaker(destino, umbral_fallos=umbral, tiempo_apertura=apertura)
+    return _circuitos.get(nombre)
+
+def obtener_cola_reintentos():
+    """Devuelve la cola persistente del trabajo omitido por circuitos abiertos."""
+    global _cola_reintentos
+    if _cola_reintentos is None:
+        from circuitos import ColaReintentos
+        ruta = "reintentos_pendientes.json"
+        if config.has_section("CIRCUITOS"):
+            ruta = config["CIRCUITOS"].get("ruta_reintentos", fallback=ruta)
+        _cola_reintentos = ColaReintentos(ruta)
+    return _cola_reintentos
+
+def _guardar_cola_reintentos():
+    """Guarda en disco la cola de reintentos, si se ha usado ('encolar' sólo guarda cada pocos segundos)."""
+    if _cola_reintentos is not None:
+        _cola_reintentos.guardar()
+
+def _circuito_rechaza(nombre, descripcion):
+    """Comprueba el circuito del destino. Devuelve True (y lo informa) si la llamada debe omitirse."""
+    circuito = obtener_circuito(nombre)
+    if circuito and not circuito.permitir():
+        print(f"⛔ Circuito '{nombre}' abierto: se omite {descripcion} y se deja para reintentar.")
+        return True
+    return False
+
+def _registrar_en_circuito(nombre, status_code=None):
+    """Registra en el circuito del destino el código HTTP obtenido (None = error de conexión)."""
+    circuito = obtener_circuito(nombre)
+    if circuito:
+        if status_code is None:
+            circuito.registrar_fallo()
+        else:
+            circuito.registrar_respuesta(status_code)
+
+def _crear_enviador_hec(seccion, url, token, circuito):
+    """Crea un EnviadorHEC con los parámetros AIMD de 'seccion' (lote_*, concurrencia_*, latencia_objetivo...)."""
+    _http()
+    from hec_adaptativo import ControladorAIMD, EnviadorHEC
+    controlador = ControladorAIMD(
+        lote_inicial=seccion.getint("lote_inicial", fallback=50),
+        lote_min=seccion.getint("lote_min", fallback=1),
+        lote_max=seccion.getint("lote_max", fallback=1000),
+        incremento_lote=seccion.getint("incremento_lote", fallback=10),
+        concurrencia_inicial=seccion.getint("concurrencia_inicial", fallback=2),
+        concurrencia_max=seccion.getint("concurrencia_max", fallback=8),
+        latencia_objetivo=seccion.getfloat("latencia_objetivo", fallback=2.0),
+    )
+    return EnviadorHEC(
+        url, token, controlador,
+        timeout=lambda t=seccion.getfloat("timeout", fallback=10): _timeout(t),
+        max_reintentos=seccion.getint("max_reintentos", fallback=3),
+        circuito=circuito,
+        max_bytes_lote=seccion.getint("max_bytes_lote", fallback=1000000),
+    )
+
+def obtener_enviador_hec():
+    """Devuelve el enviador HEC adaptativo de la sección [HEC_ADAPTATIVO] (None si está deshabilitado)."""
+    global _enviador_hec, _enviador_hec_cargado
+    if _enviador_hec_cargado:
+        return _enviador_hec
+    _enviador_hec_cargado = True
+    if not config.has_section("HEC_ADAPTATIVO") or not config["HEC_ADAPTATIVO"].getboolean("habilitado", fallback=False):
+        return None
+    try:
+        _enviador_hec = _crear_enviador_hec(config["HEC_ADAPTATIVO"], config["SPLUNK"]["url"], config["SPLUNK"]["token"],
+                                            obtener_circuito(CIRCUITO_SPLUNK))
+    except KeyError as e:
+        print(f"❌ Error: Falta la clave {e} en la sección [SPLUNK] del archivo 'config.properties'.")
+    except ValueError as e:
+        print(f"❌ Error en la sección [HEC_ADAPTATIVO] del archivo 'config.properties': {e}. Se usará el envío individual.")
+    return _enviador_hec
+
+def obtener_distribuidor():
+    """Devuelve el distribuidor a los destinos [DESTINO:nombre] (None si [DESTINOS] está deshabilitado).
+
+    Cada destino 'hec' usa la url/token de su sección (por defecto, los de [SPLUNK]) y sus propios parámetros
+    AIMD (lote_*, concurrencia_*, timeout...); los destinos 'ndjson' escriben en 'ruta'. 'severidades' limita qué eventos recibe.
+    Los eventos que un destino no pudo entregar se guardan en su propio fichero 'ruta_pendientes'.
+    """
+    global _distribuidor, _distribuidor_cargado
+    if _distribuidor_cargado:
+        return _distribuidor
+    _distribuidor_cargado = True
+    if not config.has_section("DESTINOS") or not config["DESTINOS"].getboolean("habilitado", fallback=False):
+        return None
+    from destinos import DestinoHEC, DestinoNDJSON, Distribuidor, PendientesDestino
+    destinos = []
+    for nombre_seccion in config.sections():
+        if not nombre_seccion.startswith("DESTINO:"):
+            continue
+        nombre = nombre_seccion.split(":", 1)[1].strip()
+        seccion = config[nombre_seccion]
+        try:
+            comunes = {
+                "severidades": [v.strip().lower() for v in seccion.get("severidades", fallback="").split(",") if v.strip()],
+                "capacidad": seccion.getint("capacidad_cola", fallback=10000),
+                "espera_lote": seccion.getfloat("espera_lote", fallback=0.2),
+                "pendientes": PendientesDestino(seccion.get("ruta_pendientes", fallback=f"pendientes_{nombre}.ndjson"),
+                                                seccion.getint("max_bytes_pendientes", fallback=100 * 1024 * 1024)),
+                "max_intentos": seccion.getint("max_intentos", fallback=5),
+            }
+            tipo = seccion.get("tipo", fallback="hec").strip().lower()
+            if tipo == "hec":
+                # Cada destino HEC tiene su propio circuit breaker, con los parámetros de [CIRCUITOS]
+                plantilla = obtener_circuito(CIRCUITO_SPLUNK)
+                circuito = None
+                if plantilla is not None:
+                    from circuitos import CircuitBreaker
+                    circuito = CircuitBreaker(f"destino_{nombre}", plantilla.umbral_fallos, plantilla.tiempo_apertura)
+                    _circuitos[circuito.nombre] = circuito
+                enviador = _crear_enviador_hec(seccion, seccion.get("url", fallback=config["SPLUNK"]["url"]),
+                                               seccion.get("token", fallback=config["SPLUNK"]["token"]), circuito)
+                destinos.append(DestinoHEC(nombre, enviador, **comunes))
+            elif tipo == "ndjson":
+                destinos.append(DestinoNDJSON(nombre, seccion.get("ruta", fallback=f"{nombre}.ndjson"),
+                                              lote=seccion.getint("lote", fallback=500), **comunes))
+            else:
+                print(f"❌ Error en la sección [{nombre_seccion}] del archivo 'config.properties': tipo '{tipo}' no válido (hec o ndjson).")
+        except KeyError as e:
+            print(f"❌ Error: Falta la clave {e} para el destino '{nombre}' en el archivo 'config.properties'.")
+        except ValueError as e:
+            print(f"❌ Error en la sección [{nombre_seccion}] del archivo 'config.properties': {e}. Se omite el destino.")
+    if not destinos:
+        print("⚠️ [DESTINOS] está habilitado pero no hay ninguna sección [DESTINO:nombre] válida. Se usará el envío a [SPLUNK].")
+        return None
+    _distribuidor = Distribuidor(destinos)
+    return _distribuidor
+
 def send_to_splunk(event):
-    """Envía un evento a Splunk."""
+    """Envía un evento a Splunk. Devuelve None si se omitió por tener el circuito abierto."""
+    from serializacion import codificar_evento_hec
+    return enviar_cuerpo_a_splunk(codificar_evento_hec(event))
+
+def enviar_cuerpo_a_splunk(cuerpo):
+    """Envía a Splunk un evento ya serializado con su sobre HEC (bytes) tal cual. Devuelve None si se omitió por tener el circuito abierto."""
+    _http()
     try:
         splunk_url = config["SPLUNK"]["url"]
         splunk_token = config["SPLUNK"]["token"]
@@ -46,9 +428,11 @@ def send_to_splunk(event):
         "Authorization": f"Splunk {splunk_token}",
         "Content-Type": "application/json"
     }
-    payload = {"event": event}
+    if _circuito_rechaza(CIRCUITO_SPLUNK, "el envío a Splunk"):
+        return None
     try:
-        response = requests.post(splunk_url, json=payload, headers=headers, verify=False, timeout=10)
+        response = requests.post(splunk_url, data=cuerpo, headers=headers, verify=False, timeout=_timeout(10))
+        _registrar_en_circuito(CIRCUITO_SPLUNK, response.status_code)
         if response.status_code == 200:
             print("✅ Evento enviado a Splunk con éxito.")
             return True
@@ -56,34 +440,54 @@ def send_to_splunk(event):
             print(f"❌ Error al enviar a Splunk: {response.status_code} - {response.text}")
             return False
     except requests.exceptions.RequestException as e:
+        _registrar_en_circuito(CIRCUITO_SPLUNK)
         print(f"❌ Error de conexión con Splunk: {e}")
         return False
 
+# Tokens XDR que la API ha rechazado (401), para que la sesión del receptor los renueve
+_tokens_rechazados = set()
+
+def _comprobar_token(token, status_code):
+    """Anota el token si la API lo ha rechazado por no ser válido o haber caducado."""
+    if status_code == 401:
+        _tokens_rechazados.add(token)
+
 def get_incident_details(token, incident_uuid):
-    """Obtiene los detalles de un incidente específico por su UUID."""
+    """Obtiene los detalles de un incidente específico por su UUID. Devuelve None si se omitió por tener el circuito abierto."""
+    _http()
     url = f"https://cloudinfra-gw.portal.checkpoint.com/app/xdr/api/xdr/v1/incidents/{incident_uuid}"
     headers = {"accept": "application/json", "Authorization": f"Bearer {token}"}
+    if _circuito_rechaza(CIRCUITO_DETALLES, f"la consulta de detalles del incidente {incident_uuid}"):
+        return None
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = requests.get(url, headers=headers, timeout=_timeout(10))
+        _registrar_en_circuito(CIRCUITO_DETALLES, response.status_code)
+        _comprobar_token(token, response.status_code)
         if response.status_code == 200:
             return response.json()
         else:
             print(f"❌ Error al obtener detalles del incidente {incident_uuid}: {response.status_code} - {response.text}")
             return {}
     except requests.exceptions.RequestException as e:
+        _registrar_en_circuito(CIRCUITO_DETALLES)
         print(f"❌ Error de conexión al obtener detalles del incidente {incident_uuid}: {e}")
         return {}
 
 def comentar_ticket(token, incident_display_id, comment_text, user_email):
-    """Añade un comentario a un ticket."""
+    """Añade un comentario a un ticket. Devuelve None si se omitió por tener el circuito abierto."""
+    _http()
     url = f"https://cloudinfra-gw.portal.checkpoint.com/app/xdr/api/xdr/v1/incidents/{incident_display_id}/comments"
     headers = {"accept": "application/json", "Authorization": f"Bearer {token}"}
     payload = {
         "text": comment_text,
         "userEmail": user_email
     }
+    if _circuito_rechaza(CIRCUITO_COMENTARIOS, f"el comentario del incidente {incident_display_id}"):
+        return None
     try:
-        response = requests.post(url, json=payload, headers=headers, timeout=10)
+        response = requests.post(url, json=payload, headers=headers, timeout=_timeout(10))
+        _registrar_en_circuito(CIRCUITO_COMENTARIOS, response.status_code)
+        _comprobar_token(token, response.status_code)
         if response.status_code in [200, 201]:
             print(f"📝 Comentario añadido al incidente con Display ID {incident_display_id}.")
             return True
@@ -91,16 +495,22 @@ def comentar_ticket(token, incident_display_id, comment_text, user_email):
             print(f"⚠️ Error al añadir comentario al incidente con Display ID {incident_display_id}: {response.status_code} - {response.text}")
             return False
     except requests.exceptions.RequestException as e:
+        _registrar_en_circuito(CIRCUITO_COMENTARIOS)
         print(f"❌ Error de conexión al añadir comentario al incidente {incident_display_id}: {e}")
         return False
 
 def close_ticket(token, incident_uuid):
-    """Cierra un ticket por su UUID."""
+    """Cierra un ticket por su UUID. Devuelve None si se omitió por tener el circuito abierto."""
+    _http()
     url = f"https://cloudinfra-gw.portal.checkpoint.com/app/xdr/api/xdr/v1/incidents/{incident_uuid}"
     headers = {"accept": "application/json", "Authorization": f"Bearer {token}"}
     payload = {"status": STATUS_CLOSE_HANDLED, "followUp": False} 
+    if _circuito_rechaza(CIRCUITO_CIERRE, f"el cierre del incidente {incident_uuid}"):
+        return None
     try:
-        response = requests.put(url, json=payload, headers=headers, timeout=10)
+        response = requests.put(url, json=payload, headers=headers, timeout=_timeout(10))
+        _registrar_en_circuito(CIRCUITO_CIERRE, response.status_code)
+        _comprobar_token(token, response.status_code)
         if response.status_code == 200:
             print(f"✅ Incidente {incident_uuid} cerrado correctamente.")
             return True
@@ -108,6 +518,7 @@ def close_ticket(token, incident_uuid):
             print(f"❌ Error al cerrar incidente {incident_uuid}: {response.status_code} - {response.text}")
             return False
     except requests.exceptions.RequestException as e:
+        _registrar_en_circuito(CIRCUITO_CIERRE)
         print(f"❌ Error de conexión al cerrar incidente {incident_uuid}: {e}")
         return False
 
@@ -120,6 +531,23 @@ def ip_in_assets_indicators(data, ip_list):
             return True
     return False
 
+def filtrar_por_severidad(incidentes, minima=None, maxima=None, estados=None):
+    """Devuelve los incidentes cuya severidad está entre 'minima' y 'maxima' (incluidas) y, si se indica, en 'estados'.
+
+    Los incidentes sin una severidad conocida se descartan.
+    """
+    desde = RANGO_SEVERIDAD[minima] if minima else 0
+    hasta = RANGO_SEVERIDAD[maxima] if maxima else len(SEVERIDADES_ORDENADAS) - 1
+    resultado = []
+    for inc in incidentes:
+        rango = RANGO_SEVERIDAD.get(inc.get("severity", "").lower())
+        if rango is None or not desde <= rango <= hasta:
+            continue
+        if estados is not None and inc.get("status", "").lower() not in estados:
+            continue
+        resultado.append(inc)
+    return resultado
+
 def imprimir_info_basica_incidente(incident):
     """Imprime la información básica de un incidente en un formato legible."""
     display_id = incident.get("display_id", "N/A")
@@ -133,6 +561,12 @@ def imprimir_info_basica_incidente(incident):
 # --- AUTENTICACIÓN ---
 def autenticar_xdr():
     """Realiza la autenticación y devuelve el token y user_email."""
+    token, user_email, _ = _autenticar_xdr()
+    return token, user_email
+
+def _autenticar_xdr():
+    """Realiza la autenticación y devuelve el token, el user_email y el 'expires' indicado por la API."""
+    _http()
     print("🔐 Realizando autenticación XDR...")
     try:
         auth_url = config["XDR"]["auth_url"]
@@ -142,7 +576,7 @@ def autenticar_xdr():
         user_email = config["XDR"]["userEmail"]
     except KeyError as e:
         print(f"❌ Error: Falta la clave {e} en la sección [XDR] del archivo 'config.properties'.")
-        return None, None
+        return None, None, None
 
     auth_headers = {"accept": "application/json", "Content-Type": "application/json"}
     auth_data = {
@@ -156,24 +590,65 @@ def autenticar_xdr():
         if auth_response.status_code != 200:
             print("❌ Error en la autenticación XDR:", auth_response.status_code)
             print("🔴 Respuesta:", auth_response.text)
-            return None, None
+            return None, None, None
 
         auth_json = auth_response.json()
         token = auth_json.get("data", {}).get("token")
         expires = auth_json.get("data", {}).get("expires")
         if not token:
             print("❌ Error: No se pudo obtener el token de la respuesta de autenticación.")
-            return None, None
+            return None, None, None
         
         print(f"✅ Token obtenido correctamente. Expira el: {expires}")
-        return token, user_email
+        return token, user_email, expires
     except requests.exceptions.RequestException as e:
         print(f"❌ Error de conexión durante la autenticación XDR: {e}")
-        return None, None
+        return None, None, None
+
+def _marca_expiracion(expires):
+    """Convierte el 'expires' de la autenticación (ISO 8601 o epoch en s/ms) en epoch, o None si no se reconoce."""
+    if isinstance(expires, (int, float)) and not isinstance(expires, bool):
+        return expires / 1000 if expires > 1e11 else float(expires)
+    if isinstance(expires, str) and expires.strip():
+        try:
+            fecha = datetime.fromisoformat(expires.strip().replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        if fecha.tzinfo is None:
+            fecha = fecha.replace(tzinfo=timezone.utc)
+        return fecha.timestamp()
+    return None
+
+class SesionXdr:
+    """Token XDR de un proceso de larga duración (el receptor).
+
+    'obtener' devuelve el token vigente y lo renueva antes de que caduque ('margen' segundos antes del
+    'expires' de la autenticación) o si la API lo ha rechazado con un 401.
+    """
+
+    def __init__(self, margen=300):
+        self.margen = margen
+        self.token = None
+        self.user_email = None
+        self.expira = None
+
+    def caducado(self):
+        return (self.token is None or self.token in _tokens_rechazados
+                or (self.expira is not None and time.time() >= self.expira - self.margen))
+
+    def obtener(self):
+        """Devuelve (token, user_email), renovándolos si hace falta. Si la renovación falla se mantiene el anterior."""
+        if self.caducado():
+            token, user_email, expires = _autenticar_xdr()
+            if token:
+                _tokens_rechazados.discard(self.token)
+                self.token, self.user_email, self.expira = token, user_email, _marca_expiracion(expires)
+        return self.token, self.user_email
 
 # --- OBTENCIÓN DE INCIDENTES ---
 def obtener_incidentes_api(token, hours_ago, limit=10000, offset=0, status_filter=None):
     """Obtiene una lista de incidentes desde la API XDR."""
+    _http()
     if not token:
         return []
 
@@ -199,7 +674,7 @@ def obtener_incidentes_api(token, hours_ago, limit=10000, offset=0, status_filte
     headers = {"accept": "application/json", "Authorization": f"Bearer {token}"}
     
     try:
-        response = requests.get(base_url, headers=headers, params=params, timeout=20)
+        response = requests.get(base_url, headers=headers, params=params, timeout=_timeout(20))
         print(f"📡 Código de respuesta incidentes: {response.status_code}")
         if response.status_code == 200:
             response_json = response.json()
@@ -229,24 +704,25 @@ def opcion_filtrar_por_severidad(token, global_hours_ago):
         print(f"❌ Severidad '{severidad_minima_str}' no válida. Inténtalo de nuevo.")
         return
 
-    severidad_minima_idx = SEVERIDADES_ORDENADAS.index(severidad_minima_str)
-    
-    incidentes = obtener_incidentes_api(token, hours_ago=global_hours_ago)
+    almacen = _consultar_almacen()
+    if almacen:
+        desde = format_datetime(datetime.now(timezone.utc) - timedelta(hours=global_hours_ago))
+        incidentes = almacen.por_severidad_minima(severidad_minima_str, desde=desde)
+        print(f"🗄️ {len(incidentes)} incidentes obtenidos del almacén local (usa 'R' para refrescar desde la API).")
+    else:
+        incidentes = obtener_incidentes_api(token, hours_ago=global_hours_ago)
+        if incidentes and obtener_almacen():
+            obtener_almacen().sincronizar_listado(incidentes)
 
     if not incidentes:
         print("ℹ️ No se encontraron incidentes para filtrar en el período especificado.")
         return
 
     print(f"\n🔎 Incidentes con severidad '{severidad_minima_str.capitalize()}' o superior:")
-    count = 0
-    for inc in incidentes:
-        current_severity_str = inc.get("severity", "").lower()
-        if current_severity_str in SEVERIDADES_ORDENADAS:
-            current_severity_idx = SEVERIDADES_ORDENADAS.index(current_severity_str)
-            if current_severity_idx >= severidad_minima_idx:
-                imprimir_info_basica_incidente(inc)
-                count += 1
-    if count == 0:
+    seleccionados = filtrar_por_severidad(incidentes, minima=severidad_minima_str)
+    for inc in seleccionados:
+        imprimir_info_basica_incidente(inc)
+    if not seleccionados:
         print(f"ℹ️ No se encontraron incidentes con severidad '{severidad_minima_str.capitalize()}' o superior en el período especificado.")
 
 def opcion_cerrar_tickets_por_severidad(token, user_email, global_hours_ago):
@@ -268,8 +744,6 @@ def opcion_cerrar_tickets_por_severidad(token, user_email, global_hours_ago):
         print("🚫 Operación cancelada.")
         return
 
-    severidad_maxima_idx = SEVERIDADES_ORDENADAS.index(severidad_maxima_str)
-    
     incidentes_abiertos = obtener_incidentes_api(token, hours_ago=global_hours_ago, status_filter=['new', 'in progress'], limit=10000)
 
     if not incidentes_abiertos:
@@ -278,31 +752,31 @@ def opcion_cerrar_tickets_por_severidad(token, user_email, global_hours_ago):
 
     print(f"\n🛠️ Procesando cierre de incidentes hasta severidad '{severidad_maxima_str.capitalize()}'...")
     cerrados_count = 0
-    for inc in incidentes_abiertos:
+    for inc in filtrar_por_severidad(incidentes_abiertos, maxima=severidad_maxima_str, estados=["new", "in progress"]):
         current_severity_str = inc.get("severity", "").lower()
-        status = inc.get("status", "").lower()
+        incident_uuid = inc.get("id")
+        incident_display_id = inc.get("display_id")
         
-        if current_severity_str in SEVERIDADES_ORDENADAS and status in ["new", "in progress"]:
-            current_severity_idx = SEVERIDADES_ORDENADAS.index(current_severity_str)
-            if current_severity_idx <= severidad_maxima_idx:
-                incident_uuid = inc.get("id")
-                incident_display_id = inc.get("display_id")
-                
-                if not incident_uuid or not incident_display_id:
-                    print(f"⏭️ Omitiendo incidente por falta de ID o Display ID: {inc.get('summary')}")
-                    continue
+        if not incident_uuid or not incident_display_id:
+            print(f"⏭️ Omitiendo incidente por falta de ID o Display ID: {inc.get('summary')}")
+            continue
 
-                print(f"➡️  Procesando Display ID: {incident_display_id}, Severidad: {current_severity_str.capitalize()}")
-                
-                comentado = comentar_ticket(token, incident_display_id, COMMENT_TEXT_GESTIONADO, user_email)
-                if comentado:
-                    cerrado = close_ticket(token, incident_uuid)
-                    if cerrado:
-                        cerrados_count += 1
-                else:
-                    print(f"⚠️ No se pudo comentar el ticket {incident_display_id}, no se procederá a cerrar.")
-                print("-" * 30)
-                
+        print(f"➡️  Procesando Display ID: {incident_display_id}, Severidad: {current_severity_str.capitalize()}")
+        
+        comentado = comentar_ticket(token, incident_display_id, COMMENT_TEXT_GESTIONADO, user_email)
+        if comentado is None:
+            _encolar_cierre(incident_uuid, incident_display_id, COMMENT_TEXT_GESTIONADO, user_email, comentado=False)
+        elif comentado:
+            cerrado = close_ticket(token, incident_uuid)
+            if cerrado is None:
+                _encolar_cierre(incident_uuid, incident_display_id, COMMENT_TEXT_GESTIONADO, user_email, comentado=True)
+            elif cerrado:
+                cerrados_count += 1
+        else:
+            print(f"⚠️ No se pudo comentar el ticket {incident_display_id}, no se procederá a cerrar.")
+        print("-" * 30)
+        
+    _guardar_cola_reintentos()
     print(f"\n✅ Operación completada. Se procesaron para cierre {cerrados_count} tickets.")
 
 def opcion_cerrar_tickets_por_ip(token, user_email, global_hours_ago):
@@ -336,6 +810,9 @@ def opcion_cerrar_tickets_por_ip(token, user_email, global_hours_ago):
                 continue
 
             incident_details = get_incident_details(token, incident_uuid)
+            if incident_details is None:
+                obtener_cola_reintentos().encolar("incidente", incident_uuid=incident_uuid)
+                continue
             if not incident_details or not incident_details.get("data"):
                 print(f"⚠️ No se pudieron obtener detalles para {incident_display_id}, se omite su procesamiento.")
                 continue
@@ -346,16 +823,98 @@ def opcion_cerrar_tickets_por_ip(token, user_email, global_hours_ago):
                 print(f"➡️  Procesando Display ID: {incident_display_id}, IP Peligrosa Detectada: SÍ")
                 
                 comentado = comentar_ticket(token, incident_display_id, "Security Test", user_email)
-                if comentado:
+                if comentado is None:
+                    _encolar_cierre(incident_uuid, incident_display_id, "Security Test", user_email, comentado=False)
+                elif comentado:
                     cerrado = close_ticket(token, incident_uuid)
-                    if cerrado:
+                    if cerrado is None:
+                        _encolar_cierre(incident_uuid, incident_display_id, "Security Test", user_email, comentado=True)
+                    elif cerrado:
                         cerrados_count += 1
                 else:
                     print(f"⚠️ No se pudo comentar el ticket {incident_display_id}, no se procederá a cerrar.")
                 print("-" * 30)
                 
+    _guardar_cola_reintentos()
     print(f"\n✅ Operación completada. Se procesaron para cierre {cerrados_count} tickets con IPs peligrosas.")
 
+def opcion_cerrar_tickets_por_reglas(token, user_email, global_hours_ago):
+    """Cierra los tickets abiertos que cumplen alguna regla del archivo de reglas, evaluándolas todas en una sola pasada."""
+    if not token or not user_email:
+        print("⛔ No se puede continuar sin token o user_email.")
+        return
+
+    motor = obtener_motor_reglas()
+    if motor is None:
+        print("ℹ️ El cierre por reglas requiere el motor de reglas. Habilítalo en la sección [REGLAS] de 'config.properties'.")
+        return
+
+    print("\n--- Cerrar Tickets según las Reglas de Cierre ---")
+    for regla in motor.reglas:
+        print(f"  Regla {regla.nombre}: comentario '{regla.comentario}'")
+    confirmacion = input(f"⚠️ ¿Estás seguro de que quieres cerrar TODOS los tickets 'new' o 'in progress' encontrados en las últimas {global_hours_ago} horas que cumplan alguna de estas reglas? (s/N): ").lower()
+    if confirmacion != 's':
+        print("🚫 Operación cancelada.")
+        return
+
+    incidentes_abiertos = obtener_incidentes_api(token, hours_ago=global_hours_ago, status_filter=['new', 'in progress'], limit=10000)
+
+    if not incidentes_abiertos:
+        print("ℹ️ No se encontraron incidentes abiertos o en progreso para cerrar en el período especificado.")
+        return
+
+    from planificador import CAMPOS_IP
+    print(f"\n🛠️ Procesando cierre de incidentes según las reglas...")
+    motor.reiniciar()
+    cerrados_count = 0
+    for inc in incidentes_abiertos:
+        incident_uuid = inc.get("id")
+        incident_display_id = inc.get("display_id")
+
+        if not incident_uuid or not incident_display_id:
+            print(f"⏭️ Omitiendo incidente por falta de ID o Display ID: {inc.get('summary')}")
+            continue
+
+        candidatas = motor.candidatas(inc)
+        if not candidatas:
+            continue
+
+        # Los detalles sólo se piden si alguna regla candidata mira los assets/indicadores
+        data = inc
+        if motor.necesita_detalles(candidatas) and not all(campo in inc for campo in CAMPOS_IP):
+            incident_details = get_incident_details(token, incident_uuid)
+            if incident_details is None:
+                obtener_cola_reintentos().encolar("incidente", incident_uuid=incident_uuid)
+                continue
+            if not incident_details or not incident_details.get("data"):
+                print(f"⚠️ No se pudieron obtener detalles para {incident_display_id}, se omite su procesamiento.")
+                continue
+            data = incident_details["data"]
+
+        regla = motor.evaluar(data, candidatas=candidatas)
+        if regla is None:
+            continue
+
+        print(f"➡️  Procesando Display ID: {incident_display_id}, Regla: {regla.nombre}")
+
+        comentado = comentar_ticket(token, incident_display_id, regla.comentario, user_email)
+        if comentado is None:
+            _encolar_cierre(incident_uuid, incident_display_id, regla.comentario, user_email, comentado=False)
+        elif comentado:
+            cerrado = close_ticket(token, incident_uuid)
+            if cerrado is None:
+                _encolar_cierre(incident_uuid, incident_display_id, regla.comentario, user_email, comentado=True)
+            elif cerrado:
+                cerrados_count += 1
+        else:
+            print(f"⚠️ No se pudo comentar el ticket {incident_display_id}, no se procederá a cerrar.")
+        print("-" * 30)
+
+    _guardar_cola_reintentos()
+    print(f"\n✅ Operación completada. Se procesaron para cierre {cerrados_count} tickets según las reglas.")
+    for metricas in motor.metricas():
+        print(f"  Regla {metricas['regla']:<30} aciertos: {metricas['aciertos']:>5}  tiempo: {metricas['tiempo'] * 1000:.1f} ms")
+
 
 def opcion_ver_detalle_incidente(token):
     """Permite al usuario ver los detalles completos de un incidente por su UUID."""
@@ -364,14 +923,27 @@ def opcion_ver_detalle_incidente(token):
         return
 
     print("\n--- Ver Detalle de un Incidente ---")
-    incident_uuid_input = input("Introduce el UUID del incidente a detallar: ").strip()
+    incident_uuid_input = input("Introduce el UUID del incidente a detallar (o su Display ID si está en el almacén local): ").strip()
     
     if not incident_uuid_input: 
         print("❌ UUID del incidente no puede estar vacío.")
         return
 
+    almacen = _consultar_almacen()
+    if almacen:
+        detalles, sincronizado = almacen.detalle(incident_uuid_input)
+        if detalles and detalles.get("data"):
+            fecha = datetime.fromtimestamp(sincronizado).strftime("%Y-%m-%d %H:%M:%S")
+            print(f"\n--- Detalles del Incidente (almacén local, sincronizado el {fecha}) ---")
+            print(json.dumps(detalles.get("data"), indent=4, ensure_ascii=False))
+            return
+        print("ℹ️ El incidente no tiene detalles en el almacén local, se consultan a la API.")
+        incident_uuid_input = (almacen.buscar(incident_uuid_input) or {}).get("id", incident_uuid_input)
+
     print(f"🔍 Obteniendo detalles para el incidente UUID: {incident_uuid_input}...")
     detalles = get_incident_details(token, incident_uuid_input)
+    if detalles and detalles.get("data") and obtener_almacen():
+        obtener_almacen().guardar_detalles(incident_uuid_input, detalles)
 
     if detalles and detalles.get("data"):
         print("\n--- Detalles del Incidente ---")
@@ -382,10 +954,411 @@ def opcion_ver_detalle_incidente(token):
     else:
         print(f"ℹ️ No se pudieron obtener detalles para el incidente UUID: {incident_uuid_input} o el incidente no existe.")
 
+def opcion_buscar_por_ip():
+    """Muestra los incidentes del almacén local en cuyos assets o indicadores aparece una IP."""
+    almacen = obtener_almacen()
+    if almacen is None:
+        print("ℹ️ La búsqueda por IP requiere el almacén local. Habilítalo en la sección [ALMACEN] de 'config.properties'.")
+        return
+
+    print("\n--- Buscar Incidentes por IP (almacén local) ---")
+    ip = input("Introduce la IP a buscar: ").strip()
+    if not ip:
+        print("❌ La IP no puede estar vacía.")
+        return
+
+    incidentes = almacen.incidentes_por_ip(ip)
+    if not incidentes:
+        print(f"ℹ️ No hay incidentes en el almacén local con la IP {ip} (sólo se indexan los incidentes cuyos detalles se han obtenido).")
+        return
+    print(f"\n🔎 Incidentes con la IP {ip}:")
+    for inc in incidentes:
+        imprimir_info_basica_incidente(inc)
+
+
+# --- REINTENTOS DEL TRABAJO OMITIDO POR CIRCUITOS ABIERTOS ---
+def _encolar_cierre(incident_uuid, display_id, comment_text, user_email, comentado):
+    """Deja pendiente el comentario y cierre de un incidente (o sólo el cierre si ya se comentó)."""
+    obtener_cola_reintentos().encolar("cierre", incident_uuid=incident_uuid, display_id=display_id,
+                                      comment_text=comment_text, user_email=user_email, comentado=comentado)
+
+def reintentar_pendientes(token, user_email):
+    """Retoma el trabajo que ejecuciones anteriores dejaron pendiente por tener un circuito abierto.
+
+    Los incidentes pendientes y los eventos pendientes de enviar a Splunk no se procesan aquí: se devuelven
+    sus entradas para que quien llama descarte las de incidentes que vuelvan a aparecer en el listado (así no
+    se procesan ni se envían dos veces) y retome el resto con '_retomar_pendientes'.
+    """
+    distribuidor = obtener_distribuidor()
+    if distribuidor is not None:
+        retomados = distribuidor.retomar_pendientes(_presupuesto_agotado)
+        if retomados:
+            print(f"🔁 Reenviando {retomados} eventos pendientes a los [DESTINOS]...")
+    cola = obtener_cola_reintentos()
+    entradas = cola.extraer_todas()
+    if not entradas:
+        return []
+    print(f"🔁 Reintentando {len(entradas)} operaciones pendientes de ejecuciones anteriores...")
+    por_incidente = []
+    for posicion, entrada in enumerate(entradas):
+        if _presupuesto_agotado():
+            print(f"⏰ Presupuesto de tiempo agotado: {len(entradas) - posicion} operaciones siguen pendientes.")
+            cola.devolver(entradas[posicion:])
+            break
+        tipo = entrada.get("tipo")
+        if tipo in ("incidente", "evento_splunk", "cuerpo_splunk"):
+            por_incidente.append(entrada)
+        elif tipo == "cierre":
+            incident_uuid, display_id = entrada["incident_uuid"], entrada["display_id"]
+            comentado = entrada.get("comentado") or comentar_ticket(token, display_id, entrada["comment_text"], user_email)
+            if comentado is None:
+                _encolar_cierre(incident_uuid, display_id, entrada["comment_text"], user_email, comentado=False)
+            elif comentado and close_ticket(token, incident_uuid) is None:
+                _encolar_cierre(incident_uuid, display_id, entrada["comment_text"], user_email, comentado=True)
+        else:
+            print(f"⚠️ Operación pendiente desconocida, se descarta: {entrada}")
+    cola.guardar()
+    return por_incidente
+
+def _retomar_pendientes(proceso, entradas):
+    """Reenvía los eventos pendientes de enviar a Splunk y procesa por ID los incidentes pendientes.
+
+    Si un incidente tiene varios eventos pendientes sólo se reenvía el último. Si se agota el presupuesto de
+    tiempo, las entradas restantes vuelven a la cola de reintentos.
+    """
+    eventos = {}
+    incident_ids = []
+    for entrada in entradas:
+        if entrada["tipo"] == "incidente":
+            incident_ids.append(entrada["incident_uuid"])
+        else:
+            # Las entradas anteriores a guardar el ID del incidente no se agrupan
+            eventos[entrada.get("incident_uuid") or id(entrada)] = entrada
+    eventos = list(eventos.values())
+    for posicion, entrada in enumerate(eventos):
+        if _presupuesto_agotado():
+            print(f"⏰ Presupuesto de tiempo agotado: {len(eventos) - posicion} eventos pendientes vuelven a la cola de reintentos.")
+            obtener_cola_reintentos().devolver(eventos[posicion:] + [e for e in entradas if e["tipo"] == "incidente"])
+            return
+        proceso.reenviar_pendiente(entrada)
+    # Un mismo incidente puede haberse encolado más de una vez
+    _procesar_por_id(proceso, list(dict.fromkeys(incident_ids)))
+
+# --- PROCESO DE INGESTA (común al proceso original y a la reingesta desde fichero) ---
+class ProcesoIngesta:
+    """Aplica a cada incidente el filtro de estado, la comprobación de IPs peligrosas, el envío a Splunk y el cierre."""
+
+    def __init__(self, token, user_email, cerrar_tickets=True, usar_huellas=True):
+        self.token = token
+        self.user_email = user_email
+        self.cerrar_tickets = cerrar_tickets
+        self.contadores = {"high": 0, "critical": 0, "cerrados_ip": 0, "con_ip_peligrosa": 0, "procesados": 0}
+        # Segundos desde el inicio del proceso hasta que Splunk acepta cada incidente, por severidad
+        self.inicio = time.monotonic()
+        self.latencias = {severidad: [] for severidad in SEVERIDADES_ORDENADAS}
+        config_prioridad = obtener_config_prioridad()
+        self.vaciar_hec_desde = config_prioridad[1] if config_prioridad else None
+        self.proyeccion = obtener_proyeccion()
+        if self.proyeccion:
+            self.proyeccion.reiniciar()
+        self.distribuidor = obtener_distribuidor()
+        self.enviador_hec = None if self.distribuidor else obtener_enviador_hec()
+        self._pendientes_hec = []
+        self._lock = threading.Lock()
+        # Sin 'usar_huellas' se envían siempre eventos completos y las huellas [DELTA] no se consultan ni se confirman
+        self.huellas = obtener_registro_huellas() if usar_huellas else None
+        self.almacen = obtener_almacen()
+        if self.huellas:
+            self._huellas_inicio = (self.huellas.completos, self.huellas.deltas, self.huellas.sin_cambios)
+        self.reglas = obtener_motor_reglas()
+        if self.reglas:
+            self.reglas.reiniciar()
+        from planificador import PlanificadorDetalles
+        acciones = obtener_acciones()
+        self.planificador = PlanificadorDetalles(
+            enviar_splunk=acciones["enviar_splunk"],
+            cerrar_por_ip=acciones["cerrar_por_ip"],
+            ips_peligrosas=IPS_PELIGROSAS,
+            reglas=self.reglas,
+        )
+
+    def _registrar_enviado(self, severity, incident_uuid=None, huella=None):
+        latencia = time.monotonic() - self.inicio
+        with self._lock:
+            if severity in self.latencias:
+                self.latencias[severity].append(latencia)
+            if severity in ("high", "critical"):
+                self.contadores[severity] += 1
+            if huella is not None:
+                self.huellas.confirmar(incident_uuid, huella)
+
+    def _contar(self, contador):
+        with self._lock:
+            self.contadores[contador] += 1
+
+    def _enviar_lote_hec(self, lote):
+        if self.vaciar_hec_desde is not None:
+            lote.sort(key=lambda pendiente: -RANGO_SEVERIDAD.get(pendiente[1], -1))
+        resultados = self.enviador_hec.enviar([cuerpo for cuerpo, _, _ in lote])
+        for (cuerpo, sev, incident_uuid, huella), enviado in zip(lote, resultados):
+            if enviado:
+                self._registrar_enviado(sev, incident_uuid, huella)
+            elif enviado is None:
+                # Se guardan los bytes ya serializados, que se reenvían tal cual
+                obtener_cola_reintentos().encolar("cuerpo_splunk", cuerpo=cuerpo.decode("utf-8"),
+                                                  incident_uuid=incident_uuid, huella=huella)
+
+    def reenviar_pendiente(self, entrada):
+        """Reenvía un evento de la cola de reintentos ('evento_splunk' o 'cuerpo_splunk') y confirma su huella [DELTA]."""
+        if entrada["tipo"] == "cuerpo_splunk":
+            enviado = enviar_cuerpo_a_splunk(entrada["cuerpo"].encode("utf-8"))
+        else:
+            enviado = send_to_splunk(entrada["evento"])
+        if enviado is None:
+            obtener_cola_reintentos().devolver([entrada])
+        elif enviado and entrada.get("huella") is not None and self.huellas:
+            with self._lock:
+                self.huellas.confirmar(entrada["incident_uuid"], entrada["huella"])
+
+    def vaciar_pendientes_hec(self):
+        """Envía en lote los eventos acumulados y actualiza los contadores por severidad."""
+        with self._lock:
+            lote, self._pendientes_hec = self._pendientes_hec, []
+        if lote:
+            self._enviar_lote_hec(lote)
+
+    def enviar_a_splunk(self, incident_uuid, evento, severity):
+        """Proyecta el evento y lo envía a Splunk (directamente, a través del enviador HEC adaptativo o a los [DESTINOS]).
+
+        En modo delta, si el incidente ya se envió antes, sólo se envían sus cambios.
+        """
+        with self._lock:
+            if self.proyeccion:
+                evento = self.proyeccion.aplicar(evento)
+            huella = None
+            if self.huellas:
+                from delta import SIN_CAMBIOS
+                tipo, evento, huella = self.huellas.calcular(incident_uuid, evento)
+                if tipo == SIN_CAMBIOS:
+                    print(f"⏭️ {incident_uuid} no ha cambiado desde el último envío a Splunk, se omite.")
+                    return
+        if self.distribuidor or self.enviador_hec:
+            # El evento se serializa una sola vez (fuera del cerrojo) y esos bytes se reutilizan en todos los envíos
+            from serializacion import codificar_evento_hec
+            cuerpo = codificar_evento_hec(evento)
+        if self.distribuidor:
+            # Cuenta como enviado (y confirma la huella) en cuanto un destino lo acepta; los que
+            # fallen lo reciben más tarde desde su fichero de pendientes
+            def al_terminar(ok):
+                if ok:
+                    self._registrar_enviado(severity, incident_uuid, huella)
+            self.distribuidor.enviar(cuerpo, severity, al_terminar)
+            return
+        if self.enviador_hec:
+            lote = None
+            with self._lock:
+                self._pendientes_hec.append((cuerpo, severity, incident_uuid, huella))
+                controlador = self.enviador_hec.controlador
+                # Con [PRIORIDAD], un incidente urgente no espera a que se llene el búfer
+                urgente = self.vaciar_hec_desde is not None and RANGO_SEVERIDAD.get(severity, -1) >= self.vaciar_hec_desde
+                if urgente or len(self._pendientes_hec) >= controlador.lote * controlador.concurrencia:
+                    lote, self._pendientes_hec = self._pendientes_hec, []
+            if lote:
+                self._enviar_lote_hec(lote)
+            return
+        enviado = send_to_splunk(evento)
+        if enviado:
+            self._registrar_enviado(severity, incident_uuid, huella)
+        elif enviado is None:
+            obtener_cola_reintentos().encolar("evento_splunk", evento=evento, incident_uuid=incident_uuid, huella=huella)
+
+    def cerrar_por_ip(self, incident_uuid, display_id, comment_text=ORIGINAL_COMMENT_TEXT):
+        """Comenta y cierra un incidente con IP peligrosa (o que cumple una regla de cierre)."""
+        print(f"🗨️ Añadiendo comentario a {display_id}...")
+        comentado = comentar_ticket(self.token, display_id, comment_text, self.user_email)
+        if comentado is None:
+            _encolar_cierre(incident_uuid, display_id, comment_text, self.user_email, comentado=False)
+        elif comentado:
+            print(f"🔒 Cerrando incidente {display_id} (UUID: {incident_uuid})...")
+            cerrado = close_ticket(self.token, incident_uuid)
+            if cerrado is None:
+                _encolar_cierre(incident_uuid, display_id, comment_text, self.user_email, comentado=True)
+            elif cerrado:
+                self._contar("cerrados_ip")
+
+    # Etapas del procesamiento de un incidente. Cada una recibe y devuelve el contexto del incidente
+    # (o None si el incidente no debe seguir); 'procesar' las encadena y el pipeline las ejecuta en paralelo.
+
+    def preparar(self, incident, incident_details=None):
+        """Filtra por estado y planifica las llamadas necesarias. Devuelve el contexto del incidente o None."""
+        if self.almacen and incident_details is not None and incident.get("id"):
+            self.almacen.guardar_detalles(incident["id"], incident_details)
+        status = incident.get("status", "").lower()
+        if status not in ["new", "in progress"]:
+            return None
+
+        if incident.get("is_prevented", False):
+            return None
+
+        incident_uuid = incident.get("id")
+        display_id = incident.get("display_id", "N/A")
+        description = incident.get("summary", "Sin descripción")
+
+        if not incident_uuid or not display_id:
+            print(f"⏭️ Omitiendo incidente por falta de ID o Display ID: {description}")
+            return None
+
+        with self._lock:
+            plan = self.planificador.planificar(incident, detalles_disponibles=incident_details is not None)
+        return {
+            "incident": incident,
+            "uuid": incident_uuid,
+            "display_id": display_id,
+            "description": description,
+            "updated_at": incident.get("updated_at", "Fecha no disponible"),
+            "severity": incident.get("severity", "No especificada").lower(),
+            "status": status,
+            "plan": plan,
+            "detalles": incident_details,
+            "tiene_ip_peligrosa": False,
+            "regla": None,
+        }
+
+    def obtener_detalles(self, ctx):
+        """Pide los detalles del incidente a la API si el plan los necesita y no se tienen ya."""
+        if not ctx["plan"].detalles or ctx["detalles"] is not None:
+            return ctx
+        incident_details = get_incident_details(self.token, ctx["uuid"])
+        if incident_details is None:
+            obtener_cola_reintentos().encolar("incidente", incident_uuid=ctx["uuid"])
+            return None
+        if not incident_details or not incident_details.get("data"):
+            print(f"⚠️ No se pudieron obtener detalles para {ctx['display_id']}, se omite su procesamiento avanzado.")
+            print(f"{ctx['updated_at']:<25} {ctx['display_id']:<15} {ctx['description']:<50} {ctx['severity'].capitalize():<10} {ctx['status']:<15} {'Desconocida'}")
+            return None
+        ctx["detalles"] = incident_details
+        if self.almacen:
+            self.almacen.guardar_detalles(ctx["uuid"], incident_details)
+        return ctx
+
+    def evaluar(self, ctx):
+        """Comprueba las IPs peligrosas (o las reglas de cierre) e imprime la fila del incidente."""
+        self._contar("procesados")
+        texto_ip = "No evaluada"
+        if ctx["plan"].comprobar_ip:
+            # Sin detalles, los assets/indicadores vienen en el propio listado
+            incident_details = ctx["detalles"]
+            fuente = incident_details if incident_details and incident_details.get("data") else {"data": ctx["incident"]}
+            if self.reglas:
+                ctx["regla"] = self.reglas.evaluar(fuente["data"], candidatas=ctx["plan"].reglas)
+                ctx["tiene_ip_peligrosa"] = ctx["regla"] is not None
+                texto_ip = f"Regla {ctx['regla'].nombre}" if ctx["regla"] else "False"
+            else:
+                ctx["tiene_ip_peligrosa"] = ip_in_assets_indicators(fuente, IPS_PELIGROSAS)
+                texto_ip = str(ctx["tiene_ip_peligrosa"])
+        print(f"{ctx['updated_at']:<25} {ctx['display_id']:<15} {ctx['description']:<50} {ctx['severity'].capitalize():<10} {ctx['status']:<15} {texto_ip}")
+        return ctx
+
+    def enviar(self, ctx):
+        """Envía el incidente a Splunk si el plan lo indica."""
+        if ctx["plan"].enviar:
+            print(f"📤 Enviando {ctx['display_id']} a Splunk...")
+            self.enviar_a_splunk(ctx["uuid"], ctx["detalles"].get("data"), ctx["severity"])
+        return ctx
+
+    def cerrar(self, ctx):
+        """Comenta y cierra el incidente si tiene IPs peligrosas (o cumple una regla de cierre, con su comentario)."""
+        if ctx["tiene_ip_peligrosa"]:
+            self._contar("con_ip_peligrosa")
+            if self.cerrar_tickets:
+                comentario = ctx["regla"].comentario if ctx["regla"] else ORIGINAL_COMMENT_TEXT
+                self.cerrar_por_ip(ctx["uuid"], ctx["display_id"], comentario)
+        return ctx
+
+    def aplazar_cierre(self, ctx):
+        """Deja en la cola de reintentos el comentario y cierre del incidente, en lugar de hacerlos ahora."""
+        if ctx["tiene_ip_peligrosa"]:
+            self._contar("con_ip_peligrosa")
+            if self.cerrar_tickets:
+                comentario = ctx["regla"].comentario if ctx["regla"] else ORIGINAL_COMMENT_TEXT
+                _encolar_cierre(ctx["uuid"], ctx["display_id"], comentario, self.user_email, comentado=False)
+
+    def procesar(self, incident, incident_details=None):
+        """Procesa un incidente. Si no se pasan sus detalles, se piden a la API sólo cuando alguna acción los necesita."""
+        ctx = self.preparar(incident, incident_details)
+        for etapa in (self.obtener_detalles, self.evaluar, self.enviar, self.cerrar):
+            if ctx is None:
+                return
+            ctx = etapa(ctx)
+
+    def finalizar(self):
+        """Envía lo que quede pendiente. Debe llamarse al terminar de procesar incidentes."""
+        if self.enviador_hec:
+            self.vaciar_pendientes_hec()
+        if self.distribuidor:
+            self.distribuidor.vaciar()
+        if self.huellas:
+            self.huellas.guardar()
+        _guardar_cola_reintentos()
+
+    def imprimir_resumen(self):
+        """Imprime las líneas de resumen comunes a todos los modos de ingesta."""
+        print(f"{'Incidentes High enviados a Splunk':<35} | {self.contadores['high']:>5}")
+        print(f"{'Incidentes Critical enviados a Splunk':<35} | {self.contadores['critical']:>5}")
+        motivo = "reglas" if self.reglas else "IPs peligrosas"
+        if self.cerrar_tickets:
+            print(f"{'Incidentes cerrados por ' + motivo:<35} | {self.contadores['cerrados_ip']:>5}")
+        else:
+            print(f"{'Incidentes con ' + motivo:<35} | {self.contadores['con_ip_peligrosa']:>5}")
+        if self.reglas:
+            for metricas in self.reglas.metricas():
+                print(f"{'Regla ' + metricas['regla']:<35} | {metricas['aciertos']:>5} ({metricas['tiempo'] * 1000:.1f} ms)")
+        if self.planificador.llamadas_detalle or self.planificador.llamadas_evitadas:
+            print(f"{'Llamadas de detalle realizadas':<35} | {self.planificador.llamadas_detalle:>5}")
+            print(f"{'Llamadas de detalle evitadas':<35} | {self.planificador.llamadas_evitadas:>5}")
+        if self.proyeccion and self.proyeccion.eventos:
+            stats = self.proyeccion.resumen()
+            print(f"{'Bytes de eventos antes de proyectar':<35} | {stats['bytes_antes']:>5}")
+            print(f"{'Bytes de eventos tras proyectar':<35} | {stats['bytes_despues']:>5}")
+            print(f"{'Reducción de volumen HEC':<35} | {stats['ahorro_pct']:>4.1f}%")
+        if self.huellas:
+            completos, deltas, sin_cambios = (actual - inicial for actual, inicial in zip(
+                (self.huellas.completos, self.huellas.deltas, self.huellas.sin_cambios), self._huellas_inicio))
+            print(f"{'Eventos completos / delta':<35} | {completos:>5} / {deltas}")
+            print(f"{'Envíos omitidos por no tener cambios':<35} | {sin_cambios:>5}")
+        if _circuitos:
+            for nombre, circuito in _circuitos.items():
+                metricas = circuito.metricas()
+                print(f"{'Circuito ' + nombre:<35} | {metricas['estado']:>5} (omitidas: {metricas['rechazadas']}, aperturas: {metricas['aperturas']})")
+            print(f"{'Operaciones pendientes de reintento':<35} | {len(obtener_cola_reintentos()):>5}")
+        if self.distribuidor:
+            for metricas in self.distribuidor.metricas():
+                print(f"{'Destino ' + metricas['destino']:<35} | {metricas['enviados']:>5} (fallidos: {metricas['fallidos']}, desbordados: {metricas['desbordados']}, aplazados: {metricas['aplazados']}, descartados: {metricas['descartados']})")
+        for severidad in reversed(SEVERIDADES_ORDENADAS):
+            if self.latencias[severidad]:
+                from prioridad import percentiles
+                p = percentiles(self.latencias[severidad])
+                print(f"{'Tiempo hasta Splunk ' + severidad.capitalize() + ' (s)':<35} | p50 {p[50]:.2f} / p90 {p[90]:.2f} / p99 {p[99]:.2f}")
+        if self.enviador_hec:
+            metricas = self.enviador_hec.controlador.metricas()
+            latencia = metricas["latencia_media"]
+            print(f"{'HEC: tamaño de lote actual':<35} | {metricas['lote_actual']:>5}")
+            print(f"{'HEC: peticiones en vuelo actuales':<35} | {metricas['concurrencia_actual']:>5}")
+            print(f"{'HEC: latencia media (s)':<35} | {latencia if latencia is not None else 0:>5.2f}")
+            print(f"{'HEC: lotes correctos / con error':<35} | {metricas['lotes_ok']:>5} / {metricas['lotes_error']}")
+
+def _imprimir_cabecera_tabla():
+    print(f"\n{'Fecha actualización':<25} {'Display ID':<15} {'Descripción':<50} {'Severidad':<10} {'Estado':<15} {'IP Peligrosa'}")
+    print("=" * 130)
 
 # --- FUNCIÓN ORIGINAL (Adaptada para usar el rango de tiempo global) ---
 def get_incidents_original(token_existente, user_email_existente, global_hours_ago, limit=10000, offset=0):
-    """Ejecuta el proceso original de recolección, envío a Splunk y cierre de incidentes."""
+    """Ejecuta el proceso original de recolección, envío a Splunk y cierre de incidentes.
+
+    Con [PRESUPUESTO] habilitado, la ejecución tiene un tiempo total: los timeouts se derivan del tiempo
+    restante y, al agotarse, los incidentes sin procesar se guardan para empezar por ellos la próxima vez.
+    """
+    global _presupuesto_activo
     token, user_email = token_existente, user_email_existente
     print("ℹ️ Usando token y user_email existentes para 'get_incidents_original'.")
 
@@ -397,67 +1370,201 @@ def get_incidents_original(token_existente, user_email_existente, global_hours_a
 
     print("🕒 Iniciando recolección de incidentes (proceso original)...")
     print(f"📅 Rango de fechas: Desde {from_date} (últimas {global_hours_ago} horas) hasta {to_date}")
-    
-    incidentes = obtener_incidentes_api(token, hours_ago=global_hours_ago, limit=limit, offset=offset)
 
-    if not incidentes:
-        print("ℹ️ No se encontraron incidentes en el rango temporal especificado para el proceso original.")
+    config_presupuesto = obtener_config_presupuesto()
+    diferidos_previos = []
+    if config_presupuesto:
+        from presupuesto import PresupuestoTiempo, cargar_diferidos, guardar_diferidos
+        segundos, timeout_minimo, ruta_checkpoint = config_presupuesto
+        _presupuesto_activo = PresupuestoTiempo(segundos, timeout_minimo)
+        print(f"⏱️ Presupuesto de tiempo de la ejecución: {segundos:.0f}s")
+        diferidos_previos = cargar_diferidos(ruta_checkpoint)
+        if diferidos_previos:
+            print(f"📌 Se retoman {len(diferidos_previos)} incidentes diferidos en la ejecución anterior.")
+
+    try:
+        pendientes = reintentar_pendientes(token, user_email)
+
+        incidentes = obtener_incidentes_api(token, hours_ago=global_hours_ago, limit=limit, offset=offset)
+        almacen = obtener_almacen()
+        if almacen and incidentes:
+            print(f"🗄️ Almacén local: {almacen.sincronizar_listado(incidentes)} incidentes nuevos o actualizados.")
+        ids_listado = {inc.get("id") for inc in incidentes if inc.get("id")}
+        if diferidos_previos:
+            # Los diferidos van primero; si también aparecen en el listado se usa la versión más reciente
+            incidentes = [inc for inc in diferidos_previos if inc.get("id") not in ids_listado] + incidentes
+            ids_listado.update(inc.get("id") for inc in diferidos_previos if inc.get("id"))
+        # Lo pendiente de incidentes que ya están en el listado (o en los diferidos) se descarta: se procesan
+        # de nuevo con él, y en modo delta su evento se calcula frente a la última huella confirmada
+        pendientes = [entrada for entrada in pendientes if entrada.get("incident_uuid") not in ids_listado]
+
+        if not incidentes and not pendientes:
+            print("ℹ️ No se encontraron incidentes en el rango temporal especificado para el proceso original.")
+            if config_presupuesto:
+                guardar_diferidos(ruta_checkpoint, [])
+            return
+
+        if obtener_config_prioridad():
+            # Los incidentes más graves se procesan primero (el orden entre los de igual severidad se mantiene)
+            incidentes.sort(key=lambda inc: -RANGO_SEVERIDAD.get(inc.get("severity", "").lower(), -1))
+            print("🚦 Incidentes ordenados por severidad: se procesan primero los más graves.")
+
+        proceso = ProcesoIngesta(token, user_email)
+        _imprimir_cabecera_tabla()
+        if pendientes:
+            print(f"🔁 Retomando {len(pendientes)} envíos e incidentes pendientes que no aparecen en el listado...")
+            _retomar_pendientes(proceso, pendientes)
+
+        diferidos = []
+        pipeline = crear_pipeline(proceso)
+        if pipeline:
+            diferidos = pipeline.ejecutar(incidentes, detener=_presupuesto_agotado, original=lambda ctx: ctx["incident"])
+        else:
+            for posicion, incident in enumerate(incidentes):
+                if _presupuesto_agotado():
+                    diferidos = incidentes[posicion:]
+                    break
+                proceso.procesar(incident)
+        if diferidos:
+            print(f"\n⏰ Presupuesto de tiempo agotado: se difieren {len(diferidos)} incidentes a la próxima ejecución.")
+
+        proceso.finalizar()
+        if config_presupuesto:
+            guardar_diferidos(ruta_checkpoint, diferidos)
+
+        print("\n📘 Resumen de la ejecución (proceso original):")
+        print("="*50)
+        print(f"Período evaluado: Desde {from_date} hasta {to_date}")
+        proceso.imprimir_resumen()
+        if config_presupuesto:
+            print(f"{'Incidentes completados':<35} | {len(incidentes) - len(diferidos):>5}")
+            print(f"{'Incidentes diferidos':<35} | {len(diferidos):>5}")
+            print(f"{'Tiempo consumido / presupuesto (s)':<35} | {_presupuesto_activo.consumido():>5.0f} / {segundos:.0f}")
+        print("="*50)
+        if pipeline:
+            pipeline.imprimir_metricas()
+    finally:
+        _presupuesto_activo = None
+
+# --- INGESTA POR NOTIFICACIÓN (PUSH) ---
+def _procesar_por_id(proceso, incident_ids, sesion=None):
+    """Pide los detalles de cada incidente indicado y lo procesa con 'proceso'.
+
+    Si se agota el presupuesto de tiempo, los incidentes restantes vuelven a la cola de reintentos. Con una
+    'sesion' (receptor), un token rechazado se renueva y se repite la consulta, y los incidentes cuyos detalles
+    no se pudieron obtener se dejan en la cola de reintentos en lugar de omitirse.
+    """
+    for posicion, incident_uuid in enumerate(incident_ids):
+        if _presupuesto_agotado():
+            restantes = incident_ids[posicion:]
+            print(f"⏰ Presupuesto de tiempo agotado: {len(restantes)} incidentes pendientes vuelven a la cola de reintentos.")
+            encolado = time.time()
+            obtener_cola_reintentos().devolver([{"tipo": "incidente", "incident_uuid": uuid, "encolado": encolado}
+                                                for uuid in restantes])
+            break
+        if sesion is not None and sesion.caducado():
+            proceso.token, proceso.user_email = sesion.obtener()
+        incident_details = get_incident_details(proceso.token, incident_uuid)
+        if not incident_details and sesion is not None and sesion.caducado():
+            # El token se rechazó a mitad del lote: se renueva y se repite la consulta
+            proceso.token, proceso.user_email = sesion.obtener()
+            incident_details = get_incident_details(proceso.token, incident_uuid)
+        if incident_details is None:
+            obtener_cola_reintentos().encolar("incidente", incident_uuid=incident_uuid)
+            continue
+        if not incident_details or not incident_details.get("data"):
+            if sesion is not None:
+                print(f"⚠️ No se pudieron obtener detalles para {incident_uuid}, se deja en la cola de reintentos.")
+                obtener_cola_reintentos().encolar("incidente", incident_uuid=incident_uuid)
+            else:
+                print(f"⚠️ No se pudieron obtener detalles para {incident_uuid}, se omite su procesamiento.")
+            continue
+        proceso.procesar(incident_details["data"], incident_details)
+
+def procesar_incidentes_por_id(token, user_email, incident_ids, sesion=None):
+    """Procesa sólo los incidentes indicados (p. ej. notificados por webhook) sin listar toda la ventana."""
+    proceso = ProcesoIngesta(token, user_email)
+    _imprimir_cabecera_tabla()
+    _procesar_por_id(proceso, incident_ids, sesion)
+    proceso.finalizar()
+    return proceso
+
+def ejecutar_receptor():
+    """Arranca el receptor HTTP de notificaciones, con el sondeo como barrido de reconciliación de baja frecuencia."""
+    from receptor import ReceptorIncidentes
+
+    seccion = config["RECEPTOR"] if config.has_section("RECEPTOR") else None
+    try:
+        host = seccion.get("host", fallback="127.0.0.1") if seccion else "127.0.0.1"
+        puerto = seccion.getint("puerto", fallback=8080) if seccion else 8080
+        token_webhook = (seccion.get("token", fallback="") if seccion else "") or None
+        intervalo = seccion.getint("intervalo_reconciliacion", fallback=3600) if seccion else 3600
+        horas = seccion.getint("horas_reconciliacion", fallback=24) if seccion else 24
+    except ValueError as e:
+        print(f"❌ Error en la sección [RECEPTOR] del archivo 'config.properties': {e}")
         return
 
-    count_high, count_critical, count_closed_peligrosas = 0, 0, 0
+    # El token se renueva antes de caducar o tras un 401, con o sin barridos de reconciliación
+    sesion = SesionXdr()
+    token, user_email = sesion.obtener()
+    if not token or not user_email:
+        print("\n❌ Falló la autenticación XDR o falta userEmail en config. No se puede iniciar el receptor.")
+        return
 
-    print(f"\n{'Fecha actualización':<25} {'Display ID':<15} {'Descripción':<50} {'Severidad':<10} {'Estado':<15} {'IP Peligrosa'}")
-    print("=" * 130)
+    def procesar_ids(incident_ids):
+        token, user_email = sesion.obtener()
+        procesar_incidentes_por_id(token, user_email, incident_ids, sesion)
 
-    for incident in incidentes:
-        status = incident.get("status", "").lower()
-        if status not in ["new", "in progress"]:
-            continue
+    def reconciliar():
+        token, user_email = sesion.obtener()
+        get_incidents_original(token, user_email, horas)
 
-        if incident.get("is_prevented", False):
-            continue
+    if not token_webhook:
+        print("⚠️ [RECEPTOR] sin 'token': se aceptarán notificaciones sin autenticar.")
+    receptor = ReceptorIncidentes(procesar_ids, host=host, puerto=puerto, token=token_webhook,
+                                  reconciliar=reconciliar, intervalo_reconciliacion=intervalo)
+    receptor.iniciar()
 
-        incident_uuid = incident.get("id")
-        display_id = incident.get("display_id", "N/A")
-        description = incident.get("summary", "Sin descripción")
-        updated_at = incident.get("updated_at", "Fecha no disponible")
-        severity = incident.get("severity", "No especificada").lower()
+# --- REINGESTA DESDE FICHERO ---
+def get_incidents_replay(ruta):
+    """Reingesta incidentes desde un fichero NDJSON (opcionalmente gzip) sin llamar a la API XDR.
 
-        if not incident_uuid or not display_id:
-            print(f"⏭️ Omitiendo incidente por falta de ID o Display ID: {description}")
-            continue
+    Pasa cada incidente por el mismo filtro, comprobación de IPs y envío a Splunk que el proceso original.
+    Los tickets no se comentan ni se cierran: sólo se cuentan los que tienen IPs peligrosas.
+    """
+    from replay import LectorNDJSON, normalizar_registro
 
-        incident_details = get_incident_details(token, incident_uuid)
-        if not incident_details or not incident_details.get("data"):
-            print(f"⚠️ No se pudieron obtener detalles para {display_id}, se omite su procesamiento avanzado.")
-            print(f"{updated_at:<25} {display_id:<15} {description:<50} {severity.capitalize():<10} {status:<15} {'Desconocida'}")
-            continue
+    print(f"📂 Reingestando incidentes desde '{ruta}'...")
+    try:
+        lector = LectorNDJSON(ruta)
+    except OSError as e:
+        print(f"❌ Error al abrir '{ruta}': {e}")
+        return
 
-        tiene_ip_peligrosa = ip_in_assets_indicators(incident_details, IPS_PELIGROSAS)
-        print(f"{updated_at:<25} {display_id:<15} {description:<50} {severity.capitalize():<10} {status:<15} {str(tiene_ip_peligrosa)}")
+    # La reingesta (p. ej. tras reconstruir un índice de Splunk) reenvía siempre los eventos completos
+    proceso = ProcesoIngesta(token=None, user_email=None, cerrar_tickets=False, usar_huellas=False)
+    _imprimir_cabecera_tabla()
 
-        if severity in ["high", "critical"]:
-            print(f"📤 Enviando {display_id} a Splunk...")
-            enviado = send_to_splunk(incident_details.get("data"))
-            if enviado:
-                if severity == "high": count_high += 1
-                elif severity == "critical": count_critical += 1
-
-        if tiene_ip_peligrosa:
-            print(f"🗨️ Añadiendo comentario a {display_id}...")
-            comentado = comentar_ticket(token, display_id, ORIGINAL_COMMENT_TEXT, user_email)
-            if comentado:
-                print(f"🔒 Cerrando incidente {display_id} (UUID: {incident_uuid})...")
-                cerrado = close_ticket(token, incident_uuid)
-                if cerrado:
-                    count_closed_peligrosas += 1
-
-    print("\n📘 Resumen de la ejecución (proceso original):")
+    inicio = time.monotonic()
+    leidos = 0
+    for registro in lector:
+        incident, incident_details = normalizar_registro(registro)
+        if incident is None:
+            continue
+        leidos += 1
+        proceso.procesar(incident, incident_details)
+    proceso.finalizar()
+    duracion = max(time.monotonic() - inicio, 1e-9)
+
+    print("\n📘 Resumen de la reingesta desde fichero:")
     print("="*50)
-    print(f"Período evaluado: Desde {from_date} hasta {to_date}")
-    print(f"{'Incidentes High enviados a Splunk':<35} | {count_high:>5}")
-    print(f"{'Incidentes Critical enviados a Splunk':<35} | {count_critical:>5}")
-    print(f"{'Incidentes cerrados por IPs peligrosas':<35} | {count_closed_peligrosas:>5}")
+    print(f"Fichero: {ruta}")
+    print(f"{'Incidentes leídos':<35} | {leidos:>5}")
+    print(f"{'Líneas inválidas omitidas':<35} | {lector.errores:>5}")
+    proceso.imprimir_resumen()
+    print(f"{'Duración (s)':<35} | {duracion:>5.2f}")
+    print(f"{'Incidentes por segundo':<35} | {leidos / duracion:>5.0f}")
+    print(f"{'MB leídos por segundo':<35} | {lector.bytes_leidos / duracion / 1e6:>5.1f}")
     print("="*50)
 
 # --- PUNTO DE ENTRADA ---
@@ -497,6 +1604,8 @@ def menu_inicio():
         print("c) Cerrar tickets (solo IPs peligrosas)")
         print("d) Ver detalles de incidente (requiere UUID)")
         print("e) Ejecutar proceso original de 'get_incidents'")
+        print("f) Cerrar tickets según las reglas de cierre")
+        print("i) Buscar incidentes por IP (almacén local)")
         print("s) Salir")
 
         opcion = input("Selecciona una opción: ").lower()
@@ -512,11 +1621,36 @@ def menu_inicio():
         elif opcion == 'e':
             print("\n--- Ejecutando Proceso Original 'get_incidents' ---")
             get_incidents_original(token_existente=token, user_email_existente=user_email, global_hours_ago=global_hours_ago)
+        elif opcion == 'f':
+            opcion_cerrar_tickets_por_reglas(token, user_email, global_hours_ago)
+        elif opcion == 'i':
+            opcion_buscar_por_ip()
         elif opcion == 's':
+            _guardar_cola_reintentos()
             print("👋 Saliendo del programa.")
             break
         else:
             print("❌ Opción no válida. Por favor, intenta de nuevo.")
 
-if __name__ == "__main__":
+def main():
+    """Carga la configuración y arranca el menú interactivo, la reingesta (--replay) o el receptor (--receptor)."""
+    import argparse
+    parser = argparse.ArgumentParser(description="Envía incidentes de Harmony XDR a Splunk HEC.")
+    parser.add_argument("--replay", metavar="FICHERO",
+                        help="Reingesta incidentes desde un fichero NDJSON (o .gz) en lugar de consultar la API XDR")
+    parser.add_argument("--receptor", action="store_true",
+                        help="Arranca el receptor HTTP de notificaciones de incidentes (sección [RECEPTOR])")
+    args = parser.parse_args()
+
+    if not config.cargar():
+        exit()
+    if args.replay:
+        get_incidents_replay(args.replay)
+        return
+    if args.receptor:
+        ejecutar_receptor()
+        return
     menu_inicio()
+
+if __name__ == "__main__":
+    main()